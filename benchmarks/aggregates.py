@@ -0,0 +1,78 @@
+"""
+Benchmark of the incremental aggregate store ('aggregates' module).
+
+Analyses a pool of synthetic reviews once, then ingests growing numbers of
+reviews (replaying the pool with random months) into an AggregateStore. For
+each size it reports the update time per review, the saved file size, the
+load time and the time of top aspects and trend queries, which shouldn't grow
+with the number of reviews. Year counts are checked against the
+PolarityAggregator. Run from the project root:
+
+    python benchmarks/aggregates.py [largest number of reviews]
+"""
+
+# Standart libraries
+import os
+import random
+import sys
+import tempfile
+import time
+import timeit
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+from aggregates import AggregateStore  # noqa: E402
+from aggregation import PolarityAggregator  # noqa: E402
+from analyzer import Analyzer  # noqa: E402
+from synthetic import SyntheticCorpus  # noqa: E402
+
+POOL_SIZE = 2000
+
+
+def sorted_rows(df):
+    return(sorted(map(tuple, df.values.tolist())))
+
+
+def main(max_reviews=1000000):
+    analyzer = Analyzer(fast_tokenizer=True)
+    reviews = list(SyntheticCorpus().reviews(POOL_SIZE))
+    results = analyzer.analyze_batch([review.text for review in reviews])
+    rand = random.Random(0)
+
+    print(f'[Reviews] [Update us] [File KB] [Load ms] [Top ms] [Trend ms] [Years identical]')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, 'aggregates.npz')
+        size = 10000
+        while size <= max_reviews:
+            store = AggregateStore()
+            aggregator = PolarityAggregator()
+            dates = [(reviews[i % POOL_SIZE].year, rand.randint(1, 12)) for i in range(size)]
+
+            start = time.perf_counter()
+            for i, (year, month) in enumerate(dates):
+                store.update(results[i % POOL_SIZE], year, month)
+            update_time = (time.perf_counter() - start) / size
+
+            for i, (year, month) in enumerate(dates):
+                aggregator.update(results[i % POOL_SIZE], year)
+            identical = sorted_rows(store.to_dataframes()[0]) == sorted_rows(aggregator.to_dataframes()[0])
+
+            store.save(filename)
+            start = time.perf_counter()
+            store = AggregateStore.load(filename)
+            load_time = time.perf_counter() - start
+
+            aspect = store.aspects[0]
+            top_time = timeit.timeit(lambda: store.top(10, '2014-Q2', '2016'), number=100) / 100
+            trend_time = timeit.timeit(lambda: store.trend(aspect, 'month'), number=100) / 100
+
+            print(f'{size:{9}} {update_time * 1e6:{11}.2f} {os.path.getsize(filename) / 1024:{9}.1f} '
+                  f'{load_time * 1000:{9}.2f} {top_time * 1000:{8}.3f} {trend_time * 1000:{10}.3f} '
+                  f'{str(identical):>17}')
+            size *= 10
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
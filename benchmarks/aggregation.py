@@ -0,0 +1,94 @@
+"""
+Benchmark of the corpus polarity aggregation at increasing corpus sizes.
+
+Feeds synthetic 'aspect_polarity' dictionaries to 'PolarityAggregator' and
+reports the time per review, which should stay flat as the corpus grows. The
+former DataFrame based aggregation is timed on small sizes for reference.
+Run from the project root:
+
+    python benchmarks/aggregation.py
+"""
+
+# Standart libraries
+import os
+import random
+import sys
+import time
+
+# Third-party libraries
+import pandas as pd
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+from aggregation import PolarityAggregator  # noqa: E402
+
+
+def synthetic_reviews(n_reviews, n_aspects=200, years=range(2013, 2018), seed=0):
+    """
+    Return a list of (aspect_polarity, year) pairs with 1 to 5 aspects each.
+    """
+
+    rand = random.Random(seed)
+    aspects = [f'aspect {i}' for i in range(n_aspects)]
+
+    reviews = []
+    for _ in range(n_reviews):
+        polarities = {aspect: rand.choice([-3, -1, 0, 1, 3]) for aspect in rand.sample(aspects, rand.randint(1, 5))}
+        reviews.append((polarities, rand.choice(years)))
+
+    return(reviews)
+
+
+def legacy_update_polarity_count(df_corpus, review_polarities, year):
+    """
+    Former 'utils.update_polarity_count', using 'pd.concat' in place of the
+    removed 'DataFrame.append'.
+    """
+
+    for aspect, polarity in review_polarities.items():
+        df_id = df_corpus[(df_corpus.Aspect == aspect) & (df_corpus.Year == year)].index.tolist()
+        if df_id == []:
+            new_row = pd.DataFrame([[aspect, year, 0, 0]], columns=df_corpus.columns)
+            df_corpus = pd.concat([df_corpus, new_row], ignore_index=True)
+            df_id = df_corpus[(df_corpus.Aspect == aspect) & (df_corpus.Year == year)].index.tolist()
+
+        if polarity >= 0:
+            df_corpus.at[df_id[0], 'Positive'] += 1
+        else:
+            df_corpus.at[df_id[0], 'Negative'] += 1
+
+    return(df_corpus)
+
+
+def run_aggregator(reviews):
+    aggregator = PolarityAggregator()
+    for polarities, year in reviews:
+        aggregator.update(polarities, year)
+
+    return(aggregator.to_dataframes())
+
+
+def run_legacy(reviews):
+    df_corpus = pd.DataFrame(columns=['Aspect', 'Year', 'Positive', 'Negative'])
+    for polarities, year in reviews:
+        df_corpus = legacy_update_polarity_count(df_corpus, polarities, year)
+
+    return(df_corpus)
+
+
+def main():
+    print(f'[Implementation] [Reviews] [Seconds] [us/review]')
+    for name, function, sizes in [('legacy', run_legacy, [500, 1000, 2000]),
+                                  ('aggregator', run_aggregator, [25000, 50000, 100000, 200000])]:
+        for n_reviews in sizes:
+            reviews = synthetic_reviews(n_reviews)
+            start = time.perf_counter()
+            function(reviews)
+            elapsed = time.perf_counter() - start
+            print(f'{name:{16}} {n_reviews:{9}} {elapsed:{9}.3f} {1e6 * elapsed / n_reviews:{11}.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Throughput benchmark of the in-process Analyzer against the file-based loop.
+
+Writes a synthetic corpus to a folder, analyses it with 'main()' and then
+scores the same texts with 'Analyzer.analyze_batch', checking that the
+resulting DataFrames are identical. Resource loading is excluded from both
+timings. Run from the project root:
+
+    python benchmarks/analyzer.py [number of reviews] [batch size]
+"""
+
+# Standart libraries
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import corpus  # noqa: E402
+from aggregation import PolarityAggregator  # noqa: E402
+from analyzer import Analyzer  # noqa: E402
+from main import main as run_main  # noqa: E402
+from synthetic import SyntheticCorpus, write_directory  # noqa: E402
+
+
+def main(n_reviews=5000, batch_size=256):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        write_directory(SyntheticCorpus().reviews(n_reviews), temp_dir)
+        reviews = list(corpus.DirectorySource(temp_dir))
+
+        # File-based loop, without the resource loading reported by the instrumentation
+        report = os.path.join(temp_dir, 'report.json')
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            df_corpus, df_overall = run_main(source=corpus.DirectorySource(temp_dir), report=report)
+            loop_time = time.perf_counter() - start
+        with open(report, 'r') as report_file:
+            stages = json.load(report_file)['stages']
+        loop_time -= stages['load resources']['seconds'] + stages['build tokenizer']['seconds']
+
+    analyzer = Analyzer()
+    aggregator = PolarityAggregator()
+    start = time.perf_counter()
+    for i in range(0, len(reviews), batch_size):
+        batch = reviews[i:i + batch_size]
+        analyzer.analyze_batch([review.text for review in batch], [review.year for review in batch], aggregator)
+    df_batch, df_batch_overall = aggregator.to_dataframes()
+    batch_time = time.perf_counter() - start
+
+    identical = df_corpus.to_csv() + df_overall.to_csv() == df_batch.to_csv() + df_batch_overall.to_csv()
+    print(f'{n_reviews} reviews, batches of {batch_size}')
+    print(f'[Method]          [Seconds] [Reviews/s]')
+    print(f'{"file loop":{17}} {loop_time:{9}.2f} {n_reviews / loop_time:{11},.0f}')
+    print(f'{"analyze_batch":{17}} {batch_time:{9}.2f} {n_reviews / batch_time:{11},.0f}')
+    print(f'Identical results: {identical}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
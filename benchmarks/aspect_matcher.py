@@ -0,0 +1,117 @@
+"""
+Benchmark of aspect detection on large synthetic ontologies.
+
+Compares the former path (MWETokenizer merging multi-word aspects followed by
+an ontology lookup per word) against 'AspectMatcher', for ontologies of 10k and
+100k aspects. Run from the project root:
+
+    python benchmarks/aspect_matcher.py
+"""
+
+# Standart libraries
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+# Third-party libraries
+from nltk.tokenize import MWETokenizer
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import ontology  # noqa: E402
+from matcher import AspectMatcher  # noqa: E402
+
+
+def synthetic_ontology(n_aspects, vocabulary, rand):
+    """
+    Return an aspects dictionary with 'n_aspects' aspects of 1 to 4 words
+    taken from 'vocabulary'.
+    """
+
+    onto = dict()
+    while len(onto) < n_aspects:
+        aspect = ' '.join(rand.choice(vocabulary) for _ in range(rand.choice([1, 2, 2, 3, 3, 4])))
+        onto[aspect] = f'class {len(onto) % 500}'
+
+    return(onto)
+
+
+def synthetic_documents(n_documents, document_size, vocabulary, onto, rand, aspect_rate=0.05):
+    """
+    Return documents of random words from 'vocabulary', with aspects of 'onto'
+    inserted at about 'aspect_rate' of the positions.
+    """
+
+    aspects = [aspect.split(' ') for aspect in onto]
+    documents = []
+    for _ in range(n_documents):
+        tokens = []
+        while len(tokens) < document_size:
+            if rand.random() < aspect_rate:
+                tokens.extend(rand.choice(aspects))
+            else:
+                tokens.append(rand.choice(vocabulary))
+        documents.append(tokens)
+
+    return(documents)
+
+
+def legacy_detect(mwtokenizer, onto, tokens):
+    words = mwtokenizer.tokenize(tokens)
+
+    return([(pos, onto[word]) for pos, word in enumerate(words) if word in onto])
+
+
+def matcher_detect(matcher, tokens):
+    words, aspect_pos = matcher.merge(tokens)
+
+    return(list(aspect_pos.items()))
+
+
+def build(function):
+    """
+    Return the object built by 'function', the build time and the memory allocated.
+    """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    built = function()
+    elapsed = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return(built, elapsed, memory)
+
+
+def main(n_documents=2000, document_size=150, repeat=3, seed=0):
+    rand = random.Random(seed)
+    vocabulary = [f'w{i}' for i in range(20000)]
+
+    print(f'[Aspects] [Implementation] [Build s] [Build MB] [Tokens/s] [Aspects found]')
+    for n_aspects in [10000, 100000]:
+        onto = synthetic_ontology(n_aspects, vocabulary[:n_aspects // 10], rand)
+        documents = synthetic_documents(n_documents, document_size, vocabulary, onto, rand)
+        n_tokens = sum(len(tokens) for tokens in documents)
+
+        mwtokenizer, legacy_build, legacy_memory = build(
+            lambda: MWETokenizer(ontology.get_multi_word_aspects(onto), separator=' '))
+        matcher, matcher_build, matcher_memory = build(lambda: AspectMatcher(onto))
+
+        for name, detect, build_time, memory in [
+                ('mwetokenizer', lambda tokens: legacy_detect(mwtokenizer, onto, tokens), legacy_build, legacy_memory),
+                ('aho-corasick', lambda tokens: matcher_detect(matcher, tokens), matcher_build, matcher_memory)]:
+            elapsed = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                found = sum(len(detect(tokens)) for tokens in documents)
+                elapsed = min(elapsed, time.perf_counter() - start)
+            print(f'{n_aspects:{9}} {name:{16}} {build_time:{9}.2f} {memory / 2**20:{10}.1f} '
+                  f'{n_tokens / elapsed:{10},.0f} {found:{15}}')
+
+
+if __name__ == '__main__':
+    main()
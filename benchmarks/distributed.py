@@ -0,0 +1,97 @@
+"""
+Crash recovery and throughput check of the distributed mode ('distributed' module).
+
+Splits a synthetic corpus on a queue directory and analyses it with local
+worker processes, one of which is killed right after claiming its first
+shard. The surviving workers recover the abandoned claim once it's stale.
+The reduced DataFrames are compared with the ones returned by 'main()', and
+every shard must be accounted for exactly once. Run from the project root:
+
+    python benchmarks/distributed.py [number of reviews] [workers] [shard size]
+"""
+
+# Standart libraries
+import contextlib
+import io
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import corpus  # noqa: E402
+import distributed  # noqa: E402
+from main import main as run_main  # noqa: E402
+from synthetic import SyntheticCorpus, write_jsonl  # noqa: E402
+
+STALE_AFTER = 3
+
+
+def start_worker(queue_dir):
+    return(subprocess.Popen([sys.executable, os.path.join(PROJ_ROOT, 'src/distributed.py'), 'worker', queue_dir,
+                             '--stale-after', str(STALE_AFTER)], stdout=subprocess.DEVNULL))
+
+
+def kill_after_claim(queue_dir):
+    """
+    Start a worker and kill it once it claims a shard. Returns the claim left behind.
+    """
+
+    process = start_worker(queue_dir)
+    claimed_dir = os.path.join(queue_dir, 'claimed')
+    while True:
+        claims = [name for name in os.listdir(claimed_dir) if f'-{process.pid}-' in name]
+        if claims:
+            process.send_signal(signal.SIGKILL)
+            process.wait()
+            return(claims[0])
+        time.sleep(0.01)
+
+
+def main(n_reviews=20000, workers=2, shard_size=1000):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        reviews_file = os.path.join(temp_dir, 'reviews.jsonl')
+        write_jsonl(SyntheticCorpus().reviews(n_reviews), reviews_file)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            df_corpus, df_overall = run_main(source=corpus.JsonlSource(reviews_file), fast_tokenizer=True)
+        main_time = time.perf_counter() - start
+
+        queue_dir = os.path.join(temp_dir, 'queue')
+        start = time.perf_counter()
+        distributed.create_queue(corpus.JsonlSource(reviews_file), queue_dir, shard_size, fast_tokenizer=True)
+        split_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lost_claim = kill_after_claim(queue_dir)
+        processes = [start_worker(queue_dir) for _ in range(workers)]
+        for process in processes:
+            process.wait()
+        workers_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        df_queue_corpus, df_queue_overall = distributed.reduce_queue(queue_dir)
+        reduce_time = time.perf_counter() - start
+
+        status = distributed.status(queue_dir)
+        recovered = distributed._split_claim(lost_claim)[0] in [distributed._split_claim(name)[0] for name in
+                                                                os.listdir(os.path.join(queue_dir, 'done'))]
+        identical = df_corpus.to_csv() + df_overall.to_csv() == df_queue_corpus.to_csv() + df_queue_overall.to_csv()
+
+    print(f'{n_reviews} reviews, shards of {shard_size}, {workers} workers, claims stale after {STALE_AFTER}s')
+    print(f'main():  {main_time:.2f}s')
+    print(f'queue:   split {split_time:.2f}s, workers {workers_time:.2f}s (including the recovery wait), '
+          f'reduce {reduce_time:.3f}s')
+    print(f'Shards: {status["shards"]}, done: {status["done"]}, reviews accounted: {status["reviews"]}')
+    print(f'Killed worker claim {lost_claim} recovered: {recovered}')
+    print(f'Identical results: {identical}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:4]])
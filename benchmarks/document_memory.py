@@ -0,0 +1,75 @@
+"""
+Memory used per analysed Document.
+
+Builds, tags and scores documents for the pilot corpus replicated many times,
+keeping them all alive, and reports the memory allocated per document as
+measured by 'tracemalloc'. Resources, the shared tokenizer and it's vocabulary
+are created before measuring. Run from the project root:
+
+    python benchmarks/document_memory.py
+"""
+
+# Standart libraries
+import os
+import sys
+import tracemalloc
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import corpus  # noqa: E402
+import resources  # noqa: E402
+from document import Document  # noqa: E402
+from main import LIWC_FILE, ONTOLOGY_FILE  # noqa: E402
+from tokenizer import Tokenizer  # noqa: E402
+
+
+def measure(reviews, liwc, onto, tokenizer, **kwargs):
+    """
+    Return the memory allocated per document, in bytes, and the average
+    number of words per document.
+    """
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+
+    documents = []
+    for review in reviews:
+        # Copy the text, as if it was just read from the source
+        text = review.text.encode().decode()
+        document = Document(text, review.year, tokenizer, review_id=review.id, **kwargs)
+        document.tag_words(liwc, onto)
+        document.compute_polarity()
+        documents.append(document)
+
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    n_words = sum(len(document.words) for document in documents)
+
+    return(allocated / len(documents), n_words / len(documents))
+
+
+def main(copies=20):
+    liwc = resources.load_liwc(LIWC_FILE)
+    onto = resources.load_ontology_dict(ONTOLOGY_FILE)
+    tokenizer = Tokenizer.from_ontology(onto, fast=True)
+
+    reviews = list(corpus.DirectorySource(os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/')))
+    reviews = [review._replace(id=f'{review.id}-{i}') for i in range(copies) for review in reviews]
+
+    # Warm up the tokenizer vocabulary and the LIWC lexicon
+    measure(reviews, liwc, onto, tokenizer)
+
+    print(f'[Document] [Bytes/document] [Words/document]')
+    for name, kwargs in [('with text', {}), ('without text', {'keep_text': False})]:
+        try:
+            per_document, words = measure(reviews, liwc, onto, tokenizer, **kwargs)
+        except TypeError:
+            continue
+        print(f'{name:{12}} {per_document:{16},.0f} {words:{16}.1f}')
+
+
+if __name__ == '__main__':
+    main()
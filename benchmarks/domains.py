@@ -0,0 +1,119 @@
+"""
+Benchmark of the product domains registry ('domains' module).
+
+Compiles every ontology on the ontologies folder, then reports for each domain
+its aspect words and classes, the index size against the size of the plain
+dictionary, and the time to look up words on both. Finally, worker processes
+load every domain either as plain dictionaries (from their caches, see
+'resources.load_ontology_dict') or attaching to the indexes, reporting the
+private memory each worker adds (Linux only). The indexes are also loaded
+along with the per-process tokenizers 'DomainSelector' builds for each domain
+(MWETokenizer or AspectMatcher), which aren't shared, reporting their build
+time too. Run from the project root:
+
+    python benchmarks/domains.py [number of workers]
+"""
+
+# Standart libraries
+import multiprocessing
+import os
+import sys
+import time
+import timeit
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import domains  # noqa: E402
+import ontology  # noqa: E402
+import resources  # noqa: E402
+from tokenizer import Tokenizer  # noqa: E402
+
+METHODS = ['dict', 'index', 'index + tokenizers', 'index + matchers']
+
+
+def private_bytes():
+    """
+    Return the private memory of the current process, in bytes.
+    """
+
+    total = 0
+    with open('/proc/self/smaps_rollup', 'r') as smaps:
+        for line in smaps:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                total += int(line.split()[1]) * 1024
+
+    return(total)
+
+
+def _load_worker(method):
+    registry = domains.OntologyRegistry()
+
+    # NLTK is imported beforehand, so its modules don't count as tokenizers memory
+    import nltk.tokenize  # noqa: F401
+
+    before = private_bytes()
+    if method == 'dict':
+        loaded = [resources.load_ontology_dict(filename) for filename in registry.files.values()]
+    else:
+        loaded = [registry.get(domain) for domain in registry.domains]
+
+    # Touch every entry, as the analysis would
+    n_words = sum(1 for onto in loaded for word in onto if onto.get(word) is not None)
+
+    # Tokenizers built as 'DomainSelector.select' does
+    start = time.perf_counter()
+    if method.startswith('index + '):
+        tokenizers = [Tokenizer.from_ontology(onto, fast=True, aspect_matcher=method == 'index + matchers')
+                      for onto in loaded]
+    build_time = time.perf_counter() - start
+
+    return(private_bytes() - before, build_time, n_words)
+
+
+def main(workers=4):
+    registry = domains.OntologyRegistry()
+
+    start = time.perf_counter()
+    for domain in registry.domains:
+        domains.write_index(domains.index_filename(registry.files[domain]),
+                            resources.file_digest(registry.files[domain]),
+                            ontology.ontology_to_dict(registry.files[domain]))
+    compile_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    attached = [domains.CompiledOntology(domains.index_filename(filename)) for filename in registry.files.values()]
+    attach_time = time.perf_counter() - start
+
+    print(f'Compiled {len(registry.domains)} domains in {compile_time:.2f}s, attached in {attach_time * 1000:.2f}ms')
+    print(f'[Domain]     [Words] [Classes] [Index KB] [Dict KB] [Dict ns/get] [Index ns/get]')
+    for (domain, stats), onto in zip(registry.stats().items(), attached):
+        plain = dict(onto.items())
+        words = list(plain) + [word + 'x' for word in plain]
+        n_lookups = 50 * len(words)
+        dict_time = timeit.timeit(lambda: [plain.get(word) for word in words], number=50) / n_lookups
+        index_time = timeit.timeit(lambda: [onto.get(word) for word in words], number=50) / n_lookups
+
+        print(f'{domain:{12}} {stats["aspect_words"]:{7}} {stats["aspect_classes"]:{9}} '
+              f'{stats["index_bytes"] / 1024:{10}.1f} {stats["dict_bytes"] / 1024:{9}.1f} '
+              f'{dict_time * 1e9:{13}.0f} {index_time * 1e9:{14}.0f}')
+
+    if not os.path.exists('/proc/self/smaps_rollup'):
+        return
+
+    # Workers load the dictionaries from their compiled caches
+    for filename in registry.files.values():
+        resources.load_ontology_dict(filename)
+
+    print(f'\n[Method]           [Workers] [Private KB per worker] [Tokenizers ms]')
+    for method in METHODS:
+        with multiprocessing.get_context('spawn').Pool(workers) as pool:
+            results = pool.map(_load_worker, [method] * workers)
+        per_worker = sum(private for private, _, _ in results) / workers
+        build_time = sum(build for _, build, _ in results) / workers
+        print(f'{method:{18}} {workers:{9}} {per_worker / 1024:{23}.1f} {build_time * 1000:{15}.2f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
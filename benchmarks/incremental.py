@@ -0,0 +1,61 @@
+"""
+Benchmark of the incremental analysis ('main(incremental=True)').
+
+Analyses a synthetic corpus into an empty result store, then analyses it again
+with a percentage of new reviews added, checking that the DataFrames are
+identical to a full analysis of the grown corpus. Run from the project root:
+
+    python benchmarks/incremental.py [number of reviews] [percentage of new reviews]
+"""
+
+# Standart libraries
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import corpus  # noqa: E402
+from main import main as run_main  # noqa: E402
+from synthetic import SyntheticCorpus, write_jsonl  # noqa: E402
+
+
+def timed_run(**kwargs):
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        df_corpus, df_overall = run_main(**kwargs)
+
+    return(time.perf_counter() - start, df_corpus.to_csv() + df_overall.to_csv())
+
+
+def main(n_reviews=10000, new_percentage=1):
+    n_new = n_reviews * new_percentage // 100
+    reviews = list(SyntheticCorpus().reviews(n_reviews + n_new))
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        store_file = os.path.join(temp_dir, 'results.sqlite')
+        corpus_file = os.path.join(temp_dir, 'reviews.jsonl')
+        grown_file = os.path.join(temp_dir, 'grown.jsonl')
+        write_jsonl(reviews[:n_reviews], corpus_file)
+        write_jsonl(reviews, grown_file)
+
+        full_time, _ = timed_run(source=corpus.JsonlSource(corpus_file), incremental=True, store_file=store_file)
+        incremental_time, output = timed_run(source=corpus.JsonlSource(grown_file), incremental=True,
+                                             store_file=store_file)
+        reference_time, reference = timed_run(source=corpus.JsonlSource(grown_file))
+
+    print(f'{n_reviews} reviews, {n_new} new')
+    print(f'[Run]                  [Seconds] [vs full run]')
+    print(f'{"full (no store)":{22}} {reference_time:{9}.2f} {1:{13}.1%}')
+    print(f'{"full (filling store)":{22}} {full_time:{9}.2f} {full_time / reference_time:{13}.1%}')
+    print(f'{"incremental":{22}} {incremental_time:{9}.2f} {incremental_time / reference_time:{13}.1%}')
+    print(f'Identical results: {output == reference}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
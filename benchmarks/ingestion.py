@@ -0,0 +1,82 @@
+"""
+Memory benchmark of the corpus ingestion from spreadsheets and CSV files.
+
+Writes synthetic reviews to a .xlsx sheet and a CSV file of growing sizes and
+streams them with 'corpus.SheetSource' and 'corpus.CsvSource', reporting the
+peak memory (Python objects) and the throughput, compared to loading the sheet
+with 'pandas.read_excel'. Run from the project root:
+
+    python benchmarks/ingestion.py [number of reviews]
+"""
+
+# Standart libraries
+import csv
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Third-party libraries
+import openpyxl  # noqa: E402
+import pandas as pd  # noqa: E402
+
+# Local files
+import corpus  # noqa: E402
+from synthetic import SyntheticCorpus  # noqa: E402
+
+
+def write_files(n_reviews, sheet_file, csv_file):
+    workbook = openpyxl.Workbook(write_only=True)
+    worksheet = workbook.create_sheet()
+    worksheet.append(['Year', 'Review'])
+
+    with open(csv_file, 'w', newline='') as reviews_file:
+        writer = csv.writer(reviews_file)
+        writer.writerow(['date', 'text'])
+        for review in SyntheticCorpus().reviews(n_reviews):
+            worksheet.append([review.year, review.text])
+            writer.writerow([review.year, review.text])
+
+    workbook.save(sheet_file)
+
+
+def measure(function):
+    """
+    Return the number of reviews read by 'function', the peak memory in bytes
+    and the time spent.
+    """
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    n_reviews = function()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return(n_reviews, peak, elapsed)
+
+
+def main(n_reviews=20000):
+    print(f'[Reviews] [Reader]          [Peak MB] [Reviews/s]')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        sheet_file = os.path.join(temp_dir, 'reviews.xlsx')
+        csv_file = os.path.join(temp_dir, 'reviews.csv')
+
+        for size in (n_reviews // 4, n_reviews):
+            write_files(size, sheet_file, csv_file)
+            readers = [
+                ('SheetSource', lambda: sum(1 for _ in corpus.SheetSource(sheet_file, sheet=0))),
+                ('CsvSource', lambda: sum(1 for _ in corpus.CsvSource(csv_file))),
+                ('pandas.read_excel', lambda: len(pd.read_excel(sheet_file))),
+            ]
+            for name, function in readers:
+                count, peak, elapsed = measure(function)
+                print(f'{count:{9}} {name:{17}} {peak / 2**20:{9}.1f} {count / elapsed:{11},.0f}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,84 @@
+"""
+Microbenchmark of LIWC sentiment lookups over the tokens of the pilot corpus.
+
+Compares the original per-call derivation search against the compiled lexicon
+used by 'LIWC.get_sentiment'. Run from the project root:
+
+    python benchmarks/liwc_lookup.py
+"""
+
+# Standart libraries
+import glob
+import os
+import sys
+import timeit
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+from liwc import LIWC  # noqa: E402
+
+
+def legacy_get_sentiment(dictionary, word):
+    """
+    Original implementation of 'LIWC.get_sentiment', kept as reference.
+    """
+
+    word_derivations = [word]
+    if len(word) > 2:
+        word_derivations.append(word[:-1])
+    if len(word) > 3:
+        word_derivations.append(word[:-2])
+
+    for term in word_derivations:
+        polarity = dictionary.get(term)
+        if polarity is not None:
+            return(polarity)
+
+    return(None)
+
+
+def corpus_tokens():
+    """
+    Return the lowercased whitespace tokens of every review in the pilot corpus.
+    """
+
+    corpus_path = os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/')
+    tokens = []
+    for filename in sorted(glob.glob(os.path.join(corpus_path, '*.txt'))):
+        with open(filename, 'r') as review_file:
+            tokens.extend(review_file.read().lower().split())
+
+    return(tokens)
+
+
+def main(repeat=5):
+    liwc = LIWC(os.path.join(PROJ_ROOT, 'data/external/liwc/LIWC2007_Portugues_win.dic'))
+    tokens = corpus_tokens()
+
+    # Both implementations must agree on every token
+    mismatches = [w for w in tokens if legacy_get_sentiment(liwc.dict, w) != liwc.get_sentiment(w)]
+    print(f'{len(tokens)} tokens, {len(set(tokens))} distinct, {len(mismatches)} mismatches')
+
+    def run_legacy():
+        for word in tokens:
+            legacy_get_sentiment(liwc.dict, word)
+
+    def run_compiled():
+        for word in tokens:
+            liwc.get_sentiment(word)
+
+    for name, function in [('legacy', run_legacy), ('compiled', run_compiled)]:
+        best = min(timeit.repeat(function, number=10, repeat=repeat)) / 10
+        print(f'{name:{10}} {len(tokens) / best:{14},.0f} lookups/s')
+
+    # Prefix wildcard semantics, for reference
+    liwc_wildcards = LIWC(os.path.join(PROJ_ROOT, 'data/external/liwc/LIWC2007_Portugues_win.dic'),
+                          expand_wildcards=True)
+    changed = sorted({w for w in tokens if liwc.get_sentiment(w) != liwc_wildcards.get_sentiment(w)})
+    print(f'expand_wildcards=True changes {len(changed)} distinct tokens: {", ".join(changed)}')
+
+
+if __name__ == '__main__':
+    main()
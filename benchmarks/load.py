@@ -0,0 +1,99 @@
+"""
+Load generator for the scoring service ('src/service.py').
+
+Opens concurrent keep-alive connections sending synthetic reviews to
+'/analyze' and reports the p50/p90/p99 latency, the throughput and the
+service's own statistics. Start the service first, then run from the project
+root:
+
+    python src/service.py --port 8080 &
+    python benchmarks/load.py --port 8080 --concurrency 64 --requests 5000
+"""
+
+# Standart libraries
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+from service import percentiles  # noqa: E402
+from synthetic import SyntheticCorpus  # noqa: E402
+
+
+async def request(reader, writer, method, path, data=None):
+    """
+    Send a request on an open connection and return the decoded JSON answer.
+    """
+
+    body = json.dumps(data).encode('utf-8') if data is not None else b''
+    writer.write(f'{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n'
+                 f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        if name.lower() == 'content-length':
+            length = int(value)
+
+    answer = json.loads(await reader.readexactly(length))
+    if status != 200:
+        raise RuntimeError(f'{status}: {answer}')
+
+    return(answer)
+
+
+async def client(host, port, texts, latencies):
+    """
+    Send each text on its own connection, one request at a time.
+    """
+
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for text in texts:
+            start = time.perf_counter()
+            await request(reader, writer, 'POST', '/analyze', {'text': text})
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(host, port, n_requests, concurrency, seed):
+    texts = [review.text for review in SyntheticCorpus(seed=seed).reviews(n_requests)]
+    latencies = []
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client(host, port, texts[i::concurrency], latencies) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    service_stats = await request(reader, writer, 'GET', '/stats')
+    writer.close()
+
+    print(f'{n_requests} requests, {concurrency} connections, {elapsed:.2f} seconds, '
+          f'{n_requests / elapsed:,.0f} requests/s')
+    print('Client latency (ms): ' + ', '.join(f'{rank} {value * 1000:.1f}'
+                                              for rank, value in percentiles(latencies).items()))
+    print(f'Service stats: {json.dumps(service_stats)}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.host, args.port, args.requests, args.concurrency, args.seed))
@@ -0,0 +1,53 @@
+"""
+Benchmark of the sharded corpus normalization ('normalization' module).
+
+Normalizes a synthetic corpus with the stand-in normalizer
+('stand_in_normalizer.py', with a startup delay) using a growing number of
+workers, then runs again to check that up to date files are skipped and
+after touching some inputs to check that only those are normalized. Run from
+the project root:
+
+    python benchmarks/normalization.py [number of reviews] [startup delay]
+"""
+
+# Standart libraries
+import os
+import sys
+import tempfile
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import normalization  # noqa: E402
+from synthetic import SyntheticCorpus, write_directory  # noqa: E402
+
+STAND_IN = [sys.executable, os.path.join(PROJ_ROOT, 'benchmarks/stand_in_normalizer.py')]
+
+
+def main(n_reviews=2000, startup=0.5, shard_size=100, worker_counts=(1, 2, 4)):
+    os.environ['STAND_IN_STARTUP'] = str(startup)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_folder = os.path.join(temp_dir, 'original')
+        write_directory(SyntheticCorpus().reviews(n_reviews), input_folder)
+
+        print(f'{n_reviews} files, shards of {shard_size}, {startup}s normalizer startup')
+        print(f'[Run]          [Normalized] [Skipped] [Seconds] [Files/s]')
+        for workers in worker_counts:
+            output_folder = os.path.join(temp_dir, f'normalized-{workers}')
+            runs = [(f'{workers} workers', None), ('  again', None), ('  1% touched', n_reviews // 100)]
+            for name, n_touched in runs:
+                if n_touched:
+                    for filename in sorted(os.listdir(input_folder))[:n_touched]:
+                        os.utime(os.path.join(input_folder, filename))
+
+                stats = normalization.normalize_corpus(input_folder, output_folder, command=STAND_IN,
+                                                       workers=workers, shard_size=shard_size, verbose=False)
+                throughput = stats['normalized'] / stats['seconds'] if stats['normalized'] else 0
+                print(f'{name:{14}} {stats["normalized"]:{12}} {stats["skipped"]:{9}} {stats["seconds"]:{9}.2f} '
+                      f'{throughput:{9},.0f}')
+
+
+if __name__ == '__main__':
+    main(*[float(arg) if i else int(arg) for i, arg in enumerate(sys.argv[1:3])])
@@ -0,0 +1,79 @@
+"""
+Memory and speed benchmark of the columnar results output ('output' module).
+
+Writes the results of synthetic corpora of growing size to Parquet and Arrow
+IPC files, reporting the peak memory used while writing (Python objects and
+Arrow buffers), the file size and the time to compute the corpus DataFrames
+back from the file, checking they're identical to the aggregator's. Run from
+the project root:
+
+    python benchmarks/output.py [number of reviews] [chunk size]
+"""
+
+# Standart libraries
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Third-party libraries
+import pyarrow  # noqa: E402
+
+# Local files
+import output  # noqa: E402
+from aggregation import PolarityAggregator  # noqa: E402
+from analyzer import Analyzer  # noqa: E402
+from synthetic import SyntheticCorpus  # noqa: E402
+
+
+def write_results(analyzer, n_reviews, filename, chunk_size):
+    """
+    Analyse 'n_reviews' synthetic reviews, writing their results to 'filename'.
+    Return the aggregator and the peak memory used by the writer, in bytes.
+    """
+
+    aggregator = PolarityAggregator()
+    pool = pyarrow.default_memory_pool()
+    arrow_start = pool.bytes_allocated()
+    arrow_peak = 0
+
+    with output.ResultWriter(filename, chunk_size) as writer:
+        tracemalloc.start()
+        for review in SyntheticCorpus().reviews(n_reviews):
+            document = analyzer.document(review.text, review.year, review.id, keep_text=False)
+            aggregator.update(document.aspect_polarity, review.year)
+            writer.write(review.id, review.year, document.aspect_polarity, document)
+            arrow_peak = max(arrow_peak, pool.bytes_allocated() - arrow_start)
+        python_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return(aggregator, python_peak + arrow_peak)
+
+
+def main(n_reviews=10000, chunk_size=8192):
+    analyzer = Analyzer()
+
+    print(f'[Reviews] [Format] [Peak MB] [File MB] [Records] [Read s] [Identical]')
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in (n_reviews // 4, n_reviews):
+            for extension in ('.parquet', '.arrow'):
+                filename = os.path.join(temp_dir, 'results' + extension)
+                aggregator, peak = write_results(analyzer, size, filename, chunk_size)
+
+                start = time.perf_counter()
+                df_corpus, df_overall = output.results_to_dataframes(filename)
+                read_time = time.perf_counter() - start
+
+                expected = aggregator.to_dataframes()
+                identical = df_corpus.equals(expected[0]) and df_overall.equals(expected[1])
+                n_records = sum(batch.num_rows for batch in output.read_batches(filename, ['aspect']))
+                print(f'{size:{9}} {extension[1:]:{8}} {peak / 2**20:{9}.1f} {os.path.getsize(filename) / 2**20:{9}.1f} '
+                      f'{n_records:{9}} {read_time:{8}.3f} {str(identical):>11}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,63 @@
+"""
+Scaling benchmark of the parallel review analysis.
+
+Replicates the pilot corpus into a JSON lines file and analyses it with 1, 2, 4
+and 8 worker processes, checking that the resulting DataFrames are identical
+to the serial analysis. Run from the project root:
+
+    python benchmarks/parallel.py [number of reviews]
+"""
+
+# Standart libraries
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import corpus  # noqa: E402
+from main import main as run_main  # noqa: E402
+
+
+def write_corpus(filename, n_reviews):
+    """
+    Write 'n_reviews' reviews to a JSON lines file, cycling over the pilot corpus.
+    """
+
+    reviews = list(corpus.DirectorySource(os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/')))
+    with open(filename, 'w') as reviews_file:
+        for i in range(n_reviews):
+            review = reviews[i % len(reviews)]
+            reviews_file.write(json.dumps({'id': i, 'text': review.text, 'date': review.year}) + '\n')
+
+
+def main(n_reviews=5000, worker_counts=(1, 2, 4, 8), chunk_size=64):
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = os.path.join(temp_dir, 'reviews.jsonl')
+        write_corpus(filename, n_reviews)
+
+        print(f'{n_reviews} reviews, {os.cpu_count()} CPUs')
+        print(f'[Workers] [Seconds] [Reviews/s] [Speedup] [Identical]')
+        reference = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()):
+                df_corpus, df_overall = run_main(source=corpus.JsonlSource(filename), workers=workers,
+                                                 chunk_size=chunk_size)
+            elapsed = time.perf_counter() - start
+
+            output = df_corpus.to_csv() + df_overall.to_csv()
+            if reference is None:
+                reference = (output, elapsed)
+            print(f'{workers:{9}} {elapsed:{9}.2f} {n_reviews / elapsed:{11},.0f} '
+                  f'{reference[1] / elapsed:{9}.2f} {str(output == reference[0]):>11}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
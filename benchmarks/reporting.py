@@ -0,0 +1,86 @@
+"""
+Throughput benchmark of the review reporting ('reporting' module).
+
+Runs 'main()' on a synthetic corpus with reporting off, sampled (every 100th
+review, or only reviews with conflicting aspects) and full (every review, with
+or without the aspects context), to JSON lines files and to the console. The
+console output goes to the null device, so terminal rendering time isn't
+included. It also checks that rendering the full JSON lines report gives the
+same text as the console. Run from the project root:
+
+    python benchmarks/reporting.py [number of reviews]
+"""
+
+# Standart libraries
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import corpus  # noqa: E402
+import reporting  # noqa: E402
+from main import main as run_main  # noqa: E402
+from synthetic import SyntheticCorpus, write_jsonl  # noqa: E402
+
+
+def run(reviews_file, reporter, stream):
+    """
+    Return the time to analyse the corpus with a reporter, writing the
+    standard output to 'stream'.
+    """
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(stream):
+        run_main(source=corpus.JsonlSource(reviews_file), fast_tokenizer=True, reporter=reporter)
+
+    return(time.perf_counter() - start)
+
+
+def main(n_reviews=20000):
+    with tempfile.TemporaryDirectory() as temp_dir, open(os.devnull, 'w') as null:
+        reviews_file = os.path.join(temp_dir, 'reviews.jsonl')
+        write_jsonl(SyntheticCorpus().reviews(n_reviews), reviews_file)
+        records_file = os.path.join(temp_dir, 'records.jsonl')
+
+        # Line buffered null device, flushed after every review as a terminal would
+        line_buffered = open(os.devnull, 'w', buffering=1)
+
+        configurations = [
+            ('off', lambda: reporting.Reporter(level='off'), null),
+            ('jsonl, every 100th', lambda: reporting.Reporter([reporting.JsonlSink(records_file)], every=100), null),
+            ('jsonl, conflicting', lambda: reporting.Reporter([reporting.JsonlSink(records_file)], 'context',
+                                                              conflicting=True), null),
+            ('jsonl, full', lambda: reporting.Reporter([reporting.JsonlSink(records_file)]), null),
+            ('jsonl, full context', lambda: reporting.Reporter([reporting.JsonlSink(records_file)], 'context'), null),
+            ('console, default', lambda: None, null),
+            ('console, full context', lambda: reporting.Reporter([reporting.ConsoleSink(True, True)], 'context'),
+             null),
+            ('console, unbuffered', lambda: reporting.Reporter([reporting.ConsoleSink(True, True, buffer_size=0)],
+                                                               'context'), line_buffered),
+        ]
+
+        print(f'{n_reviews} reviews')
+        print(f'[Reporting]              [Seconds] [Reviews/s] [Records]')
+        for name, make_reporter, stream in configurations:
+            reporter = make_reporter()
+            elapsed = run(reviews_file, reporter, stream)
+            n_records = reporter.n_reported if reporter is not None else n_reviews
+            print(f'{name:{24}} {elapsed:{9}.2f} {n_reviews / elapsed:{11},.0f} {n_records:{9}}')
+        line_buffered.close()
+
+        # The console view rendered from the records is the same as printed
+        console = io.StringIO()
+        run(reviews_file, reporting.Reporter([reporting.ConsoleSink(True, True), reporting.JsonlSink(records_file)],
+                                             'context'), console)
+        rendered = ''.join(reporting.render(record, True, True) for record in reporting.read_records(records_file))
+        print(f'Rendered records identical to the console: {rendered == console.getvalue()}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,157 @@
+"""
+Benchmark suite timing each stage of the pipeline on a synthetic corpus.
+
+Stages are timed separately: resource loading (with and without the compiled
+cache), tokenization (Document construction), 'tag_words', 'compute_polarity',
+the aggregation update and the final DataFrames creation. Each run appends a
+JSON record to the results file and is compared to the previous record, so
+regressions stand out. Run from the project root:
+
+    python benchmarks/run.py --reviews 20000
+"""
+
+# Standart libraries
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import resources  # noqa: E402
+from aggregation import PolarityAggregator  # noqa: E402
+from document import Document  # noqa: E402
+from main import LIWC_FILE, ONTOLOGY_FILE  # noqa: E402
+from synthetic import SyntheticCorpus  # noqa: E402
+from tagger import WordTagger  # noqa: E402
+from tokenizer import Tokenizer  # noqa: E402
+
+RESULTS_FILE = os.path.join(PROJ_ROOT, 'benchmarks/results.jsonl')
+
+# Stages run once per review, reported with their throughput
+REVIEW_STAGES = ['tokenize', 'tag_words', 'compute_polarity', 'aggregate']
+
+
+class Timer:
+    """
+    Accumulate the time spent on each stage.
+    """
+
+    def __init__(self):
+        self.seconds = dict()
+
+    def __call__(self, stage, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        self.seconds[stage] = self.seconds.get(stage, 0) + time.perf_counter() - start
+
+        return(result)
+
+
+def git_revision():
+    try:
+        return(subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJ_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return(None)
+
+
+def run_suite(n_reviews, seed=0, fast_tokenizer=False, aspect_matcher=False, tag_cache_size=0):
+    """
+    Time every pipeline stage and return a dictionary with the results.
+    """
+
+    timer = Timer()
+
+    # Resource loading, compiling the resources from scratch and from the cache
+    with tempfile.TemporaryDirectory() as cache_dir:
+        timer('load resources (cold)', lambda: (resources.load_liwc(LIWC_FILE, cache_dir),
+                                                resources.load_ontology_dict(ONTOLOGY_FILE, cache_dir)))
+        liwc, onto = timer('load resources (cached)', lambda: (resources.load_liwc(LIWC_FILE, cache_dir),
+                                                               resources.load_ontology_dict(ONTOLOGY_FILE, cache_dir)))
+    tokenizer = timer('build tokenizer', Tokenizer.from_ontology, onto, fast_tokenizer, aspect_matcher)
+    tagger = WordTagger(tag_cache_size) if tag_cache_size else None
+
+    # Generate the corpus beforehand, so it doesn't count on the stages
+    reviews = list(SyntheticCorpus(seed=seed).reviews(n_reviews))
+
+    aggregator = PolarityAggregator()
+    n_words = 0
+    n_aspects = 0
+    for review in reviews:
+        document = timer('tokenize', Document, review.text, review.year, tokenizer, review.id)
+        timer('tag_words', document.tag_words, liwc, onto, tagger)
+        timer('compute_polarity', document.compute_polarity)
+        timer('aggregate', aggregator.update, document.aspect_polarity, document.date)
+        n_words += len(document.tokens)
+        n_aspects += len(document.aspect_pos)
+    timer('dataframes', aggregator.to_dataframes)
+
+    return({
+        'date': datetime.datetime.now().isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'reviews': n_reviews,
+        'words': n_words,
+        'aspects': n_aspects,
+        'seed': seed,
+        'fast_tokenizer': fast_tokenizer,
+        'aspect_matcher': aspect_matcher,
+        'tag_cache_size': tag_cache_size,
+        'tag_cache': tagger.stats() if tagger else None,
+        'seconds': timer.seconds,
+    })
+
+
+def previous_result(filename, result):
+    """
+    Return the last record on the results file with the same parameters.
+    """
+
+    keys = ['reviews', 'seed', 'fast_tokenizer', 'aspect_matcher', 'tag_cache_size']
+    previous = None
+    if os.path.exists(filename):
+        with open(filename, 'r') as results_file:
+            for line in results_file:
+                record = json.loads(line)
+                if all(record.get(key, 0) == result[key] for key in keys):
+                    previous = record
+
+    return(previous)
+
+
+def report(result, previous):
+    print(f'{result["reviews"]} reviews, {result["words"]} words, {result["aspects"]} aspects')
+    print(f'[Stage]                  [Seconds] [Words/s]      [Time vs previous run]')
+    for stage, seconds in result['seconds'].items():
+        throughput = f'{result["words"] / seconds:{14},.0f}' if stage in REVIEW_STAGES else f'{"-":>14}'
+        line = f'{stage:{24}} {seconds:{9}.3f} {throughput}'
+        if previous and stage in previous['seconds']:
+            line += f' {seconds / previous["seconds"][stage]:{11}.2f}x ({previous["revision"]})'
+        print(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--fast-tokenizer', action='store_true')
+    parser.add_argument('--aspect-matcher', action='store_true')
+    parser.add_argument('--tag-cache', type=int, default=0, help='word tags cache size, 0 disables it')
+    parser.add_argument('--output', default=RESULTS_FILE, help='JSON lines file the results are appended to')
+    args = parser.parse_args()
+
+    result = run_suite(args.reviews, args.seed, args.fast_tokenizer, args.aspect_matcher, args.tag_cache)
+    report(result, previous_result(args.output, result))
+
+    with open(args.output, 'a') as results_file:
+        results_file.write(json.dumps(result) + '\n')
@@ -0,0 +1,30 @@
+"""
+Stand-in for the UGCNormal normalizer, with the same interface and output
+layout, to run the normalization stage without UGCNormal installed:
+
+    python benchmarks/stand_in_normalizer.py <input folder> <output folder>
+
+Lowercases each file and collapses its whitespace. The environment variable
+'STAND_IN_STARTUP' sets a startup delay in seconds, mimicking the normalizer
+loading its models.
+"""
+
+# Standart libraries
+import glob
+import os
+import sys
+import time
+
+RESULT_DIR = 'tok/checked/siglas/internetes/nomes'
+
+if __name__ == '__main__':
+    input_folder, output_folder = sys.argv[1:3]
+    time.sleep(float(os.environ.get('STAND_IN_STARTUP', 0)))
+
+    result_folder = os.path.join(output_folder, RESULT_DIR)
+    os.makedirs(result_folder, exist_ok=True)
+    for filename in glob.iglob(os.path.join(input_folder, '**/*.txt'), recursive=True):
+        with open(filename, 'r') as input_file:
+            text = ' '.join(input_file.read().lower().split())
+        with open(os.path.join(result_folder, os.path.basename(filename)), 'w') as output_file:
+            output_file.write(text)
@@ -0,0 +1,101 @@
+"""
+Startup benchmark of the main process and of the worker processes.
+
+Each scenario runs on a fresh interpreter with 'python -X importtime'. The
+script reports the median wall time, the total import time and the heaviest
+imported packages. Resources are compiled to the cache beforehand, so the
+workers load them from the cache as they would in a real run. Run from the
+project root:
+
+    python benchmarks/startup.py [repetitions]
+"""
+
+# Standart libraries
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+SRC_DIR = os.path.join(PROJ_ROOT, 'src')
+sys.path.insert(0, SRC_DIR)
+
+# Local files
+import resources  # noqa: E402
+
+WORKER_INIT = ('import parallel; from resources import LIWC_FILE, ONTOLOGY_FILE; '
+               'parallel.init_worker(liwc_file=LIWC_FILE, ontology_file=ONTOLOGY_FILE, fast_tokenizer={}, '
+               'aspect_matcher={}, tag_cache_size=0)')
+
+SCENARIOS = [
+    ('import main', 'import main'),
+    ('worker (nltk tokenizer)', WORKER_INIT.format(False, False)),
+    ('worker (fast, aspect matcher)', WORKER_INIT.format(True, True)),
+]
+
+
+def parse_importtime(stderr):
+    """
+    Return the total import time, in seconds, and the cumulative import time
+    of each package (top level module, e.g. 'pandas') imported.
+    """
+
+    total = 0
+    packages = dict()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        seconds = int(cumulative) / 1e6
+
+        # Modules not imported by another one add up to the total
+        if not name.startswith('  '):
+            total += seconds
+        if '.' not in name:
+            packages[name.strip()] = seconds
+
+    return(total, packages)
+
+
+def run_scenario(code, repetitions):
+    """
+    Return the median wall time, the median import time and the top level
+    time of each package on the last run, or the error of a failed run.
+    """
+
+    wall_times = []
+    import_times = []
+    for _ in range(repetitions):
+        start = time.perf_counter()
+        process = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=SRC_DIR,
+                                 capture_output=True, text=True)
+        wall_times.append(time.perf_counter() - start)
+        if process.returncode != 0:
+            return(None, None, process.stderr.strip().splitlines()[-1])
+
+        import_time, packages = parse_importtime(process.stderr)
+        import_times.append(import_time)
+
+    return(statistics.median(wall_times), statistics.median(import_times), packages)
+
+
+def main(repetitions=5):
+    resources.load_liwc(resources.LIWC_FILE)
+    resources.load_ontology_dict(resources.ONTOLOGY_FILE)
+
+    for name, code in SCENARIOS:
+        wall_time, import_time, packages = run_scenario(code, repetitions)
+        if wall_time is None:
+            print(f'{name}: failed, {packages}')
+            continue
+
+        # Heaviest packages, besides the ones imported by the code itself
+        heaviest = sorted(((package, seconds) for package, seconds in packages.items() if package not in code),
+                          key=lambda item: item[1], reverse=True)[:5]
+        print(f'{name}: {wall_time:.3f}s wall, {import_time:.3f}s importing')
+        print('    ' + ', '.join(f'{module} {seconds:.3f}s' for module, seconds in heaviest))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,119 @@
+"""
+Deterministic generator of synthetic Portuguese review corpora.
+
+Reviews are made of sentences mixing ontology aspects, LIWC sentiment words,
+context changing words (negation, amplifier, downtoner) and other LIWC words,
+so that every stage of the pipeline has work to do. The same seed always
+generates the same corpus. Run from the project root:
+
+    python benchmarks/synthetic.py 100000 data/interim/synthetic.jsonl
+    python benchmarks/synthetic.py 1000 data/interim/synthetic/ --layout directory
+"""
+
+# Standart libraries
+import argparse
+import json
+import os
+import random
+import sys
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import document  # noqa: E402
+import resources  # noqa: E402
+from corpus import Review  # noqa: E402
+from main import LIWC_FILE, ONTOLOGY_FILE  # noqa: E402
+
+YEARS = range(2013, 2018)
+PUNCTUATION = ['.', '.', '.', ',', '!']
+
+
+def liwc_words(filename):
+    """
+    Return the plain words of a LIWC dictionary file, wildcard entries excluded.
+    """
+
+    with open(filename, 'r', encoding='latin-1') as liwc_file:
+        lines = liwc_file.read().split('%')[-1].splitlines()
+
+    return(sorted({line.split()[0] for line in lines if line.strip() and not line.split()[0].endswith('*')}))
+
+
+class SyntheticCorpus:
+    """
+    Generator of synthetic reviews.
+    """
+
+    def __init__(self, liwc_file=LIWC_FILE, ontology_file=ONTOLOGY_FILE, seed=0):
+        liwc = resources.load_liwc(liwc_file)
+        onto = resources.load_ontology_dict(ontology_file)
+
+        self.seed = seed
+        self.aspects = sorted(onto)
+        self.sentiment = sorted(liwc.dict)
+        self.modifiers = sorted(document.negation | document.amplifier | document.downtoner)
+        self.filler = [word for word in liwc_words(liwc_file) if word not in liwc.dict]
+
+    def sentence(self, rand):
+        """
+        Return a sentence with an aspect, up to two sentiment words, maybe a
+        context changing word and filler words.
+        """
+
+        words = [rand.choice(self.filler) for _ in range(rand.randint(3, 10))]
+        inserts = [rand.choice(self.aspects)]
+        inserts += [rand.choice(self.sentiment) for _ in range(rand.randint(0, 2))]
+        if rand.random() < 0.4:
+            inserts.append(rand.choice(self.modifiers))
+
+        for word in inserts:
+            words.insert(rand.randint(0, len(words)), word)
+        words[0] = words[0].capitalize()
+        words.append(rand.choice(PUNCTUATION))
+
+        return(' '.join(words))
+
+    def reviews(self, n_reviews):
+        """
+        Yield 'n_reviews' Review records with 1 to 6 sentences each.
+        """
+
+        rand = random.Random(self.seed)
+        for i in range(n_reviews):
+            text = ' '.join(self.sentence(rand) for _ in range(rand.randint(1, 6)))
+            yield Review(f'synthetic-{i}', text, rand.choice(YEARS))
+
+
+def write_jsonl(reviews, filename):
+    with open(filename, 'w') as reviews_file:
+        for review in reviews:
+            reviews_file.write(json.dumps({'id': review.id, 'text': review.text, 'date': review.year},
+                                          ensure_ascii=False) + '\n')
+
+
+def write_directory(reviews, folder):
+    """
+    Write one file per review, named as the pilot corpus files.
+    """
+
+    os.makedirs(folder, exist_ok=True)
+    for i, review in enumerate(reviews):
+        with open(os.path.join(folder, f'review-{review.year}-{i}.txt'), 'w') as review_file:
+            review_file.write(review.text)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('n_reviews', type=int)
+    parser.add_argument('output', help='JSON lines file or folder')
+    parser.add_argument('--layout', choices=['jsonl', 'directory'], default='jsonl')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    reviews = SyntheticCorpus(seed=args.seed).reviews(args.n_reviews)
+    if args.layout == 'jsonl':
+        write_jsonl(reviews, args.output)
+    else:
+        write_directory(reviews, args.output)
@@ -0,0 +1,122 @@
+"""
+Validation and benchmark of the review tokenizers on the pilot corpus.
+
+Checks that 'fast_word_tokenize' produces the same words as 'nltk.word_tokenize'
+for every review of the normalized corpus (the one analysed by 'main') and of
+the original one (not tokenized, so words keep their periods), reporting the
+rate of reviews and tokens that differ on each, then compares the throughput of
+building a multi-word tokenizer per document (former behaviour) against a
+shared 'Tokenizer'. The NLTK 'punkt' data must be installed ('make punkt'). Run
+from the project root:
+
+    python benchmarks/tokenizer.py
+"""
+
+# Standart libraries
+import difflib
+import glob
+import os
+import sys
+import timeit
+
+# Third-party libraries
+import nltk
+from nltk.tokenize import MWETokenizer
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import ontology  # noqa: E402
+import resources  # noqa: E402
+from tokenizer import Tokenizer, ensure_punkt, fast_word_tokenize  # noqa: E402
+
+
+# Review files of the pilot corpus, normalized and original
+CORPORA = {
+    'normalized': 'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/*.txt',
+    'original': 'data/processed/corpus/original/*/*.txt',
+}
+
+
+def corpus_texts(corpus='normalized'):
+    """
+    Return the texts of a pilot corpus ('CORPORA'), as read by
+    'utils.load_corpus'.
+    """
+
+    texts = []
+    for filename in sorted(glob.glob(os.path.join(PROJ_ROOT, CORPORA[corpus]))):
+        with open(filename, 'r') as review_file:
+            texts.append(review_file.read().replace('\n', '.'))
+
+    return(texts)
+
+
+def different_tokens(expected, words):
+    """
+    Return the number of expected tokens missing on the fast tokenizer words.
+    """
+
+    matcher = difflib.SequenceMatcher(None, expected, words, autojunk=False)
+
+    return(len(expected) - sum(block.size for block in matcher.get_matching_blocks()))
+
+
+def validate(corpus, texts):
+    """
+    Compare the fast tokenizer to 'nltk.word_tokenize' token for token on the
+    texts of a corpus, printing the mismatches. Returns the number of tokens.
+    """
+
+    n_tokens = 0
+    mismatches = 0
+    mismatched_tokens = 0
+    for text in texts:
+        expected = nltk.word_tokenize(text.lower())
+        words = fast_word_tokenize(text.lower())
+        n_tokens += len(expected)
+        if words != expected:
+            mismatches += 1
+            mismatched_tokens += different_tokens(expected, words)
+            print(f'Mismatch:\n   nltk: {expected}\n   fast: {words}')
+    print(f'{corpus} corpus: {len(texts)} reviews, {n_tokens} tokens, {mismatches} reviews with mismatches '
+          f'({mismatches / len(texts):.2%}), {mismatched_tokens} tokens differ ({mismatched_tokens / n_tokens:.3%})')
+
+    return(n_tokens)
+
+
+def main(repeat=5):
+    # The reference is the real 'nltk.word_tokenize', so punkt is required
+    ensure_punkt()
+
+    onto = resources.load_ontology_dict(os.path.join(PROJ_ROOT, 'data/external/ontologies/smartphone_aspects.owl'))
+
+    # Token-for-token validation
+    validate('original', corpus_texts('original'))
+    texts = corpus_texts()
+    n_tokens = validate('normalized', texts)
+
+    mwaspects = ontology.get_multi_word_aspects(onto)
+    shared = Tokenizer.from_ontology(onto)
+    shared_fast = Tokenizer.from_ontology(onto, fast=True)
+
+    def run_per_document():
+        for text in texts:
+            MWETokenizer(mwaspects, separator=' ').tokenize(nltk.word_tokenize(text.lower()))
+
+    def run_shared():
+        for text in texts:
+            shared.tokenize(text)
+
+    def run_shared_fast():
+        for text in texts:
+            shared_fast.tokenize(text)
+
+    for name, function in [('per-document', run_per_document), ('shared', run_shared), ('shared fast', run_shared_fast)]:
+        best = min(timeit.repeat(function, number=10, repeat=repeat)) / 10
+        print(f'{name:{14}} {len(texts) / best:{10},.0f} reviews/s {n_tokens / best:{12},.0f} tokens/s')
+
+
+if __name__ == '__main__':
+    main()
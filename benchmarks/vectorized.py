@@ -0,0 +1,98 @@
+"""
+Correctness and speed benchmark of the vectorized batch engine ('batch' module).
+
+Scores the pilot corpus and a synthetic corpus with the Document pipeline and
+with 'BatchEngine', with and without the aspect matcher, checking that every
+review gets exactly the same aspects polarities (values, types and keys
+order). The scoring time excludes tokenization, which is the same on both. Run
+from the project root:
+
+    python benchmarks/vectorized.py [number of synthetic reviews] [batch size]
+"""
+
+# Standart libraries
+import os
+import sys
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+sys.path.insert(0, os.path.join(PROJ_ROOT, 'src'))
+
+# Local files
+import corpus  # noqa: E402
+import resources  # noqa: E402
+from batch import BatchEngine  # noqa: E402
+from document import Document  # noqa: E402
+from synthetic import SyntheticCorpus  # noqa: E402
+from tokenizer import Tokenizer  # noqa: E402
+
+PILOT_FOLDER = os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/')
+
+
+def reference(texts, liwc, onto, tokenizer):
+    """
+    Return the Document pipeline results and its scoring time (tagging and polarity).
+    """
+
+    documents = [Document(text, None, tokenizer, keep_text=False) for text in texts]
+
+    start = time.perf_counter()
+    for review in documents:
+        review.tag_words(liwc, onto)
+        review.compute_polarity()
+    elapsed = time.perf_counter() - start
+
+    return([review.aspect_polarity for review in documents], elapsed)
+
+
+def vectorized(texts, liwc, onto, tokenizer, batch_size):
+    """
+    Return the BatchEngine results and its scoring time (tables, tags and polarity).
+    """
+
+    engine = BatchEngine(liwc, onto, tokenizer)
+    results = []
+    elapsed = 0
+    for i in range(0, len(texts), batch_size):
+        encoded = engine.encode(texts[i:i + batch_size])
+        start = time.perf_counter()
+        results.extend(engine.polarities(*encoded))
+        elapsed += time.perf_counter() - start
+
+    return(results, elapsed)
+
+
+def identical(expected, results):
+    """
+    Return whether the results have the same keys, order, values and types.
+    """
+
+    def typed(aspect_polarity):
+        return([(key, type(value), value) for key, value in aspect_polarity.items()])
+
+    return(len(expected) == len(results) and all(typed(a) == typed(b) for a, b in zip(expected, results)))
+
+
+def main(n_reviews=20000, batch_size=4096):
+    liwc = resources.load_liwc(resources.LIWC_FILE)
+    onto = resources.load_ontology_dict(resources.ONTOLOGY_FILE)
+
+    corpora = {'synthetic': [review.text for review in SyntheticCorpus().reviews(n_reviews)]}
+    if os.path.isdir(PILOT_FOLDER):
+        corpora['pilot'] = [review.text for review in corpus.DirectorySource(PILOT_FOLDER)]
+
+    print(f'Batches of {batch_size}, scoring time excludes tokenization')
+    print(f'[Corpus]    [Matcher] [Reviews] [Document s] [Vectorized s] [Speedup] [Identical]')
+    for name, texts in corpora.items():
+        for aspect_matcher in (False, True):
+            tokenizer = Tokenizer.from_ontology(onto, fast=True, aspect_matcher=aspect_matcher)
+            expected, reference_time = reference(texts, liwc, onto, tokenizer)
+            results, vectorized_time = vectorized(texts, liwc, onto, tokenizer, batch_size)
+
+            print(f'{name:{11}} {str(aspect_matcher):{9}} {len(texts):{9}} {reference_time:{12}.3f} '
+                  f'{vectorized_time:{14}.3f} {reference_time / vectorized_time:{8}.1f}x '
+                  f'{str(identical(expected, results)):>11}')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
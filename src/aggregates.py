@@ -0,0 +1,344 @@
+"""
+Class to keep the aspects polarity counts incrementally, bucketed by time.
+
+Counts are held on a dense NumPy array indexed by aspect and time slot, with
+13 slots per year: one per month and one for reviews whose month is unknown.
+Adding a review is O(1) per aspect, and queries slice and sum the array, so
+their cost depends on the number of aspects and years, not on the number of
+reviews ingested. Quarter and year buckets are sums of the month slots (year
+buckets also include the unknown month slot). The store is persisted as a
+compressed NumPy archive, by default on 'data/interim'.
+
+Periods are written as '2013' (year), '2013-Q2' (quarter) or '2013-05' (month).
+"""
+
+# Standart libraries
+import os
+import re
+
+# Third-party libraries
+import numpy as np
+
+# Local files
+import resources
+
+AGGREGATES_FILE = os.path.join(resources.CACHE_DIR, 'aggregates.npz')
+
+BUCKETS = ('month', 'quarter', 'year')
+SLOTS_PER_YEAR = 13
+UNKNOWN_MONTH = 12
+
+# Years counted, reviews dated outside them are skipped (see 'update')
+MIN_YEAR = 1900
+MAX_YEAR = 2100
+
+PERIOD_PATTERN = re.compile(r'(?P<year>\d{4})(?:-Q(?P<quarter>[1-4])|-(?P<month>\d{1,2}))?$')
+
+
+def parse_period(period):
+    """
+    Return the first and last months of a period, as month numbers counted
+    from year 0 ('year * 12 + month - 1').
+    """
+
+    match = PERIOD_PATTERN.match(str(period))
+    if match is None or (match.group('month') and not 1 <= int(match.group('month')) <= 12):
+        raise ValueError(f'Invalid period "{period}", use "YYYY", "YYYY-Qn" or "YYYY-MM"')
+
+    first = int(match.group('year')) * 12
+    if match.group('quarter'):
+        first += 3 * (int(match.group('quarter')) - 1)
+        return(first, first + 2)
+    if match.group('month'):
+        first += int(match.group('month')) - 1
+        return(first, first)
+
+    return(first, first + 11)
+
+
+def period_label(year, index, bucket):
+    """
+    Return the label of the 'index'-th month or quarter of a year, or of the year.
+    """
+
+    if bucket == 'month':
+        return(f'{year}-{index + 1:02d}')
+    if bucket == 'quarter':
+        return(f'{year}-Q{index + 1}')
+
+    return(str(year))
+
+
+class AggregateStore:
+    """
+    Incremental store of the positive and negative counts of each aspect per
+    month, answering top aspects and trend queries over any period.
+    """
+
+    def __init__(self, fingerprint=None):
+        """
+        Construct an empty store. 'fingerprint' identifies the resources and
+        options the counted results depend on (see 'store.fingerprint').
+        """
+
+        self.fingerprint = fingerprint
+        self.aspects = []
+        self.aspect_ids = dict()
+        self.first_year = None
+        self.n_reviews = 0
+        self.n_skipped = 0
+
+        # Counts [positive, negative] per aspect and slot, and per aspect for undated reviews
+        self.counts = np.zeros((0, 0, 2), dtype=np.int64)
+        self.undated = np.zeros((0, 2), dtype=np.int64)
+
+    @classmethod
+    def load(cls, filename=AGGREGATES_FILE, fingerprint=None):
+        """
+        Load a store saved on 'filename', or return an empty one if it doesn't
+        exist. Raises ValueError if the fingerprints don't match, as counts of
+        results computed differently can't be mixed.
+        """
+
+        store = cls(fingerprint)
+        if not os.path.exists(filename):
+            return(store)
+
+        with np.load(filename, allow_pickle=False) as archive:
+            saved_fingerprint = str(archive['fingerprint']) or None
+            if fingerprint is not None and saved_fingerprint != fingerprint:
+                raise ValueError(f'The aggregates on {filename} were computed with other resources or options, '
+                                 f'remove the file to start over')
+
+            store.fingerprint = saved_fingerprint
+            store.aspects = archive['aspects'].tolist()
+            store.aspect_ids = {aspect: i for i, aspect in enumerate(store.aspects)}
+            store.first_year = int(archive['first_year']) if archive['counts'].shape[1] else None
+            store.n_reviews = int(archive['n_reviews'])
+            store.n_skipped = int(archive['n_skipped']) if 'n_skipped' in archive.files else 0
+            store.counts = archive['counts'].astype(np.int64)
+            store.undated = archive['undated'].astype(np.int64)
+
+        return(store)
+
+    def save(self, filename=AGGREGATES_FILE):
+        """
+        Save the store, replacing the file atomically.
+        """
+
+        n_aspects = len(self.aspects)
+        counts = self.counts[:n_aspects]
+
+        # Smallest integer type holding the counts
+        dtype = np.int32 if counts.size == 0 or counts.max() < 2**31 else np.int64
+
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        temp_filename = f'{filename}.{os.getpid()}.tmp.npz'
+        np.savez_compressed(temp_filename, fingerprint=np.array(self.fingerprint or ''),
+                            aspects=np.array(self.aspects, dtype=str), first_year=np.array(self.first_year or 0),
+                            n_reviews=np.array(self.n_reviews), n_skipped=np.array(self.n_skipped),
+                            counts=counts.astype(dtype),
+                            undated=self.undated[:n_aspects].astype(dtype))
+        os.replace(temp_filename, filename)
+
+    def _aspect_id(self, aspect):
+        aspect_id = self.aspect_ids.get(aspect)
+        if aspect_id is None:
+            aspect_id = self.aspect_ids[aspect] = len(self.aspects)
+            self.aspects.append(aspect)
+
+            # Grow the aspects axis by doubling
+            if aspect_id >= len(self.counts):
+                capacity = max(2 * len(self.counts), 16)
+                self.counts = np.concatenate([self.counts, np.zeros((capacity - len(self.counts),) +
+                                                                    self.counts.shape[1:], dtype=np.int64)])
+                self.undated = np.concatenate([self.undated, np.zeros((capacity - len(self.undated), 2),
+                                                                      dtype=np.int64)])
+
+        return(aspect_id)
+
+    def _slot(self, year, month):
+        """
+        Return the slot of a date, extending the years covered if needed.
+        Months out of 1 to 12 count as unknown.
+        """
+
+        if month is not None and not 1 <= month <= 12:
+            month = None
+
+        if self.first_year is None:
+            self.first_year = year
+        n_years = self.counts.shape[1] // SLOTS_PER_YEAR
+
+        if year < self.first_year:
+            extra = np.zeros((len(self.counts), (self.first_year - year) * SLOTS_PER_YEAR, 2), dtype=np.int64)
+            self.counts = np.concatenate([extra, self.counts], axis=1)
+            n_years += self.first_year - year
+            self.first_year = year
+        elif year >= self.first_year + n_years:
+            extra = np.zeros((len(self.counts), (year - self.first_year - n_years + 1) * SLOTS_PER_YEAR, 2),
+                             dtype=np.int64)
+            self.counts = np.concatenate([self.counts, extra], axis=1)
+
+        return((year - self.first_year) * SLOTS_PER_YEAR + (UNKNOWN_MONTH if month is None else month - 1))
+
+    def update(self, review_polarities, year, month=None):
+        """
+        Add the aspects polarities of a review ('Document.aspect_polarity') to
+        the counts of its year and month. Aspects with polarity greater or
+        equal to zero count as positive.
+
+        Reviews dated before MIN_YEAR or after MAX_YEAR (usually misparsed
+        dates) are skipped and counted on 'n_skipped', since a single one would
+        extend the counts array over every year in between.
+        """
+
+        if year is not None and not MIN_YEAR <= year <= MAX_YEAR:
+            self.n_skipped += 1
+            return
+
+        self.n_reviews += 1
+
+        slot = None if year is None else self._slot(year, month)
+        for aspect, polarity in review_polarities.items():
+            # The arrays may grow when a new aspect is added, so it's looked up first
+            aspect_id = self._aspect_id(aspect)
+            column = 0 if polarity >= 0 else 1
+            if slot is None:
+                self.undated[aspect_id, column] += 1
+            else:
+                self.counts[aspect_id, slot, column] += 1
+
+    def _by_bucket(self, bucket):
+        """
+        Return the counts of every aspect per period of a bucket, as an array
+        (aspects, periods, 2), with the first month of each period.
+        """
+
+        if bucket not in BUCKETS:
+            raise ValueError(f'Unknown bucket "{bucket}", use one of {BUCKETS}')
+
+        n_years = self.counts.shape[1] // SLOTS_PER_YEAR
+        by_year = self.counts[:len(self.aspects)].reshape(len(self.aspects), n_years, SLOTS_PER_YEAR, 2)
+        first_month = (self.first_year or 0) * 12 + 12 * np.arange(n_years)
+
+        if bucket == 'year':
+            return(by_year.sum(axis=2), first_month)
+
+        months = by_year[:, :, :UNKNOWN_MONTH]
+        if bucket == 'quarter':
+            quarters = months.reshape(len(self.aspects), n_years, 4, 3, 2).sum(axis=3)
+            return(quarters.reshape(len(self.aspects), 4 * n_years, 2),
+                   (first_month[:, None] + 3 * np.arange(4)).reshape(-1))
+
+        return(months.reshape(len(self.aspects), 12 * n_years, 2),
+               (first_month[:, None] + np.arange(12)).reshape(-1))
+
+    def _period_counts(self, start, end):
+        """
+        Return the counts of every aspect between the periods 'start' and
+        'end' (both included, None for no limit). Reviews with unknown month
+        count when their whole year is included, undated reviews only without
+        limits.
+        """
+
+        if start is None and end is None:
+            return(self.counts[:len(self.aspects)].sum(axis=1) + self.undated[:len(self.aspects)])
+
+        first = parse_period(start)[0] if start is not None else -1
+        last = parse_period(end)[1] if end is not None else 12 * 10**6
+
+        months, month_starts = self._by_bucket('month')
+        counts = months[:, (month_starts >= first) & (month_starts <= last)].sum(axis=1)
+
+        unknown = self.counts[:len(self.aspects), UNKNOWN_MONTH::SLOTS_PER_YEAR]
+        year_starts = (self.first_year or 0) * 12 + 12 * np.arange(unknown.shape[1])
+        counts += unknown[:, (year_starts >= first) & (year_starts + 11 <= last)].sum(axis=1)
+
+        return(counts)
+
+    def top(self, n=10, start=None, end=None, by='occurrences'):
+        """
+        Return the 'n' aspects with most occurrences (or most positive or
+        negative occurrences) between two periods.
+
+        Parameters
+        ----------
+        n : Integer
+            Number of aspects returned
+        start, end : String
+            First and last periods included (e.g. '2013-Q2'), None for no limit
+        by : String
+            'occurrences', 'positive' or 'negative'
+
+        Returns
+        -------
+        List of dictionaries with the aspect, its positive, negative and total
+        occurrences and its positive and negative shares (percentages).
+        """
+
+        counts = self._period_counts(start, end)
+        occurrences = counts.sum(axis=1)
+        key = {'occurrences': occurrences, 'positive': counts[:, 0], 'negative': counts[:, 1]}[by]
+
+        # Stable sort, so ties keep the order of first occurrence
+        order = np.argsort(-key, kind='stable')[:n]
+
+        return([self._row(self.aspects[i], counts[i]) for i in order if occurrences[i] > 0])
+
+    def trend(self, aspect, bucket='month', start=None, end=None):
+        """
+        Return the counts and shares of an aspect on each period of a bucket
+        ('month', 'quarter' or 'year') between two periods, skipping periods
+        without occurrences.
+        """
+
+        aspect_id = self.aspect_ids.get(aspect)
+        if aspect_id is None:
+            return([])
+
+        counts, period_starts = self._by_bucket(bucket)
+        first = parse_period(start)[0] if start is not None else -1
+        last = parse_period(end)[1] if end is not None else 12 * 10**6
+
+        periods_per_year = {'month': 12, 'quarter': 4, 'year': 1}[bucket]
+        rows = []
+        for i in np.flatnonzero(counts[aspect_id].sum(axis=1) > 0):
+            if first <= period_starts[i] <= last:
+                year = self.first_year + i // periods_per_year
+                rows.append(self._row(period_label(year, i % periods_per_year, bucket), counts[aspect_id, i],
+                                      key='period'))
+
+        return(rows)
+
+    @staticmethod
+    def _row(name, counts, key='aspect'):
+        positive, negative = int(counts[0]), int(counts[1])
+        occurrences = positive + negative
+
+        return({key: name, 'positive': positive, 'negative': negative, 'occurrences': occurrences,
+                'positive_share': 100 * positive / occurrences if occurrences else 0.0,
+                'negative_share': 100 * negative / occurrences if occurrences else 0.0})
+
+    def to_dataframes(self, bucket='year'):
+        """
+        Create the corpus DataFrames ('aggregation.counts_to_dataframes') with
+        the periods of a bucket on the 'Year' column.
+        """
+
+        import pandas as pd
+        from aggregation import counts_to_dataframes
+
+        counts, _ = self._by_bucket(bucket)
+        periods_per_year = {'month': 12, 'quarter': 4, 'year': 1}[bucket]
+        rows = []
+        for aspect_id, i in zip(*np.nonzero(counts.sum(axis=2))):
+            year = self.first_year + i // periods_per_year
+            period = year if bucket == 'year' else period_label(year, i % periods_per_year, bucket)
+            rows.append([self.aspects[aspect_id], period, int(counts[aspect_id, i, 0]), int(counts[aspect_id, i, 1])])
+        for aspect_id in np.flatnonzero(self.undated[:len(self.aspects)].sum(axis=1)):
+            rows.append([self.aspects[aspect_id], None] + self.undated[aspect_id].tolist())
+
+        df_counts = pd.DataFrame(rows, columns=['Aspect', 'Year', 'Positive', 'Negative'])
+
+        return(counts_to_dataframes(df_counts))
@@ -0,0 +1,85 @@
+"""
+Class and functions to aggregate aspect polarities across the corpus.
+"""
+
+
+class PolarityAggregator:
+    """
+    Count positive and negative occurrences of each aspect per year.
+    """
+
+    def __init__(self):
+        """
+        Construct an empty aggregator.
+
+        Counts are kept on a dictionary mapping (aspect, year) to a list
+        [positive, negative], in order of first occurrence.
+        """
+
+        self.counts = dict()
+
+    def update(self, review_polarities, year):
+        """
+        Add the aspects polarities of a review ('Document.aspect_polarity') to the
+        count. Aspects with polarity greater or equal to zero count as positive.
+        """
+
+        for aspect, polarity in review_polarities.items():
+            count = self.counts.get((aspect, year))
+            if count is None:
+                count = self.counts[(aspect, year)] = [0, 0]
+
+            if polarity >= 0:
+                count[0] += 1
+            else:
+                count[1] += 1
+
+    def merge(self, other):
+        """
+        Add the counts of another aggregator to this one.
+        """
+
+        for key, (positive, negative) in other.counts.items():
+            count = self.counts.setdefault(key, [0, 0])
+            count[0] += positive
+            count[1] += negative
+
+    def to_dataframes(self):
+        """
+        Create the corpus DataFrames from the counts, see 'counts_to_dataframes'.
+        """
+
+        # pandas is slow to import, so it's only imported when DataFrames are created
+        import pandas as pd
+
+        df_counts = pd.DataFrame([[aspect, year, positive, negative]
+                                  for (aspect, year), (positive, negative) in self.counts.items()],
+                                 columns=['Aspect', 'Year', 'Positive', 'Negative'])
+
+        return(counts_to_dataframes(df_counts))
+
+
+def counts_to_dataframes(df_corpus):
+    """
+    Create the corpus DataFrames from a DataFrame of polarity counts, with
+    columns 'Aspect', 'Year', 'Positive' and 'Negative'.
+
+    Returns
+    -------
+    df_corpus: DataFrame
+        Columns 'Aspect', 'Year', 'Positive', 'Negative' and 'Occurrences',
+        with positive and negative counts normalized to percentages
+    df_overall: DataFrame
+        Aspect's overall occurrences, indexed by 'Aspect' in descending order
+    """
+
+    # Compute the total number of occurrences on the DataFrame
+    df_corpus['Occurrences'] = df_corpus[['Positive', 'Negative']].sum(axis=1)
+
+    # Create new DataFrame couning aspect's overall occurrences
+    df_overall = df_corpus.groupby(['Aspect'])[['Occurrences']].sum().sort_values('Occurrences', ascending=False)
+
+    # Normalize the positive and negative count
+    df_corpus[['Positive', 'Negative']] = 100 * df_corpus[['Positive', 'Negative']].div(df_corpus['Occurrences'], axis=0)
+
+    return(df_corpus, df_overall)
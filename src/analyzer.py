@@ -0,0 +1,161 @@
+"""
+Class to analyse review texts in-process, loading the resources only once.
+"""
+
+# Local files
+import resources
+from document import Document
+from resources import LIWC_FILE, ONTOLOGY_FILE
+from tagger import WordTagger
+from tokenizer import VOCABULARY_SIZE, Tokenizer
+
+
+class Analyzer:
+    """
+    Long-lived analyzer holding the LIWC dictionary, the ontology dictionary, the
+    tokenizer and the word tags cache, to score review texts from application
+    code. Once constructed, no file is read or written.
+
+    Example
+    -------
+    >>> analyzer = Analyzer()
+    >>> analyzer.analyze('A bateria é muito boa.')
+    {'bateria': 3}
+    """
+
+    def __init__(self, liwc_file=LIWC_FILE, ontology_file=ONTOLOGY_FILE, fast_tokenizer=False, aspect_matcher=False,
+                 tag_cache_size=65536, vectorized=False, ontology_dir=None, vocabulary_size=VOCABULARY_SIZE):
+        """
+        Parameters
+        ----------
+        liwc_file : String
+            LIWC dictionary file
+        ontology_file : String
+            OWL ontology file
+        fast_tokenizer, aspect_matcher : Boolean
+            Tokenizer options, see 'Tokenizer.from_ontology'
+        tag_cache_size : Integer
+            Size of the word tags cache ('tagger.WordTagger'), 0 disables it
+        vectorized : Boolean
+            Score batches with the NumPy engine ('batch.BatchEngine'), which
+            gives the same polarities as the Document pipeline
+        ontology_dir : String
+            Folder of the product domains ontologies ('domains.OntologyRegistry'),
+            enabling the selection of a domain per text
+        vocabulary_size : Integer
+            Words kept on each tokenizer's vocabulary before it's reset, so it
+            doesn't grow with every new word scored, 0 never resets it
+        """
+
+        self.liwc = resources.load_liwc(liwc_file)
+        self.onto = resources.load_ontology_dict(ontology_file)
+        self.tokenizer = Tokenizer.from_ontology(self.onto, fast=fast_tokenizer, aspect_matcher=aspect_matcher)
+        self.tagger = WordTagger(tag_cache_size) if tag_cache_size else None
+        self.vocabulary_size = vocabulary_size
+
+        self.domains = None
+        if ontology_dir is not None:
+            from domains import DomainSelector, OntologyRegistry
+            self.domains = DomainSelector(OntologyRegistry(ontology_dir), self.onto, self.tokenizer, self.tagger,
+                                          fast_tokenizer, aspect_matcher, tag_cache_size)
+
+        self.engine = None
+        if vectorized:
+            from batch import BatchEngine
+            self.engine = BatchEngine(self.liwc, self.onto, self.tokenizer)
+            self._engines = {None: self.engine}
+
+    def _resources(self, domain):
+        """
+        Return the ontology, tokenizer and tagger of a domain (None for the default).
+        """
+
+        if domain is None:
+            return(self.onto, self.tokenizer, self.tagger)
+        if self.domains is None:
+            raise ValueError('Selecting a domain requires the ontology_dir option')
+
+        return(self.domains.select(domain))
+
+    def document(self, text, date=None, review_id=None, keep_text=True, domain=None):
+        """
+        Return the analysed Document of a text, with its aspects data, using the
+        ontology of the given product domain.
+        """
+
+        onto, tokenizer, tagger = self._resources(domain)
+        tokenizer.limit_vocabulary(self.vocabulary_size)
+        review = Document(text, date, tokenizer, review_id, keep_text)
+        review.tag_words(self.liwc, onto, tagger)
+        review.compute_polarity()
+
+        return(review)
+
+    def analyze(self, text, domain=None):
+        """
+        Return the aspects polarities of a text ('Document.aspect_polarity').
+        """
+
+        return(self.document(text, keep_text=False, domain=domain).aspect_polarity)
+
+    def analyze_batch(self, texts, dates=None, aggregator=None, domains=None):
+        """
+        Analyse a batch of texts.
+
+        Parameters
+        ----------
+        texts : Iterable of String
+            Review texts
+        dates : Iterable
+            Date (year) of each text, required with an aggregator
+        aggregator : PolarityAggregator
+            If given, the polarities of each text are added to its counts
+        domains : Iterable of String
+            Product domain of each text (None for the default ontology)
+
+        Returns
+        -------
+        List of aspects polarities dictionaries, in the order of the texts.
+        """
+
+        if self.engine is not None:
+            results = self._analyze_vectorized(list(texts), domains)
+        elif domains is not None:
+            results = [self.analyze(text, domain) for text, domain in zip(texts, domains)]
+        else:
+            results = [self.analyze(text) for text in texts]
+
+        if aggregator is not None:
+            if dates is None:
+                raise ValueError('dates are required to update an aggregator')
+            for aspect_polarity, date in zip(results, dates):
+                aggregator.update(aspect_polarity, date)
+
+        return(results)
+
+    def _analyze_vectorized(self, texts, domains):
+        """
+        Analyse a batch with the vectorized engine of each domain.
+        """
+
+        if domains is None:
+            self.engine.tokenizer.limit_vocabulary(self.vocabulary_size)
+            return(self.engine.analyze_batch(texts))
+
+        batches = dict()
+        for i, domain in enumerate(domains):
+            batches.setdefault(domain, []).append(i)
+
+        results = [None] * len(texts)
+        for domain, indexes in batches.items():
+            if domain not in self._engines:
+                from batch import BatchEngine
+                onto, tokenizer, _ = self._resources(domain)
+                self._engines[domain] = BatchEngine(self.liwc, onto, tokenizer)
+
+            engine = self._engines[domain]
+            engine.tokenizer.limit_vocabulary(self.vocabulary_size)
+            for i, aspect_polarity in zip(indexes, engine.analyze_batch([texts[i] for i in indexes])):
+                results[i] = aspect_polarity
+
+        return(results)
@@ -0,0 +1,253 @@
+"""
+Vectorized engine computing the aspects polarities of a batch of reviews.
+
+The reviews of a batch are tokenized as usual, then encoded as flat NumPy
+arrays (token ids, tag codes, sentence limits and document offsets), and the
+steps of 'Document.tag_words' and 'Document.compute_polarity' run as array
+operations over the whole batch:
+
+- tags come from tables indexed by token id, extended as the vocabulary grows;
+- sentence limits come from running maximum/minimum of punctuation positions;
+- the modifier windows of '_get_context_polarity' are checked with prefix counts
+  and the rules of '_get_sentiment_polarity' are applied with masks;
+- the (aspect, sentiment word) pairs are generated in the same order as the
+  reference implementation and summed per aspect one rank at a time, so float
+  sums are computed in the same order and give exactly the same results.
+"""
+
+# Third-party libraries
+import numpy as np
+
+# Local files
+from document import (negation, amplifier, downtoner, punctuation, TAG_NONE, TAG_ASPECT, TAG_NEGATION,
+                      TAG_AMPLIFIER, TAG_DOWNTONER)
+
+# Number of words on each side of a sentiment word checked for context changing words
+WORD_RANGE = 4
+
+
+class BatchEngine:
+    """
+    Vectorized equivalent of tagging and computing the polarity of Documents,
+    for a given LIWC dictionary, ontology dictionary and Tokenizer.
+    """
+
+    def __init__(self, liwc, ontology, tokenizer):
+        self.liwc = liwc
+        self.ontology = ontology
+        self.tokenizer = tokenizer
+
+        # Vocabulary the tables below refer to
+        self._vocabulary = None
+
+        # Aspect classes, by id
+        self.classes = []
+        self.class_ids = dict()
+
+        # Tables indexed by token id: tag code (context changing word code or
+        # LIWC polarity), aspect class id (-1 if none) and punctuation flag
+        self._tag_table = np.zeros(0, dtype=np.int8)
+        self._aspect_table = np.zeros(0, dtype=np.int32)
+        self._punctuation_table = np.zeros(0, dtype=bool)
+
+    def _class_id(self, aspect):
+        class_id = self.class_ids.get(aspect)
+        if class_id is None:
+            class_id = self.class_ids[aspect] = len(self.classes)
+            self.classes.append(aspect)
+
+        return(class_id)
+
+    def _update_tables(self):
+        """
+        Add the words added to the vocabulary since the last batch to the tables,
+        building them again when the tokenizer's vocabulary was reset.
+        """
+
+        if self._vocabulary is not self.tokenizer.vocabulary:
+            self._vocabulary = self.tokenizer.vocabulary
+            self._tag_table = np.zeros(0, dtype=np.int8)
+            self._aspect_table = np.zeros(0, dtype=np.int32)
+            self._punctuation_table = np.zeros(0, dtype=bool)
+
+        words = self._vocabulary.words
+        n_known = len(self._tag_table)
+        if len(words) == n_known:
+            return
+
+        tags = []
+        aspects = []
+        for word in words[n_known:]:
+            if word in negation:
+                tags.append(TAG_NEGATION)
+            elif word in amplifier:
+                tags.append(TAG_AMPLIFIER)
+            elif word in downtoner:
+                tags.append(TAG_DOWNTONER)
+            else:
+                polarity = self.liwc.get_sentiment(word)
+                tags.append(TAG_NONE if polarity is None else polarity)
+
+            aspect = self.ontology.get(word)
+            aspects.append(-1 if aspect is None else self._class_id(aspect))
+
+        self._tag_table = np.concatenate([self._tag_table, np.array(tags, dtype=np.int8)])
+        self._aspect_table = np.concatenate([self._aspect_table, np.array(aspects, dtype=np.int32)])
+        self._punctuation_table = np.concatenate([self._punctuation_table,
+                                                  np.array([word in punctuation for word in words[n_known:]],
+                                                           dtype=bool)])
+
+    def encode(self, texts):
+        """
+        Tokenize the texts and return the flat arrays of the batch: token ids,
+        document offsets (length n_documents + 1) and the aspect class of each
+        position located by the tokenizer's AspectMatcher (None without one).
+        """
+
+        vocabulary = self.tokenizer.vocabulary
+        lengths = [0]
+        tokens = []
+        match_positions = []
+        match_classes = []
+
+        for text in texts:
+            words, matches = self.tokenizer.tokenize_aspects(text)
+            if matches is not None:
+                match_positions.extend(len(tokens) + pos for pos in matches)
+                match_classes.extend(self._class_id(aspect) for aspect in matches.values())
+            tokens.extend(vocabulary.encode(words))
+            lengths.append(len(words))
+
+        offsets = np.cumsum(lengths)
+        tokens = np.array(tokens, dtype=np.int32)
+
+        matched = None
+        if self.tokenizer.matcher is not None:
+            matched = np.full(len(tokens), -1, dtype=np.int32)
+            matched[np.array(match_positions, dtype=np.int64)] = match_classes
+
+        self._update_tables()
+
+        return(tokens, offsets, matched)
+
+    def analyze_batch(self, texts):
+        """
+        Return the aspects polarities ('Document.aspect_polarity') of each text.
+        """
+
+        return(self.polarities(*self.encode(texts)))
+
+    def polarities(self, tokens, offsets, matched=None):
+        """
+        Return the aspects polarities of each document of an encoded batch
+        (see 'encode').
+        """
+
+        n_documents = len(offsets) - 1
+        n_tokens = len(tokens)
+        positions = np.arange(n_tokens)
+
+        # Document of each position and its limits
+        doc = np.repeat(np.arange(n_documents), np.diff(offsets))
+        doc_start = offsets[:-1][doc]
+        doc_end = offsets[1:][doc]
+
+        # Word tags, context changing words take precedence over aspects
+        tags = self._tag_table[tokens]
+        aspect_class = self._aspect_table[tokens] if matched is None else matched
+        is_modifier = tags >= TAG_NEGATION
+        aspect_class = np.where(is_modifier, -1, aspect_class)
+        tags = np.where(aspect_class >= 0, TAG_ASPECT, tags)
+
+        # Closest punctuation mark before and after each word, within its document
+        is_punctuation = self._punctuation_table[tokens]
+        marks = np.where(is_punctuation, positions, -1)
+        prev_punctuation = np.maximum(np.concatenate([[-1], np.maximum.accumulate(marks)[:-1]]), doc_start - 1)
+        marks = np.where(is_punctuation, positions, n_tokens)
+        next_punctuation = np.minimum(np.concatenate([np.minimum.accumulate(marks[::-1])[::-1][1:], [n_tokens]]),
+                                      doc_end)
+
+        # Context polarity of each sentiment word
+        sentiment_pos = np.flatnonzero((tags == 1) | (tags == -1))
+        contribution, divided = self._context_polarity(sentiment_pos, tags, doc_start, doc_end, prev_punctuation,
+                                                       next_punctuation)
+
+        # Sentiment words on each aspect sentence, before the aspect (closest
+        # first) and then after it, as on 'Document.compute_polarity'
+        aspect_pos = np.flatnonzero(aspect_class >= 0)
+        first = np.searchsorted(sentiment_pos, prev_punctuation[aspect_pos] + 1, 'left')
+        before = np.searchsorted(sentiment_pos, aspect_pos, 'left')
+        after = np.searchsorted(sentiment_pos, aspect_pos, 'right')
+        last = np.searchsorted(sentiment_pos, next_punctuation[aspect_pos] - 1, 'right')
+        n_before = before - first
+        n_pairs = n_before + last - after
+
+        pair_aspect = np.repeat(np.arange(len(aspect_pos)), n_pairs)
+        rank = np.arange(len(pair_aspect)) - np.repeat(np.cumsum(n_pairs) - n_pairs, n_pairs)
+        pair_sentiment = np.where(rank < n_before[pair_aspect],
+                                  before[pair_aspect] - 1 - rank,
+                                  after[pair_aspect] + rank - n_before[pair_aspect])
+
+        # Group the aspects occurrences by document and class, ordered by the
+        # first occurrence as the keys of 'Document.aspect_polarity'
+        aspect_doc = doc[aspect_pos]
+        group_key = aspect_doc.astype(np.int64) * (len(self.classes) + 1) + aspect_class[aspect_pos]
+        keys, first_occurrence, aspect_group = np.unique(group_key, return_index=True, return_inverse=True)
+        aspect_group = aspect_group.reshape(-1)
+
+        # Sum the contributions of each group in the reference order, adding the
+        # k-th contribution of every group at step k
+        pair_group = aspect_group[pair_aspect]
+        order = np.argsort(pair_group, kind='stable')
+        group_sizes = np.bincount(pair_group, minlength=len(keys))
+        group_rank = np.arange(len(order)) - np.repeat(np.cumsum(group_sizes) - group_sizes, group_sizes)
+        values = contribution[pair_sentiment][order]
+        groups = pair_group[order]
+
+        sums = np.zeros(len(keys))
+        for k in range(group_sizes.max(initial=0)):
+            step = group_rank == k
+            sums[groups[step]] += values[step]
+
+        # Sums are integers, as on the Document, unless a contribution was divided
+        is_float = np.zeros(len(keys), dtype=bool)
+        np.logical_or.at(is_float, pair_group, divided[pair_sentiment])
+
+        # Build the dictionaries, with keys in order of first occurrence
+        results = [dict() for _ in range(n_documents)]
+        group_order = np.argsort(first_occurrence, kind='stable')
+        for group_doc, class_id, value, value_is_float in zip(
+                aspect_doc[first_occurrence[group_order]].tolist(),
+                aspect_class[aspect_pos[first_occurrence[group_order]]].tolist(),
+                sums[group_order].tolist(), is_float[group_order].tolist()):
+            results[group_doc][self.classes[class_id]] = value if value_is_float else int(value)
+
+        return(results)
+
+    def _context_polarity(self, sentiment_pos, tags, doc_start, doc_end, prev_punctuation, next_punctuation):
+        """
+        Return the polarity of each sentiment word given its context, as
+        'Document._get_context_polarity', and whether it was divided (a float
+        on the Document).
+        """
+
+        # Window of words around each sentiment word, within the document and sentence
+        local_pos = sentiment_pos - doc_start[sentiment_pos]
+        word_range = np.minimum(np.minimum(WORD_RANGE, local_pos), doc_end[sentiment_pos] - 1 - sentiment_pos)
+        start = np.maximum(sentiment_pos - word_range, prev_punctuation[sentiment_pos] + 1)
+        end = np.minimum(sentiment_pos + word_range, next_punctuation[sentiment_pos] - 1)
+
+        def has_modifier(modifier):
+            count = np.concatenate([[0], np.cumsum(tags == modifier)])
+            return(count[sentiment_pos] - count[start] + count[end + 1] - count[sentiment_pos + 1] > 0)
+
+        f_amplifier = has_modifier(TAG_AMPLIFIER)
+        f_downtoner = has_modifier(TAG_DOWNTONER)
+        f_negation = has_modifier(TAG_NEGATION)
+
+        polarity = tags[sentiment_pos].astype(np.float64)
+        multiply = (f_amplifier & ~f_negation) | (~f_amplifier & f_downtoner & f_negation)
+        divide = (f_amplifier & f_negation) | (~f_amplifier & f_downtoner & ~f_negation)
+        invert = ~f_amplifier & ~f_downtoner & f_negation
+
+        return(np.select([multiply, divide, invert], [polarity * 3, polarity / 3, -polarity], polarity), divide)
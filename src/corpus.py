@@ -0,0 +1,229 @@
+"""
+Classes and functions to read opinion documents from different sources.
+
+A source is an iterable of Review records, read lazily so that only the review
+being analysed is kept in memory.
+"""
+
+# Standart libraries
+import collections
+import csv
+import glob
+import json
+import os
+import re
+
+# Local files
+from document import Document
+
+# Review record: identifier, text, year of publication (None if unknown),
+# product domain (None for the default ontology, see the 'domains' module) and
+# month of publication (1 to 12, None if unknown)
+Review = collections.namedtuple('Review', ['id', 'text', 'year', 'domain', 'month'], defaults=[None, None])
+
+# Review file names, such as 'review-2013-0.txt'
+FILENAME_PATTERN = re.compile(r'(?P<year>\d{4})-(?P<code>\d+)$')
+
+# Dates starting with the year, such as '2013', '2013-05' or '2013-05-21'
+DATE_PATTERN = re.compile(r'\s*(?P<year>\d{4})(?:[-/](?P<month>\d{1,2})(?=\D|$))?(?:\D|$)')
+
+
+def parse_year(value):
+    """
+    Return the year of a date given as a number, a date object or a string
+    starting with the year. Returns None for empty or unrecognized values.
+    """
+
+    if isinstance(value, int):
+        return(value)
+    if isinstance(value, float):
+        return(int(value) if value.is_integer() else None)
+    if hasattr(value, 'year'):
+        return(value.year)
+
+    match = DATE_PATTERN.match(value or '')
+    if match is None:
+        return(None)
+
+    return(int(match.group('year')))
+
+
+def parse_month(value):
+    """
+    Return the month (1 to 12) of a date given as a date object or a string
+    such as '2013-05' or '2013/05/21'. Returns None for years alone, numbers,
+    empty or unrecognized values.
+    """
+
+    if isinstance(value, (int, float)):
+        return(None)
+    if hasattr(value, 'month'):
+        return(value.month)
+
+    match = DATE_PATTERN.match(value or '')
+    if match is None or match.group('month') is None:
+        return(None)
+
+    month = int(match.group('month'))
+
+    return(month if 1 <= month <= 12 else None)
+
+
+class DirectorySource:
+    """
+    Reviews stored as one text file per review, named with the review's year
+    and code (e.g. 'review-2013-0.txt'). Every review has the same 'domain'.
+    """
+
+    def __init__(self, corpus_path, pattern='*.txt', domain=None):
+        self.corpus_path = corpus_path
+        self.pattern = pattern
+        self.domain = domain
+
+    def __iter__(self):
+        for filename in sorted(glob.iglob(os.path.join(self.corpus_path, self.pattern))):
+            review_id = os.path.splitext(os.path.basename(filename))[0]
+
+            match = FILENAME_PATTERN.search(review_id)
+            review_year = int(match.group('year')) if match else None
+
+            with open(filename, 'r') as review_file:
+                review_data = review_file.read().replace('\n', '.')
+
+            yield Review(review_id, review_data, review_year, self.domain)
+
+
+class JsonlSource:
+    """
+    Reviews stored on a JSON lines file, one JSON object per review.
+    """
+
+    def __init__(self, filename, text_field='text', date_field='date', id_field='id', domain_field='domain'):
+        self.filename = filename
+        self.text_field = text_field
+        self.date_field = date_field
+        self.id_field = id_field
+        self.domain_field = domain_field
+
+    def __iter__(self):
+        with open(self.filename, 'r') as reviews_file:
+            for line_number, line in enumerate(reviews_file):
+                if not line.strip():
+                    continue
+
+                record = json.loads(line)
+                review_id = record.get(self.id_field, line_number)
+                date = record.get(self.date_field)
+                yield Review(review_id, record[self.text_field], parse_year(date), record.get(self.domain_field),
+                             parse_month(date))
+
+
+class CsvSource:
+    """
+    Reviews stored on a CSV file with a header, one row per review.
+    """
+
+    def __init__(self, filename, text_column='text', date_column='date', id_column='id', domain_column='domain',
+                 **csv_options):
+        """
+        Keyword arguments 'csv_options' are passed to 'csv.DictReader' (e.g.
+        'delimiter').
+        """
+
+        self.filename = filename
+        self.text_column = text_column
+        self.date_column = date_column
+        self.id_column = id_column
+        self.domain_column = domain_column
+        self.csv_options = csv_options
+
+    def __iter__(self):
+        with open(self.filename, 'r', newline='') as reviews_file:
+            for row_number, row in enumerate(csv.DictReader(reviews_file, **self.csv_options)):
+                review_id = row.get(self.id_column) or row_number
+                date = row.get(self.date_column)
+                yield Review(review_id, row[self.text_column], parse_year(date), row.get(self.domain_column) or None,
+                             parse_month(date))
+
+
+def _column_index(header, column):
+    if column is None:
+        return(None)
+    if column not in header:
+        raise ValueError(f'Column "{column}" not found on the header {header}')
+
+    return(header.index(column))
+
+
+class SheetSource:
+    """
+    Reviews stored on a spreadsheet (.xlsx) with a header row, one row per
+    review, such as the pilot study sheet. Rows are streamed in openpyxl's
+    read-only mode, so only the sheet's shared strings table is kept in memory,
+    not the rows. Very large exports are better read as CSV ('CsvSource').
+
+    Without an id column, reviews are identified as 'review-<year>-<n>', 'n'
+    counting the reviews of each year in the sheet order, as the corpus files.
+    """
+
+    def __init__(self, filename, text_column='Review', date_column='Year', id_column=None, sheet=0,
+                 domain_column=None):
+        """
+        Columns are given by their header. 'sheet' is the worksheet index or name.
+        """
+
+        self.filename = filename
+        self.text_column = text_column
+        self.date_column = date_column
+        self.id_column = id_column
+        self.domain_column = domain_column
+        self.sheet = sheet
+
+    def __iter__(self):
+        try:
+            import openpyxl
+        except ImportError:
+            raise ImportError("Reading spreadsheets requires 'openpyxl', install it running "
+                              "'pip install openpyxl'") from None
+
+        workbook = openpyxl.load_workbook(self.filename, read_only=True, data_only=True)
+        try:
+            if isinstance(self.sheet, int):
+                worksheet = workbook.worksheets[self.sheet]
+            else:
+                worksheet = workbook[self.sheet]
+
+            rows = worksheet.iter_rows(values_only=True)
+            header = [str(cell).strip() if cell is not None else None for cell in next(rows, ())]
+            text_index, date_index, id_index, domain_index = [
+                _column_index(header, column) for column in
+                (self.text_column, self.date_column, self.id_column, self.domain_column)]
+
+            year_counts = dict()
+            for row in rows:
+                text = row[text_index] if text_index < len(row) else None
+                if text is None or not str(text).strip():
+                    continue
+
+                date = row[date_index] if date_index is not None else None
+                year = parse_year(date)
+                if id_index is not None and row[id_index] is not None:
+                    review_id = row[id_index]
+                else:
+                    review_id = f'review-{year}-{year_counts.get(year, 0)}'
+                year_counts[year] = year_counts.get(year, 0) + 1
+
+                domain = row[domain_index] if domain_index is not None else None
+
+                yield Review(review_id, str(text), year, domain or None, parse_month(date))
+        finally:
+            workbook.close()
+
+
+def stream_documents(source, tokenizer):
+    """
+    Yield a Document for each review in 'source', sharing the given Tokenizer.
+    """
+
+    for review in source:
+        yield Document(review.text, review.year, tokenizer, review_id=review.id)
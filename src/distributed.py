@@ -0,0 +1,362 @@
+"""
+Distributed corpus analysis using a shared directory as the job queue.
+
+The corpus is split in shard files on a queue directory, visible to every
+worker (processes or hosts sharing the filesystem). Shards move between
+subfolders with atomic renames, so no broker or lock is needed:
+
+    todo/<shard>                  shards waiting for a worker
+    claimed/<shard>@<worker>      shards being analysed, touched as heartbeat
+    done/<shard>@<worker>         shards analysed, by the named worker
+    partials/<shard>@<worker>.json  aggregate of each shard analysis
+
+A worker claims a shard renaming it from 'todo' to 'claimed'; only one rename
+succeeds. When done, it first writes its partial aggregate and then renames
+its claim to 'done'. Claims not touched for a while belong to crashed workers
+and are renamed back to 'todo'. A worker that lost its claim can't rename it
+to 'done', so exactly one analysis of each shard is accounted for, and the
+partials of lost claims are ignored. The reducer merges the partials of the
+'done' shards in shard order, giving the same DataFrames as 'main()'.
+
+Heartbeats rely on file modification times, so the hosts' clocks should be
+synchronized. Run from the project root:
+
+    python src/distributed.py split QUEUE_DIR --source reviews.jsonl
+    python src/distributed.py worker QUEUE_DIR      (on each process or host)
+    python src/distributed.py status QUEUE_DIR
+    python src/distributed.py reduce QUEUE_DIR
+"""
+
+# Standart libraries
+import argparse
+import itertools
+import json
+import os
+import socket
+import time
+import uuid
+
+# Local files
+import corpus
+import store
+from aggregation import PolarityAggregator
+from resources import LIWC_FILE, ONTOLOGY_FILE
+
+MANIFEST = 'manifest.json'
+FOLDERS = ('todo', 'claimed', 'done', 'partials')
+
+# Seconds without heartbeat after which a claim is considered abandoned
+STALE_AFTER = 300
+
+
+def _write_json(filename, data):
+    """
+    Write a JSON file, replacing it atomically.
+    """
+
+    temp_filename = f'{filename}.{uuid.uuid4().hex}.tmp'
+    with open(temp_filename, 'w') as json_file:
+        json.dump(data, json_file)
+    os.replace(temp_filename, filename)
+
+
+def _fingerprint(options):
+    """
+    Return the fingerprint of the resources and options of a queue, as 'main()'.
+    """
+
+    domain_options = dict()
+    if options['ontology_dir'] is not None:
+        from domains import OntologyRegistry
+        domain_options['domains'] = OntologyRegistry(options['ontology_dir']).fingerprint()
+
+    return(store.fingerprint(options['liwc_file'], options['ontology_file'], fast_tokenizer=options['fast_tokenizer'],
+                             aspect_matcher=options['aspect_matcher'], **domain_options))
+
+
+def read_manifest(queue_dir):
+    with open(os.path.join(queue_dir, MANIFEST), 'r') as manifest_file:
+        return(json.load(manifest_file))
+
+
+def create_queue(source, queue_dir, shard_size=1000, liwc_file=LIWC_FILE, ontology_file=ONTOLOGY_FILE,
+                 fast_tokenizer=False, aspect_matcher=False, ontology_dir=None):
+    """
+    Split the reviews of a source in shards on a new queue directory.
+
+    Parameters
+    ----------
+    source : Iterable of 'corpus.Review'
+        Reviews to analyse
+    queue_dir : String
+        Queue directory, created on a filesystem shared by the workers
+    shard_size : Integer
+        Number of reviews per shard
+    liwc_file, ontology_file, fast_tokenizer, aspect_matcher, ontology_dir :
+        Resources and options every worker uses, see 'main()'
+
+    Returns
+    -------
+    The queue manifest, a dictionary with the options, their fingerprint and
+    the number of reviews of each shard.
+    """
+
+    if os.path.exists(os.path.join(queue_dir, MANIFEST)):
+        raise ValueError(f'{queue_dir} already holds a queue')
+    for folder in FOLDERS:
+        os.makedirs(os.path.join(queue_dir, folder), exist_ok=True)
+
+    options = {'liwc_file': os.path.abspath(liwc_file), 'ontology_file': os.path.abspath(ontology_file),
+               'fast_tokenizer': fast_tokenizer, 'aspect_matcher': aspect_matcher,
+               'ontology_dir': os.path.abspath(ontology_dir) if ontology_dir is not None else None}
+
+    shards = dict()
+    iterator = iter(source)
+    for number in itertools.count():
+        chunk = list(itertools.islice(iterator, shard_size))
+        if not chunk:
+            break
+
+        shard = f'shard-{number:06d}.jsonl'
+        temp_filename = os.path.join(queue_dir, f'{shard}.tmp')
+        with open(temp_filename, 'w') as shard_file:
+            for review in chunk:
+                shard_file.write(json.dumps(review._asdict(), ensure_ascii=False) + '\n')
+        os.replace(temp_filename, os.path.join(queue_dir, 'todo', shard))
+        shards[shard] = len(chunk)
+
+    # Written last, workers only start once the queue is complete
+    manifest = {'options': options, 'fingerprint': _fingerprint(options), 'shards': shards}
+    _write_json(os.path.join(queue_dir, MANIFEST), manifest)
+
+    return(manifest)
+
+
+def _read_shard(filename):
+    with open(filename, 'r') as shard_file:
+        for line in shard_file:
+            yield corpus.Review(**json.loads(line))
+
+
+def _split_claim(name):
+    shard, _, worker = name.partition('@')
+    return(shard, worker)
+
+
+def recover(queue_dir, stale_after=STALE_AFTER):
+    """
+    Move the claims without heartbeat for 'stale_after' seconds back to the
+    'todo' folder. Returns the shards recovered.
+    """
+
+    recovered = []
+    claimed_dir = os.path.join(queue_dir, 'claimed')
+    for name in os.listdir(claimed_dir):
+        claim = os.path.join(claimed_dir, name)
+        try:
+            if time.time() - os.path.getmtime(claim) < stale_after:
+                continue
+            shard, _ = _split_claim(name)
+            os.rename(claim, os.path.join(queue_dir, 'todo', shard))
+        # The worker finished, or another worker recovered the claim first
+        except FileNotFoundError:
+            continue
+        recovered.append(shard)
+
+    return(recovered)
+
+
+def claim(queue_dir, worker_id):
+    """
+    Claim a shard waiting on the queue. Returns the claim file, or None if no
+    shard is waiting.
+    """
+
+    todo_dir = os.path.join(queue_dir, 'todo')
+    for shard in sorted(os.listdir(todo_dir)):
+        claim_file = os.path.join(queue_dir, 'claimed', f'{shard}@{worker_id}')
+        try:
+            # Touched first, so the new claim is never taken as stale
+            os.utime(os.path.join(todo_dir, shard))
+            os.rename(os.path.join(todo_dir, shard), claim_file)
+        # Claimed by another worker
+        except FileNotFoundError:
+            continue
+
+        return(claim_file)
+
+    return(None)
+
+
+def analyze_shard(queue_dir, claim_file, analyzer, batch_size=64, heartbeat=STALE_AFTER / 3):
+    """
+    Analyse a claimed shard and publish its partial aggregate. Returns whether
+    it was accounted as done, False if the claim was lost meanwhile.
+    """
+
+    shard, worker_id = _split_claim(os.path.basename(claim_file))
+    aggregator = PolarityAggregator()
+    n_reviews = 0
+    last_beat = time.monotonic()
+
+    reviews = _read_shard(claim_file)
+    while True:
+        batch = list(itertools.islice(reviews, batch_size))
+        if not batch:
+            break
+
+        domains = [review.domain for review in batch] if analyzer.domains is not None else None
+        for review, aspect_polarity in zip(batch, analyzer.analyze_batch([review.text for review in batch],
+                                                                         domains=domains)):
+            aggregator.update(aspect_polarity, review.year)
+        n_reviews += len(batch)
+
+        if time.monotonic() - last_beat >= heartbeat:
+            try:
+                os.utime(claim_file)
+            except FileNotFoundError:
+                return(False)
+            last_beat = time.monotonic()
+
+    # Publish the partial, then account the shard as done
+    partial = os.path.join(queue_dir, 'partials', f'{shard}@{worker_id}.json')
+    _write_json(partial, {'shard': shard, 'worker': worker_id, 'reviews': n_reviews,
+                          'counts': [[aspect, year, positive, negative]
+                                     for (aspect, year), (positive, negative) in aggregator.counts.items()]})
+    try:
+        os.rename(claim_file, os.path.join(queue_dir, 'done', os.path.basename(claim_file)))
+    except FileNotFoundError:
+        os.remove(partial)
+        return(False)
+
+    return(True)
+
+
+def run_worker(queue_dir, worker_id=None, stale_after=STALE_AFTER, batch_size=64, tag_cache_size=65536, wait=True):
+    """
+    Analyse shards of a queue until none is waiting, recovering abandoned
+    claims. With 'wait' set, the worker only stops once no shard is claimed
+    either, so that the claims of workers crashing meanwhile are recovered.
+    Returns the number of shards done by this worker.
+    """
+
+    from analyzer import Analyzer
+
+    worker_id = worker_id or f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+    manifest = read_manifest(queue_dir)
+    options = manifest['options']
+    if _fingerprint(options) != manifest['fingerprint']:
+        raise ValueError(f'The resources of this worker differ from the ones of the queue {queue_dir}')
+
+    analyzer = Analyzer(options['liwc_file'], options['ontology_file'], options['fast_tokenizer'],
+                        options['aspect_matcher'], tag_cache_size, ontology_dir=options['ontology_dir'])
+
+    n_done = 0
+    while True:
+        claim_file = claim(queue_dir, worker_id)
+        if claim_file is None and recover(queue_dir, stale_after):
+            claim_file = claim(queue_dir, worker_id)
+        if claim_file is None:
+            if wait and os.listdir(os.path.join(queue_dir, 'claimed')):
+                time.sleep(min(stale_after / 10, 5))
+                continue
+            return(n_done)
+
+        n_done += analyze_shard(queue_dir, claim_file, analyzer, batch_size, stale_after / 3)
+
+
+def status(queue_dir, stale_after=STALE_AFTER):
+    """
+    Return the number of shards on each state, the stale claims and the
+    number of reviews accounted for by the done shards.
+    """
+
+    manifest = read_manifest(queue_dir)
+    claimed_dir = os.path.join(queue_dir, 'claimed')
+    now = time.time()
+    n_stale = 0
+    for name in os.listdir(claimed_dir):
+        try:
+            n_stale += now - os.path.getmtime(os.path.join(claimed_dir, name)) >= stale_after
+        except FileNotFoundError:
+            continue
+
+    done = [_split_claim(name)[0] for name in os.listdir(os.path.join(queue_dir, 'done'))]
+
+    return({'shards': len(manifest['shards']), 'todo': len(os.listdir(os.path.join(queue_dir, 'todo'))),
+            'claimed': len(os.listdir(claimed_dir)), 'stale': n_stale, 'done': len(done),
+            'reviews': sum(manifest['shards'][shard] for shard in done)})
+
+
+def reduce_queue(queue_dir):
+    """
+    Merge the partial aggregates of a finished queue and return the corpus
+    DataFrames (df_corpus, df_overall), as returned by 'main()'.
+
+    Raises RuntimeError if a shard isn't done, or if the shards accounted
+    for don't match the queue (a shard done twice or a review missing).
+    """
+
+    manifest = read_manifest(queue_dir)
+    done = dict()
+    for name in os.listdir(os.path.join(queue_dir, 'done')):
+        shard, worker_id = _split_claim(name)
+        if shard in done:
+            raise RuntimeError(f'Shard {shard} accounted for twice, by {done[shard]} and {worker_id}')
+        done[shard] = worker_id
+
+    missing = sorted(set(manifest['shards']) - set(done))
+    if missing:
+        raise RuntimeError(f'{len(missing)} shards not done yet (e.g. {missing[0]})')
+
+    # Shards hold consecutive reviews, so merging them in order keeps the
+    # order of first occurrence of the aspects
+    aggregator = PolarityAggregator()
+    for shard in sorted(done):
+        with open(os.path.join(queue_dir, 'partials', f'{shard}@{done[shard]}.json'), 'r') as partial_file:
+            partial = json.load(partial_file)
+        if partial['reviews'] != manifest['shards'][shard]:
+            raise RuntimeError(f'Shard {shard} has {manifest["shards"][shard]} reviews, '
+                               f'{partial["reviews"]} were analysed')
+
+        shard_aggregator = PolarityAggregator()
+        shard_aggregator.counts = {(aspect, year): [positive, negative]
+                                   for aspect, year, positive, negative in partial['counts']}
+        aggregator.merge(shard_aggregator)
+
+    return(aggregator.to_dataframes())
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('command', choices=['split', 'worker', 'status', 'reduce'])
+    parser.add_argument('queue_dir')
+    parser.add_argument('--source', help='JSON lines file of reviews to split, by default the pilot corpus')
+    parser.add_argument('--shard-size', type=int, default=1000)
+    parser.add_argument('--fast-tokenizer', action='store_true')
+    parser.add_argument('--aspect-matcher', action='store_true')
+    parser.add_argument('--ontology-dir', help='folder of the product domains ontologies')
+    parser.add_argument('--stale-after', type=float, default=STALE_AFTER,
+                        help='seconds without heartbeat after which a claim is recovered')
+    parser.add_argument('--no-wait', action='store_true',
+                        help="stop once no shard is waiting, instead of once every shard is done")
+    args = parser.parse_args()
+
+    if args.command == 'split':
+        if args.source:
+            source = corpus.JsonlSource(args.source)
+        else:
+            source = corpus.DirectorySource(os.path.join(
+                os.path.dirname(os.path.abspath(__file__)), os.pardir,
+                'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/'))
+        manifest = create_queue(source, args.queue_dir, args.shard_size, fast_tokenizer=args.fast_tokenizer,
+                                aspect_matcher=args.aspect_matcher, ontology_dir=args.ontology_dir)
+        print(f'{sum(manifest["shards"].values())} reviews split in {len(manifest["shards"])} shards')
+    elif args.command == 'worker':
+        print(f'{run_worker(args.queue_dir, stale_after=args.stale_after, wait=not args.no_wait)} shards done')
+    elif args.command == 'status':
+        print(json.dumps(status(args.queue_dir, args.stale_after)))
+    else:
+        df_corpus, df_overall = reduce_queue(args.queue_dir)
+        print(df_corpus.to_string())
+        print(df_overall.to_string())
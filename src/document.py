@@ -3,15 +3,10 @@ Class and functions to analyse data contained in opinion documents.
 """
 
 # Standart libraries
+import array
+import bisect
 import string
 
-# Third-party libraries
-import nltk
-from nltk.tokenize import MWETokenizer
-
-# Download data for the tokenization process
-nltk.download('punkt')
-
 # Context words for polarity change
 negation = set(['jamais', 'nada', 'nem', 'nenhum', 'ninguém', 'nunca', 'não',
                 'tampouco'])
@@ -20,20 +15,49 @@ amplifier = set(['mais', 'muito', 'demais', 'completamente', 'absolutamente',
                  'frequentemente', 'bastante'])
 downtoner = set(['pouco', 'quase', 'menos', 'apenas'])
 
+# Words delimiting sentences
+punctuation = set(string.punctuation)
+
+# Word tag codes. Sentiment words are tagged with their polarity (-1/+1)
+TAG_NONE = 0
+TAG_POSITIVE = 1
+TAG_NEGATIVE = -1
+TAG_ASPECT = 2
+TAG_NEGATION = 3
+TAG_AMPLIFIER = 4
+TAG_DOWNTONER = 5
+
+# Version of the tagging and polarity algorithms. Increment it whenever a
+# change alters the results, so stored results (see 'store') are recomputed.
+ALGORITHM_VERSION = 1
+
+# Labels shown for each word tag code, sentiment words show their polarity
+TAG_LABELS = {TAG_NONE: '', TAG_ASPECT: 'aspect', TAG_NEGATION: 'negation',
+              TAG_AMPLIFIER: 'amplifier', TAG_DOWNTONER: 'downtoner'}
+
 
 class Document:
     """
     Document class containing all data about an opinion text.
+
+    Words are stored as ids of the tokenizer's vocabulary, shared by every
+    document, and tags as codes (see TAG_LABELS) on compact arrays.
     """
 
-    def __init__(self, text, date, mwaspects):
+    __slots__ = ['id', 'text', 'date', 'vocabulary', 'tokens', 'word_tag', 'aspect_pos', 'aspect_polarity',
+                 'aspect_context', '_aspect_matches', '_prev_punctuation', '_next_punctuation', '_sentiment_pos',
+                 '_modifier_count']
 
-        self.text = text
+    def __init__(self, text, date, tokenizer, review_id=None, keep_text=True):
+
+        self.id = review_id
+        self.text = text if keep_text else None
         self.date = date
-        tokens = nltk.word_tokenize(text.lower())
-        mwtokenizer = MWETokenizer(mwaspects, separator=' ')
-        self.words = mwtokenizer.tokenize(tokens)
-        self.word_tag = []
+
+        words, self._aspect_matches = tokenizer.tokenize_aspects(text)
+        self.vocabulary = tokenizer.vocabulary
+        self.tokens = self.vocabulary.encode(words)
+        self.word_tag = array.array('b')
 
         # Dictionary of aspects occurrences
         self.aspect_pos = dict()
@@ -44,29 +68,65 @@ class Document:
         # Dictionary of informations about the aspect context
         self.aspect_context = dict()
 
-    def tag_words(self, liwc, ontology):
+        # Sentence index, computed once the words are tagged
+        self._prev_punctuation = None
+        self._next_punctuation = None
+        self._sentiment_pos = None
+        self._modifier_count = None
+
+    @property
+    def words(self):
+        """
+        List of the document words.
+        """
+
+        return(self.vocabulary.decode(self.tokens))
+
+    def tag_label(self, pos):
+        """
+        Return the tag of the word at position 'pos' as shown to users: the
+        polarity of sentiment words, otherwise the tag name ('' if none).
+        """
+
+        return(TAG_LABELS.get(self.word_tag[pos], self.word_tag[pos]))
+
+    def tag_words(self, liwc, ontology, tagger=None):
         """
         Identify aspects, sentiment and context changing words for a given document.
+
+        With a 'tagger.WordTagger', word classifications are looked up on its
+        cache, shared across documents.
         """
 
-        for pos, word in enumerate(self.words):
+        if tagger is not None:
+            self._tag_cached(tagger.classifier(liwc, ontology))
+            return
+
+        words = self.words
+        word_tag = self.word_tag
+
+        for pos, word in enumerate(words):
 
             # Check if word is context changing one (negation, amplifier or downtoner)
             if word in negation:
-                self.word_tag.append('negation')
+                word_tag.append(TAG_NEGATION)
             elif word in amplifier:
-                self.word_tag.append('amplifier')
+                word_tag.append(TAG_AMPLIFIER)
             elif word in downtoner:
-                self.word_tag.append('downtoner')
+                word_tag.append(TAG_DOWNTONER)
 
             else:
-                # Check if word is an aspect
-                if word in ontology:
-                    aspect = ontology[word]
+                # Check if word is an aspect, as located by the tokenizer or
+                # looking it up on the ontology
+                if self._aspect_matches is not None:
+                    aspect = self._aspect_matches.get(pos)
+                else:
+                    aspect = ontology.get(word)
 
+                if aspect is not None:
                     # Mark the aspect occurrence position
                     self.aspect_pos[pos] = aspect
-                    self.word_tag.append('aspect')
+                    word_tag.append(TAG_ASPECT)
 
                 # Check if word is a sentiment word
                 else:
@@ -75,11 +135,78 @@ class Document:
 
                     # Word is not a sentiment word
                     if polarity is None:
-                        self.word_tag.append('')
+                        word_tag.append(TAG_NONE)
 
                     # Attribute polarity value to the position
                     else:
-                        self.word_tag.append(polarity)
+                        word_tag.append(polarity)
+
+        self._index_sentences(words)
+
+    def _tag_cached(self, classify):
+        """
+        Tag the words using 'classify', mapping a word to (tag code, aspect).
+        """
+
+        words = self.words
+        word_tag = self.word_tag
+        aspect_matches = self._aspect_matches
+
+        for pos, word in enumerate(words):
+            tag, aspect = classify(word)
+
+            # Context changing words are never aspects
+            if tag > TAG_ASPECT:
+                word_tag.append(tag)
+                continue
+
+            if aspect_matches is not None:
+                aspect = aspect_matches.get(pos)
+
+            if aspect is not None:
+                self.aspect_pos[pos] = aspect
+                word_tag.append(TAG_ASPECT)
+            else:
+                word_tag.append(tag)
+
+        self._index_sentences(words)
+
+    def _index_sentences(self, words):
+        """
+        Precompute the sentence limits around every word, the sentiment word
+        positions and the cumulative count of each context changing word, so
+        that polarity computations don't need to rescan the document.
+        """
+
+        n_words = len(words)
+
+        # Position of the closest punctuation mark before each word (-1 if none)
+        self._prev_punctuation = array.array('i', bytes(4 * n_words))
+        last = -1
+        for pos, word in enumerate(words):
+            self._prev_punctuation[pos] = last
+            if word in punctuation:
+                last = pos
+
+        # Position of the closest punctuation mark after each word (n_words if none)
+        self._next_punctuation = array.array('i', bytes(4 * n_words))
+        last = n_words
+        for pos in range(n_words - 1, -1, -1):
+            self._next_punctuation[pos] = last
+            if words[pos] in punctuation:
+                last = pos
+
+        # Sorted positions of sentiment words
+        self._sentiment_pos = array.array('i', [pos for pos, tag in enumerate(self.word_tag)
+                                                if tag == TAG_NEGATIVE or tag == TAG_POSITIVE])
+
+        # Number of context changing words before each position
+        self._modifier_count = dict()
+        for modifier in [TAG_AMPLIFIER, TAG_DOWNTONER, TAG_NEGATION]:
+            count = array.array('i', bytes(4 * (n_words + 1)))
+            for pos, tag in enumerate(self.word_tag):
+                count[pos + 1] = count[pos] + (tag == modifier)
+            self._modifier_count[modifier] = count
 
     def compute_polarity(self):
         """
@@ -90,25 +217,18 @@ class Document:
         on the sentiments context.
         """
 
-        punctuation = list(string.punctuation)
-
         # For each aspect position, define the sentence range
         for pos in self.aspect_pos.keys():
-            sentiment_pos = []
-            start = pos
-            end = pos
-
-            # Set sentence start
-            while(start > 0 and self.words[start - 1] not in punctuation):
-                start -= 1
-                if self.word_tag[start] == -1 or self.word_tag[start] == 1:
-                    sentiment_pos.append(start)
-
-            # Set sentence end
-            while(end < len(self.words) - 1 and self.words[end + 1] not in punctuation):
-                end += 1
-                if self.word_tag[end] == -1 or self.word_tag[end] == 1:
-                    sentiment_pos.append(end)
+            start = self._prev_punctuation[pos] + 1
+            end = self._next_punctuation[pos] - 1
+
+            # Sentiment words in the sentence, from the aspect to the sentence
+            # start and then from the aspect to the sentence end
+            first = bisect.bisect_left(self._sentiment_pos, start)
+            before = bisect.bisect_left(self._sentiment_pos, pos)
+            after = bisect.bisect_right(self._sentiment_pos, pos)
+            last = bisect.bisect_right(self._sentiment_pos, end)
+            sentiment_pos = self._sentiment_pos[first:before][::-1] + self._sentiment_pos[after:last]
 
             # Store aspect sentence range
             self.aspect_context.setdefault(pos, []).append((start, end))
@@ -139,42 +259,34 @@ class Document:
 
         Return the sentiment word polarity based on the given word range.
         """
-        punctuation = list(string.punctuation)
-
-        reached_start = False
-        reached_end = False
-
-        f_amplifier = False
-        f_downtoner = False
-        f_negation = False
-
-        # For each word inside 'word_range' around the sentiment
-        for i in range(1, word_range + 1):
-
-            # Mark valid
-            if pos - i >= 0 and pos + i < len(self.words):
+        # Words inside 'word_range' on both sides of the sentiment, as long as
+        # the range doesn't cross the document limits on either side
+        word_range = min(word_range, pos, len(self.tokens) - 1 - pos)
 
-                # Stop search if a punctuation mark found
-                if not reached_start and self.words[pos - i] in punctuation:
-                    reached_start = True
-                if not reached_end and self.words[pos + i] in punctuation:
-                    reached_end = True
+        # Stop search if a punctuation mark found
+        start = max(pos - word_range, self._prev_punctuation[pos] + 1)
+        end = min(pos + word_range, self._next_punctuation[pos] - 1)
 
-                # Otherwise include word in context
-                if not reached_start:
-                    if self.word_tag[pos - i] == 'amplifier': f_amplifier = True
-                    elif self.word_tag[pos - i] == 'downtoner': f_downtoner = True
-                    elif self.word_tag[pos - i] == 'negation': f_negation = True
-                if not reached_end:
-                    if self.word_tag[pos + i] == 'amplifier': f_amplifier = True
-                    elif self.word_tag[pos + i] == 'downtoner': f_downtoner = True
-                    elif self.word_tag[pos + i] == 'negation': f_negation = True
+        # Check for context changing words before and after the sentiment
+        f_amplifier = self._has_modifier(TAG_AMPLIFIER, start, pos, end)
+        f_downtoner = self._has_modifier(TAG_DOWNTONER, start, pos, end)
+        f_negation = self._has_modifier(TAG_NEGATION, start, pos, end)
 
         # Get the sentiment word polarity based on context
         polarity = self._get_sentiment_polarity(pos, f_amplifier, f_downtoner, f_negation)
 
         return(polarity)
 
+    def _has_modifier(self, modifier, start, pos, end):
+        """
+        Return whether a context changing word with tag 'modifier' occurs in the
+        range from 'start' to 'end', not considering the position 'pos'.
+        """
+
+        count = self._modifier_count[modifier]
+
+        return(count[pos] - count[start] + count[end + 1] - count[pos + 1] > 0)
+
     def _get_sentiment_polarity(self, pos, f_amplifier, f_downtoner, f_negation):
         """
         Return the sentiment word polarity given the word position 'pos' and
@@ -208,7 +320,7 @@ class Document:
 
         print(f'\n[ #] [Word]          [Tag]')
         for i, word in enumerate(self.words):
-            print(f'[{i:{2}}] {word:{15}} {self.word_tag[i]}')
+            print(f'[{i:{2}}] {word:{15}} {self.tag_label(i)}')
 
     def print_aspect_data(self):
         """
@@ -225,11 +337,13 @@ class Document:
         sentiment words with it's positions.
         """
 
+        words = self.words
+
         for pos, info in self.aspect_context.items():
-            print(f'\nFound ({self.aspect_pos.get(pos)}) as ({self.words[pos]}). Context {info[0]}')
+            print(f'\nFound ({self.aspect_pos.get(pos)}) as ({words[pos]}). Context {info[0]}')
             if len(info) == 1:
                 print('   Nothing found.')
             else:
                 print(f'   [Aspect]            [Polarity] [Position]')
                 for s_pos in info[1:]:
-                    print(f'   {self.words[s_pos]:{15}} {self.word_tag[s_pos]:{5}} {s_pos:{12}}')
+                    print(f'   {words[s_pos]:{15}} {self.word_tag[s_pos]:{5}} {s_pos:{12}}')
@@ -0,0 +1,406 @@
+"""
+Registry of the product domains ontologies, compiled to read-only indexes.
+
+Every OWL file on the ontologies folder is a domain, named after the file
+('smartphone_aspects.owl' is the 'smartphone' domain). Its aspects dictionary
+('ontology.ontology_to_dict') is compiled once to an index file on the cache
+folder, which processes attach to with a read-only memory map: the index pages
+are shared by every worker process through the OS page cache instead of each
+one holding its own dictionaries.
+
+Only the aspects dictionary is shared. Each process still builds its own
+tokenizer for every domain it analyses (the multi-word aspects of the
+MWETokenizer, or the AspectMatcher automaton), from the shared index. These are
+small next to the process (tens of KB per domain, see 'benchmarks/domains.py')
+and built once per domain on first use.
+
+Index file layout (little-endian), after the header:
+    key_offsets    uint32[n_keys + 1]   offsets of each aspect word on the keys blob
+    key_classes    uint32[n_keys]       aspect class id of each aspect word
+    class_offsets  uint32[n_classes + 1]
+    slots          uint32[n_slots]      open addressing hash table, key index + 1
+    keys blob, classes blob             UTF-8 strings
+Aspect words keep the ontology order, and are looked up hashing them with CRC32.
+"""
+
+# Standart libraries
+import collections.abc
+import glob
+import mmap
+import os
+import struct
+import sys
+import warnings
+import zlib
+
+# Local files
+import ontology
+import resources
+from tagger import WordTagger
+from tokenizer import Tokenizer
+
+ONTOLOGY_DIR = os.path.join(resources.PROJ_ROOT, 'data/external/ontologies')
+
+# Index file header: magic, format version, source digest, number of keys, classes and slots
+INDEX_MAGIC = b'OMPI'
+INDEX_VERSION = 1
+INDEX_HEADER = struct.Struct('<4sH32sIII')
+
+# Index lookups cost more than dictionary ones, so domain words are always
+# classified through a word tags cache of at least this size
+DOMAIN_TAG_CACHE_SIZE = 65536
+
+
+def domain_name(filename):
+    """
+    Return the domain name of an ontology file, e.g. 'camera' for 'camera_aspects.owl'.
+    """
+
+    name = os.path.splitext(os.path.basename(filename))[0]
+
+    return(name[:-len('_aspects')] if name.endswith('_aspects') else name)
+
+
+def index_filename(source_file, cache_dir=resources.CACHE_DIR):
+    """
+    Return the index file path used for a given ontology file.
+    """
+
+    return(os.path.join(cache_dir, os.path.basename(source_file) + '.index'))
+
+
+def _uint32_array(values):
+    return(struct.pack(f'<{len(values)}I', *values))
+
+
+def write_index(filename, digest, onto):
+    """
+    Compile an aspects dictionary to an index file, replaced atomically.
+    """
+
+    classes = list(dict.fromkeys(onto.values()))
+    class_ids = {aspect: i for i, aspect in enumerate(classes)}
+
+    keys = [key.encode('utf-8') for key in onto]
+    key_offsets = [0]
+    for key in keys:
+        key_offsets.append(key_offsets[-1] + len(key))
+    encoded_classes = [aspect.encode('utf-8') for aspect in classes]
+    class_offsets = [0]
+    for aspect in encoded_classes:
+        class_offsets.append(class_offsets[-1] + len(aspect))
+
+    # Hash table with at least twice as many slots as keys
+    n_slots = 1
+    while n_slots < 2 * len(keys):
+        n_slots *= 2
+    slots = [0] * n_slots
+    for i, key in enumerate(keys):
+        slot = zlib.crc32(key) & (n_slots - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (n_slots - 1)
+        slots[slot] = i + 1
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
+    with open(temp_filename, 'wb') as f:
+        f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, digest, len(keys), len(classes), n_slots))
+        f.write(_uint32_array(key_offsets))
+        f.write(_uint32_array([class_ids[aspect] for aspect in onto.values()]))
+        f.write(_uint32_array(class_offsets))
+        f.write(_uint32_array(slots))
+        f.write(b''.join(keys))
+        f.write(b''.join(encoded_classes))
+    os.replace(temp_filename, filename)
+
+
+def read_index_header(filename):
+    """
+    Return the header fields of an index file (magic, version, digest, keys,
+    classes and slots counts), or None if it's missing or truncated.
+    """
+
+    try:
+        with open(filename, 'rb') as f:
+            return(INDEX_HEADER.unpack(f.read(INDEX_HEADER.size)))
+    except (OSError, struct.error):
+        return(None)
+
+
+class CompiledOntology(collections.abc.Mapping):
+    """
+    Read-only aspects dictionary backed by a memory mapped index file, used as
+    the plain dictionary returned by 'ontology.ontology_to_dict'.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        _, _, self.digest, n_keys, n_classes, n_slots = INDEX_HEADER.unpack_from(self._mmap)
+        view = memoryview(self._mmap)[INDEX_HEADER.size:]
+
+        def take(n_bytes):
+            nonlocal view
+            section, view = view[:n_bytes], view[n_bytes:]
+            return(section)
+
+        self._key_offsets = take(4 * (n_keys + 1)).cast('I')
+        self._key_classes = take(4 * n_keys).cast('I')
+        class_offsets = take(4 * (n_classes + 1)).cast('I')
+        self._slots = take(4 * n_slots).cast('I')
+        self._keys = take(self._key_offsets[n_keys])
+        classes = take(class_offsets[n_classes])
+
+        self._mask = n_slots - 1
+        self._n_keys = n_keys
+
+        # Class names are few, so they're decoded once
+        self.classes = [str(classes[class_offsets[i]:class_offsets[i + 1]], 'utf-8') for i in range(n_classes)]
+
+    def _key(self, i):
+        return(str(self._keys[self._key_offsets[i]:self._key_offsets[i + 1]], 'utf-8'))
+
+    def _find(self, word):
+        """
+        Return the index of an aspect word, or -1 if it isn't on the ontology.
+        """
+
+        data = word.encode('utf-8')
+        slot = zlib.crc32(data) & self._mask
+        while True:
+            i = self._slots[slot] - 1
+            if i < 0 or self._keys[self._key_offsets[i]:self._key_offsets[i + 1]] == data:
+                return(i)
+            slot = (slot + 1) & self._mask
+
+    def get(self, word, default=None):
+        i = self._find(word)
+
+        return(default if i < 0 else self.classes[self._key_classes[i]])
+
+    def __getitem__(self, word):
+        i = self._find(word)
+        if i < 0:
+            raise KeyError(word)
+
+        return(self.classes[self._key_classes[i]])
+
+    def __contains__(self, word):
+        return(self._find(word) >= 0)
+
+    def __iter__(self):
+        return(self._key(i) for i in range(self._n_keys))
+
+    def __len__(self):
+        return(self._n_keys)
+
+    def __reduce__(self):
+        # Other processes attach to the same file instead of receiving a copy
+        return(CompiledOntology, (self.filename,))
+
+    @property
+    def nbytes(self):
+        return(len(self._mmap))
+
+    @property
+    def key_bytes(self):
+        """
+        Size of the UTF-8 encoded aspect words.
+        """
+
+        return(self._key_offsets[self._n_keys])
+
+
+def dict_bytes(onto):
+    """
+    Return an estimate of the memory a CompiledOntology would take as a plain
+    dictionary, from its index metadata: the table, one string per aspect word
+    (compact strings, so non-ASCII words are slightly underestimated) and the
+    class names.
+    """
+
+    n_keys = len(onto)
+    table_bytes = sys.getsizeof(dict.fromkeys(map(str, range(n_keys))))
+
+    return(table_bytes + n_keys * sys.getsizeof('') + onto.key_bytes + sum(sys.getsizeof(c) for c in onto.classes))
+
+
+class OntologyRegistry:
+    """
+    The product domains found on an ontologies folder, each one compiled to an
+    index file on first use and attached with a memory map.
+    """
+
+    def __init__(self, folder=ONTOLOGY_DIR, cache_dir=resources.CACHE_DIR, pattern='*.owl'):
+        self.folder = folder
+        self.cache_dir = cache_dir
+        self.files = {domain_name(filename): filename
+                      for filename in sorted(glob.glob(os.path.join(folder, pattern)))}
+        self._ontologies = dict()
+
+    @property
+    def domains(self):
+        return(list(self.files))
+
+    def _source_file(self, domain):
+        if domain not in self.files:
+            raise KeyError(f'Unknown domain "{domain}", the ontologies on {self.folder} are {self.domains}')
+
+        return(self.files[domain])
+
+    def compile(self, domain):
+        """
+        Compile the index of a domain unless it's up to date. Returns whether
+        it was compiled.
+        """
+
+        source_file = self._source_file(domain)
+        filename = index_filename(source_file, self.cache_dir)
+        digest = resources.file_digest(source_file)
+
+        header = read_index_header(filename)
+        if header is not None and header[:3] == (INDEX_MAGIC, INDEX_VERSION, digest):
+            return(False)
+
+        write_index(filename, digest, ontology.ontology_to_dict(source_file))
+
+        return(True)
+
+    def compile_all(self):
+        """
+        Compile every out of date index, returning the domains compiled.
+        """
+
+        return([domain for domain in self.files if self.compile(domain)])
+
+    def get(self, domain):
+        """
+        Return the aspects dictionary of a domain, as a CompiledOntology.
+        """
+
+        if domain not in self._ontologies:
+            self.compile(domain)
+            self._ontologies[domain] = CompiledOntology(index_filename(self._source_file(domain), self.cache_dir))
+
+        return(self._ontologies[domain])
+
+    def fingerprint(self):
+        """
+        Return the digests of every domain ontology file, by domain.
+        """
+
+        return({domain: resources.file_digest(filename).hex() for domain, filename in self.files.items()})
+
+    def stats(self):
+        """
+        Return, for each domain, the number of aspect words and classes, the
+        size of the shared index and an estimate of the size the same data
+        takes as a plain dictionary on each process ('dict_bytes').
+        """
+
+        stats = dict()
+        for domain in self.files:
+            onto = self.get(domain)
+            stats[domain] = {'aspect_words': len(onto), 'aspect_classes': len(onto.classes),
+                             'index_bytes': onto.nbytes, 'dict_bytes': dict_bytes(onto)}
+
+        return(stats)
+
+
+class DomainSelector:
+    """
+    Ontology, tokenizer and word tags cache for each product domain, selected
+    per review. Reviews without a domain, or with a domain missing on the
+    registry, use the default resources. A domain's tokenizer and tags cache
+    are private to the process, built when the domain is first selected.
+    """
+
+    def __init__(self, registry, onto, tokenizer, tagger=None, fast_tokenizer=False, aspect_matcher=False,
+                 tag_cache_size=0):
+        """
+        Parameters
+        ----------
+        registry : OntologyRegistry
+            Domains available
+        onto, tokenizer, tagger :
+            Resources used for reviews without a domain
+        fast_tokenizer, aspect_matcher : Boolean
+            Tokenizer options, see 'Tokenizer.from_ontology'
+        tag_cache_size : Integer
+            Size of each domain's word tags cache, at least 'DOMAIN_TAG_CACHE_SIZE'
+        """
+
+        self.registry = registry
+        self.fast_tokenizer = fast_tokenizer
+        self.aspect_matcher = aspect_matcher
+        self.tag_cache_size = tag_cache_size
+        self._resources = {None: (onto, tokenizer, tagger)}
+
+    def select(self, domain):
+        """
+        Return the tuple (ontology, tokenizer, tagger) of a domain. Unknown
+        domains get the default resources, with a warning the first time.
+        """
+
+        if domain not in self._resources and domain not in self.registry.files:
+            warnings.warn(f'Unknown domain "{domain}", its reviews are analysed with the default ontology (the '
+                          f'ontologies on {self.registry.folder} are {self.registry.domains})')
+            self._resources[domain] = self._resources[None]
+
+        if domain not in self._resources:
+            onto = self.registry.get(domain)
+            tokenizer = Tokenizer.from_ontology(onto, fast=self.fast_tokenizer, aspect_matcher=self.aspect_matcher)
+            tagger = WordTagger(max(self.tag_cache_size, DOMAIN_TAG_CACHE_SIZE))
+            self._resources[domain] = (onto, tokenizer, tagger)
+
+        return(self._resources[domain])
+
+
+def count_review(counts, domain, aspect_polarity):
+    """
+    Count a review of a domain and its aspects on the 'counts' dictionary.
+    """
+
+    domain_counts = counts.setdefault(domain, {'reviews': 0, 'aspects': 0})
+    domain_counts['reviews'] += 1
+    domain_counts['aspects'] += len(aspect_polarity)
+
+
+def domains_report(registry, counts):
+    """
+    Return the reviews and aspects counted per domain ('default' for reviews
+    without one), with the registry stats of each domain used. Domains missing
+    on the registry, analysed with the default ontology, are marked 'unknown'.
+    """
+
+    registry_stats = registry.stats()
+
+    report = dict()
+    for domain, domain_counts in counts.items():
+        report[domain or 'default'] = dict(domain_counts, **registry_stats.get(domain, {}))
+        if domain is not None and domain not in registry.files:
+            report[domain]['unknown'] = True
+
+    return(report)
+
+
+def result_key(review):
+    """
+    Return the text identifying a review's result on a 'store.ResultStore',
+    including its domain.
+    """
+
+    return(review.text if review.domain is None else f'{review.domain}\0{review.text}')
+
+
+if __name__ == '__main__':
+    registry = OntologyRegistry()
+    compiled = registry.compile_all()
+
+    print(f'[Domain]     [Words] [Classes] [Index KB] [Dict KB] [Compiled]')
+    for domain, domain_stats in registry.stats().items():
+        print(f'{domain:{12}} {domain_stats["aspect_words"]:{7}} {domain_stats["aspect_classes"]:{9}} '
+              f'{domain_stats["index_bytes"] / 1024:{10}.1f} {domain_stats["dict_bytes"] / 1024:{9}.1f} '
+              f'{str(domain in compiled):>10}')
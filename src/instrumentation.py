@@ -0,0 +1,169 @@
+"""
+Classes to measure the pipeline performance and summarize it on a report.
+"""
+
+# Standart libraries
+import contextlib
+import json
+import time
+
+# Local files
+import document
+
+
+class Instrumentation:
+    """
+    Record the wall time of each pipeline stage, the throughput and statistics
+    of the analysed documents.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.seconds = dict()
+        self.calls = dict()
+
+        self.n_documents = 0
+
+        # Documents analysed on this process, the only ones whose tokens,
+        # lookups and aspects are measured
+        self.n_measured = 0
+        self.n_tokens = 0
+        self.counters = dict.fromkeys(['ontology_lookups', 'ontology_hits', 'liwc_lookups', 'liwc_hits'], 0)
+
+        # Number of reviews by number of aspects and sentiment words found
+        self.aspects_histogram = dict()
+        self.sentiment_histogram = dict()
+
+        # Other data added to the report as is (e.g. cache statistics)
+        self.info = dict()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Context manager adding the time spent inside it to the stage 'name'.
+        """
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[name] = self.seconds.get(name, 0) + time.perf_counter() - start
+            self.calls[name] = self.calls.get(name, 0) + 1
+
+    def timed(self, iterable, name):
+        """
+        Yield the items of 'iterable', adding the time spent producing them to
+        the stage 'name'.
+        """
+
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count_document(self):
+        """
+        Count a document analysed elsewhere (e.g. on a worker process) or read
+        from the result store, whose statistics aren't measured.
+        """
+
+        self.n_documents += 1
+
+    def record_document(self, review):
+        """
+        Update the statistics with an analysed Document.
+
+        Lookups are derived from the word tags: every word that isn't a context
+        changing word is searched on the ontology, and words that aren't aspects
+        are then searched on LIWC.
+        """
+
+        tags = review.word_tag
+        n_modifiers = tags.count(document.TAG_NEGATION) + tags.count(document.TAG_AMPLIFIER) \
+            + tags.count(document.TAG_DOWNTONER)
+        n_aspects = tags.count(document.TAG_ASPECT)
+        n_sentiment = tags.count(document.TAG_POSITIVE) + tags.count(document.TAG_NEGATIVE)
+
+        self.n_documents += 1
+        self.n_measured += 1
+        self.n_tokens += len(tags)
+        self.counters['ontology_lookups'] += len(tags) - n_modifiers
+        self.counters['ontology_hits'] += n_aspects
+        self.counters['liwc_lookups'] += len(tags) - n_modifiers - n_aspects
+        self.counters['liwc_hits'] += n_sentiment
+
+        self.aspects_histogram[n_aspects] = self.aspects_histogram.get(n_aspects, 0) + 1
+        self.sentiment_histogram[n_sentiment] = self.sentiment_histogram.get(n_sentiment, 0) + 1
+
+    def report(self):
+        """
+        Return a dictionary summarizing the measurements. The tokens, lookups
+        and per-review statistics cover the 'measured_documents', and they're
+        None when no document was analysed on this process.
+        """
+
+        wall_time = time.perf_counter() - self.start
+
+        def rate(hits, lookups):
+            return(hits / lookups if lookups else None)
+
+        def summary(histogram):
+            total = sum(count * n for count, n in histogram.items())
+            return({'total': total,
+                    'mean': total / self.n_measured,
+                    'max': max(histogram, default=None),
+                    'histogram': {str(count): histogram[count] for count in sorted(histogram)}})
+
+        measured = self.n_measured > 0
+
+        return({
+            'wall_seconds': wall_time,
+            'stages': {name: {'seconds': seconds, 'calls': self.calls[name]} for name, seconds in self.seconds.items()},
+            'documents': self.n_documents,
+            'measured_documents': self.n_measured,
+            'tokens': self.n_tokens if measured else None,
+            'documents_per_second': self.n_documents / wall_time,
+            'tokens_per_second': self.n_tokens / wall_time if measured else None,
+            'lookups': dict(self.counters,
+                            ontology_hit_rate=rate(self.counters['ontology_hits'], self.counters['ontology_lookups']),
+                            liwc_hit_rate=rate(self.counters['liwc_hits'], self.counters['liwc_lookups']))
+            if measured else None,
+            'aspects_per_review': summary(self.aspects_histogram) if measured else None,
+            'sentiment_words_per_review': summary(self.sentiment_histogram) if measured else None,
+            **self.info,
+        })
+
+    def write_report(self, filename):
+        """
+        Write the report to a JSON file.
+        """
+
+        with open(filename, 'w') as report_file:
+            json.dump(self.report(), report_file, indent=2)
+
+
+class NullInstrumentation:
+    """
+    Instrumentation doing nothing, used when measurements are disabled.
+    """
+
+    _context = contextlib.nullcontext()
+
+    def __init__(self):
+        self.info = dict()
+
+    def stage(self, name):
+        return(self._context)
+
+    def timed(self, iterable, name):
+        return(iterable)
+
+    def count_document(self):
+        pass
+
+    def record_document(self, review):
+        pass
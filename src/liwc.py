@@ -2,39 +2,102 @@
 Class and functions to organize polarity data from a LIWC dictionary.
 """
 
+# Marks words not yet resolved on the compiled lexicon (None is a valid result)
+_UNRESOLVED = object()
+
+# Derived words memoized on the lexicon, besides the dictionary entries
+MEMO_SIZE = 65536
+
 
 class LIWC:
     """
     LIWC dictionary and data class.
     """
 
-    def __init__(self, filename, remove_asterisk=True):
+    def __init__(self, filename, remove_asterisk=True, expand_wildcards=False):
         """
         Construct LIWC object and initilize the sentiment word dictionary.
+
+        Entries ending with an asterisk are prefix wildcards. When 'expand_wildcards'
+        is set they match any word starting with the entry, otherwise only the
+        derivations searched by 'get_sentiment' are considered (original behaviour).
         """
 
         with open(filename, 'r', encoding='latin-1') as liwc_file:
-            self.data = liwc_file.readlines()
+            data = liwc_file.readlines()
             self.dict = dict()
+            self.wildcards = dict()
 
         # Iterate across the LIWC data
-        for line in self.data:
+        for line in data:
             line_words = line.rstrip('\r\n').split()
             word = line_words[0]
             categories = line_words[1:]
+            is_wildcard = word[-1] == '*'
 
             # Remove asterisk notation from word if required
-            if remove_asterisk and word[-1] == '*':
+            if remove_asterisk and is_wildcard:
                 word = word[:-1]
 
             # Add word to it's corresponding emotion set
             if '126' in categories:
                 # Store word as positive emotion
-                self.dict[word] = +1
-
+                polarity = +1
             elif '127' in categories:
                 # Store word as an negative emotion
-                self.dict[word] = -1
+                polarity = -1
+            else:
+                continue
+
+            self.dict[word] = polarity
+            if remove_asterisk and is_wildcard:
+                self.wildcards[word] = polarity
+
+        self.expand_wildcards = expand_wildcards
+        self._compile()
+
+    @classmethod
+    def from_tables(cls, tables, expand_wildcards=False):
+        """
+        Construct LIWC object from the tables returned by 'to_tables', without
+        parsing the dictionary file again.
+        """
+
+        liwc = cls.__new__(cls)
+        liwc.dict = tables['dict']
+        liwc.wildcards = tables['wildcards']
+        liwc.expand_wildcards = expand_wildcards
+        liwc._compile()
+
+        return(liwc)
+
+    def to_tables(self):
+        """
+        Return the parsed dictionary as plain tables, suitable for caching.
+        """
+
+        return({'dict': self.dict, 'wildcards': self.wildcards})
+
+    def _compile(self):
+        """
+        Build the lexicon used by 'get_sentiment'.
+
+        The lexicon maps a word straight to its polarity. It starts with every
+        dictionary entry and memoizes up to MEMO_SIZE new words found through
+        their derivations or wildcards, so repeated sentiment words cost a
+        single lookup. Words without polarity aren't memoized, otherwise the
+        lexicon would grow with every unique word of a long-lived process (the
+        bounded 'tagger.WordTagger' cache is the place for those).
+        """
+
+        self._lexicon = dict(self.dict)
+        self._memo_limit = len(self._lexicon) + MEMO_SIZE
+
+        # Wildcard sizes, longest first, so the most specific prefix wins
+        if self.expand_wildcards:
+            self._wildcard_sizes = sorted({len(w) for w in self.wildcards}, reverse=True)
+        else:
+            self._wildcard_sizes = []
 
     def get_sentiment(self, word):
         """
@@ -42,22 +105,37 @@ class LIWC:
         associated to it ('-1'/'+1'), otherwise return None.
         """
 
-        # List of word derivations to search for on dictionary
-        word_derivations = [word]
+        polarity = self._lexicon.get(word, _UNRESOLVED)
 
-        # Add to the list derivations of 'word' removing it's last letters
-        if len(word) > 2:
-            word_derivations.append(word[:-1])
-        if len(word) > 3:
-            word_derivations.append(word[:-2])
+        if polarity is _UNRESOLVED:
+            polarity = self._resolve(word)
+            if polarity is not None and len(self._lexicon) < self._memo_limit:
+                self._lexicon[word] = polarity
 
-        # Query the word derivations
-        for term in word_derivations:
-            polarity = self.dict.get(term)
+        return(polarity)
 
-            # Polarity found (-1 or +1)
+    def _resolve(self, word):
+        """
+        Compute the polarity of a word missing on the lexicon, searching for
+        it's derivations and then for the longest matching wildcard.
+        """
+
+        # Query derivations of 'word' removing it's last letters
+        if len(word) > 2:
+            polarity = self.dict.get(word[:-1])
             if polarity is not None:
                 return(polarity)
+        if len(word) > 3:
+            polarity = self.dict.get(word[:-2])
+            if polarity is not None:
+                return(polarity)
+
+        # Query wildcard entries that are a prefix of 'word'
+        for size in self._wildcard_sizes:
+            if size <= len(word):
+                polarity = self.wildcards.get(word[:size])
+                if polarity is not None:
+                    return(polarity)
 
         # No polarity value found on the dictionary
         return(None)
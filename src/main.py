@@ -1,74 +1,329 @@
 # Standart libraries
+import cProfile
 import os
 
-# Third-party libraries
-import pandas as pd
-
 # Local files
+import corpus
+import domains
+import output
+import parallel
+import reporting
+import resources
+import store
 import utils
-from liwc import LIWC
-import ontology
+from aggregation import PolarityAggregator
+from document import Document
+from instrumentation import Instrumentation, NullInstrumentation
+from resources import LIWC_FILE, ONTOLOGY_FILE
+from tagger import WordTagger
+from tokenizer import Tokenizer
 
 
 PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
 
 
-def main(convert_xml=False, normalize=False, print_data=False, print_context=False):
+def main(convert_xml=False, normalize=False, print_data=False, print_context=False, fast_tokenizer=False,
+         aspect_matcher=False, source=None, workers=1, chunk_size=64, report=None, profile=None,
+         tag_cache_size=0, incremental=False, store_file=store.STORE_FILE, results_file=None, ontology_dir=None,
+         aggregates_file=None, reporter=None):
+    """
+    Analyse the corpus and return the polarity counts of each aspect per year
+    (df_corpus) and the aspects overall occurrences (df_overall).
+
+    Reviews are read lazily from 'source' (see the 'corpus' module), by default
+    the normalized pilot corpus folder. With 'workers' greater than one they're
+    analysed on a pool of processes, in chunks of 'chunk_size' reviews, giving
+    the same results. Printing aspects data requires a single worker. The
+    corpus normalization also runs 'workers' normalizer subprocesses.
+
+    With 'report' set to a file name, the time of each stage, the throughput and
+    the LIWC and ontology hit rates are written to it as JSON. Token counts, hit
+    rates and aspects statistics only cover the reviews analysed on this process
+    (not on workers or read from the result store), so they're null with
+    multiple workers. With 'profile' set to a file name, the corpus analysis
+    loop runs under cProfile and its stats are saved there.
+    A positive 'tag_cache_size' enables the word tags cache ('tagger.WordTagger')
+    of up to that many words.
+
+    With 'incremental' set, the results of each review are kept on a store
+    ('store.ResultStore' on 'store_file'), and reviews analysed on a previous
+    run with the same resources and options aren't analysed again. Printing
+    aspects data isn't supported then.
+
+    With 'results_file' set to a '.parquet' or '.arrow' file name, the aspects
+    polarities of each review are also written to it ('output.ResultWriter').
+
+    With 'ontology_dir' set to a folder of ontologies (see 'domains'), reviews
+    naming a product domain ('corpus.Review.domain') are analysed with that
+    domain's ontology, and the reviews and aspects of each domain, with the
+    size of its index, are added to the report.
 
-    # Load LIWC dictionary
-    liwc = utils.load_pickle_object(filename=os.path.join(PROJ_ROOT, 'data/interim/liwc-object.pickle'),
-                                    class_name=LIWC,
-                                    class_args=[os.path.join(PROJ_ROOT, 'data/external/liwc/LIWC2007_Portugues_win.dic')])
+    With 'aggregates_file' set, the aspects polarities of every review read on
+    the run are added to the incremental aggregates saved on that file
+    ('aggregates.AggregateStore'), by year and month. The source should then
+    hold only reviews not ingested before, so it can't be combined with
+    'incremental' (whose stored results are those of reviews read before).
 
-    # Load ontology of aspects
-    onto = ontology.ontology_to_dict(os.path.join(PROJ_ROOT, 'data/external/ontologies/smartphone_aspects.owl'))
+    Each review is reported to 'reporter' ('reporting.Reporter'), which samples
+    the reviews and writes buffered records to its sinks. By default, every
+    review text is written to the standard output, followed by its aspects
+    polarities with 'print_data' and its aspects context with 'print_context'.
+    """
+
+    if workers > 1 and (print_data or print_context):
+        raise ValueError('print_data and print_context require workers=1')
+    if incremental and (print_data or print_context):
+        raise ValueError('print_data and print_context require incremental=False')
+    if incremental and aggregates_file:
+        raise ValueError('aggregates_file requires incremental=False, as stored results would be counted again')
 
     if convert_xml:
         utils.sheet_to_file(os.path.join(PROJ_ROOT, 'data/raw/pilot-study-reviews.xlsx'))
 
     # Apply the UGCNormal Normalizer to the corpus
     if normalize:
-        utils.normalize_corpus(os.path.join(PROJ_ROOT, 'data/processed/corpus/original/'), os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/'))
+        utils.normalize_corpus(os.path.join(PROJ_ROOT, 'data/processed/corpus/original/'), os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/'), workers=workers)
+
+    # Read the corpus data as a stream of reviews
+    if source is None:
+        source = corpus.DirectorySource(os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/'))
+
+    # Aggregator holding the polarity count data
+    aggregator = PolarityAggregator()
+
+    # Reviews shown on the console by default
+    if reporter is None:
+        reporter = reporting.Reporter([reporting.ConsoleSink(print_data, print_context)],
+                                      'context' if print_context else 'review')
+
+    # Measurements are only taken when a report is requested
+    instrumentation = Instrumentation() if report else NullInstrumentation()
+    profiler = cProfile.Profile() if profile else None
+
+    # Product domains ontologies, compiled before any worker attaches to them
+    registry = None
+    domain_options = dict()
+    if ontology_dir is not None:
+        with instrumentation.stage('compile domains'):
+            registry = domains.OntologyRegistry(ontology_dir)
+            registry.compile_all()
+        domain_options['domains'] = registry.fingerprint()
+
+    # Fingerprint of the resources and options the results depend on
+    results_fingerprint = store.fingerprint(LIWC_FILE, ONTOLOGY_FILE, fast_tokenizer=fast_tokenizer,
+                                            aspect_matcher=aspect_matcher, **domain_options)
+
+    # Results stored by previous runs
+    result_store = None
+    if incremental:
+        result_store = store.ResultStore(store_file, results_fingerprint)
+
+    # Aggregates of the reviews ingested by previous runs
+    aggregate_store = None
+    if aggregates_file:
+        # Imported here, as NumPy is only needed for the aggregates
+        import aggregates
+        aggregate_store = aggregates.AggregateStore.load(aggregates_file, results_fingerprint)
+
+    # Per-review results output
+    writer = output.ResultWriter(results_file) if results_file else None
+
+    run = _Run(aggregator, instrumentation, reporter, registry, result_store, aggregate_store, writer)
+
+    # Corpus analysis on worker processes
+    if workers > 1:
+        results = parallel.analyze_parallel(source, LIWC_FILE, ONTOLOGY_FILE, workers=workers, chunk_size=chunk_size,
+                                            fast_tokenizer=fast_tokenizer, aspect_matcher=aspect_matcher,
+                                            tag_cache_size=tag_cache_size, store=result_store,
+                                            ontology_dir=ontology_dir, positions=run.keeps_positions)
+
+        if profiler:
+            profiler.enable()
+
+        # Results are stored by 'analyze_parallel'
+        try:
+            for i, (review, aspect_polarity, positions) in enumerate(instrumentation.timed(results, 'analysis')):
+                instrumentation.count_document()
+                run.record(i, review, aspect_polarity, positions=positions)
+        finally:
+            run.close()
+
+        return(run.finish(report, profiler, profile, aggregates_file))
+
+    with instrumentation.stage('load resources'):
+        # Load LIWC dictionary
+        liwc = resources.load_liwc(LIWC_FILE)
+
+        # Load ontology of aspects
+        onto = resources.load_ontology_dict(ONTOLOGY_FILE)
 
-    # Read the corpus data
-    corpus = utils.load_corpus(os.path.join(PROJ_ROOT, 'data/processed/corpus/normalized/tok/checked/siglas/internetes/nomes/'), onto)
+    # Tokenizer shared by every review
+    with instrumentation.stage('build tokenizer'):
+        tokenizer = Tokenizer.from_ontology(onto, fast=fast_tokenizer, aspect_matcher=aspect_matcher)
 
-    # Create a Pandas DataFrame to hold the polarity count data
-    df_corpus = pd.DataFrame(columns=['Aspect', 'Year', 'Positive', 'Negative'])
+    # Word tags cache shared by every review
+    tagger = WordTagger(tag_cache_size) if tag_cache_size else None
+
+    # Resources of each product domain, the default ones for reviews without a domain
+    selector = None
+    if registry is not None:
+        selector = domains.DomainSelector(registry, onto, tokenizer, tagger, fast_tokenizer, aspect_matcher,
+                                          tag_cache_size)
+
+    if profiler:
+        profiler.enable()
 
     # Corpus analysis
-    for i, review in enumerate(corpus):
+    try:
+        for i, record in enumerate(instrumentation.timed(source, 'read')):
+
+            # Use the result stored by a previous run
+            if result_store is not None:
+                stored = result_store.get(domains.result_key(record), positions=True)
+                if stored is not None:
+                    instrumentation.count_document()
+                    run.record(i, record, *stored)
+                    continue
+
+            if selector is not None:
+                review_onto, review_tokenizer, review_tagger = selector.select(record.domain)
+            else:
+                review_onto, review_tokenizer, review_tagger = onto, tokenizer, tagger
+
+            with instrumentation.stage('tokenize'):
+                # Documents aren't kept, so the words they share needn't be either
+                review_tokenizer.limit_vocabulary()
+                review = Document(record.text, record.year, review_tokenizer, record.id)
+
+            # Tag the review data using the dictionaries
+            with instrumentation.stage('tag_words'):
+                review.tag_words(liwc, review_onto, review_tagger)
+
+            # Parse the review to compute aspects polarities
+            with instrumentation.stage('compute_polarity'):
+                review.compute_polarity()
+            instrumentation.record_document(review)
+
+            # Update the outputs with the review data, storing the new result
+            run.record(i, record, review.aspect_polarity, document=review, store_result=True)
+    finally:
+        run.close()
+
+    return(run.finish(report, profiler, profile, aggregates_file, tagger))
+
+
+class _Run:
+    """
+    Outputs of a corpus analysis run, updated with the result of each review
+    in the same way whether it was analysed on this process, on a worker or
+    read from the result store.
+    """
+
+    def __init__(self, aggregator, instrumentation, reporter, registry=None, result_store=None, aggregate_store=None,
+                 writer=None):
+        self.aggregator = aggregator
+        self.instrumentation = instrumentation
+        self.reporter = reporter
+        self.registry = registry
+        self.result_store = result_store
+        self.aggregate_store = aggregate_store
+        self.writer = writer
 
-        print(f'\nReview #{i}\n {review.text}.')
+        # Reviews and aspects counted per product domain
+        self.domain_counts = dict()
 
-        # Tag the review data using the dictionaries
-        review.tag_words(liwc, onto)
+        # Aspects and sentiment words positions are written to the results
+        # file, and stored for the runs writing one later
+        self.keeps_positions = writer is not None or result_store is not None
 
-        # Parse the review to compute aspects polarities
-        review.compute_polarity()
+    def record(self, index, review, aspect_polarity, positions=None, document=None, store_result=False):
+        """
+        Add the aspects polarities of the 'index'-th review of the source
+        ('corpus.Review') to the aggregator, the domain counts, the aggregate
+        store, the results file and the reporter. 'positions' are the aspects
+        and sentiment words positions ('output.document_positions'), computed
+        from 'document' (the review's Document, when it was analysed on this
+        process) if needed. 'store_result' puts a new result on the result
+        store.
+        """
 
-        # Show polarities associated to each aspect in review (based on context)
-        if print_data:
-            review.print_aspect_data()
-        if print_context:
-            review.print_aspect_context()
+        instrumentation = self.instrumentation
+        if positions is None and document is not None and self.keeps_positions:
+            positions = output.document_positions(document)
 
         # Use review data to update the corpus count
-        df_corpus = utils.update_polarity_count(df_corpus, review.aspect_polarity, review.date)
+        with instrumentation.stage('aggregate'):
+            self.aggregator.update(aspect_polarity, review.year)
+
+        if self.registry is not None:
+            domains.count_review(self.domain_counts, review.domain, aspect_polarity)
+        if self.aggregate_store is not None:
+            self.aggregate_store.update(aspect_polarity, review.year, review.month)
+        if store_result and self.result_store is not None:
+            self.result_store.put(domains.result_key(review), aspect_polarity, positions)
+        if self.writer is not None:
+            with instrumentation.stage('write results'):
+                self.writer.write(review.id, review.year, aspect_polarity, positions=positions)
+
+        # Report the review, with its aspects polarities and context
+        if self.reporter.enabled:
+            with instrumentation.stage('report'):
+                self.reporter.report(index, review.id, review.year, review.text, aspect_polarity, document)
+
+    def close(self):
+        """
+        Close the reporter, the results file and the result store (committing
+        the new results), flushing what they buffered. Called as well when the
+        analysis fails, so the reviews analysed until then are shown and kept.
+        """
+
+        self.reporter.close()
+
+        if self.writer is not None:
+            self.writer.close()
+
+        if self.result_store is not None:
+            self.result_store.close()
+
+    def finish(self, report, profiler, profile, aggregates_file, tagger=None):
+        """
+        Stop the profiler, save the aggregates, write the reports (with the
+        stats of the word tags cache 'tagger') and return the corpus
+        DataFrames. The run must be closed first ('close').
+        """
+
+        instrumentation = self.instrumentation
+
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile)
+
+        if tagger:
+            instrumentation.info['tag_cache'] = tagger.stats()
+        if self.registry is not None:
+            instrumentation.info['domains'] = domains.domains_report(self.registry, self.domain_counts)
+
+        if self.result_store is not None:
+            instrumentation.info['result_store'] = {'hits': self.result_store.hits,
+                                                    'misses': self.result_store.misses}
 
-    # Compute the total number of occurrences on the DataFrame
-    df_corpus['Occurrences'] = df_corpus[['Positive', 'Negative']].sum(axis=1)
+        instrumentation.info['reported_reviews'] = self.reporter.n_reported
 
-    # Create new DataFrame couning aspect's overall occurrences
-    df_overall = df_corpus.groupby(['Aspect'])[['Occurrences']].sum().sort_values('Occurrences', ascending=False)
+        if self.aggregate_store is not None:
+            with instrumentation.stage('save aggregates'):
+                self.aggregate_store.save(aggregates_file)
+            instrumentation.info['aggregates'] = {'reviews': self.aggregate_store.n_reviews,
+                                                  'skipped': self.aggregate_store.n_skipped,
+                                                  'aspects': len(self.aggregate_store.aspects)}
 
-    # Normalize the positive and negative count
-    df_corpus[['Positive', 'Negative']] = 100 * df_corpus[['Positive', 'Negative']].div(df_corpus['Occurrences'], axis=0)
+        # Create the corpus DataFrames with normalized polarity counts
+        with instrumentation.stage('dataframes'):
+            df_corpus, df_overall = self.aggregator.to_dataframes()
 
-    # Set the aspect's column as the index
-    # df_corpus_pol = df_corpus_pol.set_index('Aspect')
+        if report:
+            instrumentation.write_report(report)
 
-    return(df_corpus, df_overall)
+        return(df_corpus, df_overall)
 
 
 if __name__ == '__main__':
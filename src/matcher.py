@@ -0,0 +1,143 @@
+"""
+Class and functions to locate ontology aspects on a sequence of words.
+"""
+
+
+class AspectMatcher:
+    """
+    Aho-Corasick automaton over words, matching single and multi-word aspects
+    in one pass over a document.
+
+    Matching policy is leftmost-longest: among overlapping aspects the one
+    starting first is chosen and, between aspects starting at the same word,
+    the longest one. Matched words are not reused by other aspects. Unlike
+    NLTK's MWETokenizer, a shorter aspect is still matched when a longer one
+    sharing it's first words fails to complete.
+    """
+
+    def __init__(self, onto):
+        """
+        Construct the automaton from an aspects dictionary (see
+        'ontology.ontology_to_dict'), whose keys are aspects with words
+        separated by spaces and values are the corresponding aspect class.
+        """
+
+        # Transitions, failure links, and for each state the aspect it
+        # completes with it's number of words (None and 0 if none)
+        self.goto = [dict()]
+        self.fail = [0]
+        self.aspect = [None]
+        self.length = [0]
+
+        for key, aspect_class in onto.items():
+            state = 0
+            words = key.split(' ')
+            for word in words:
+                next_state = self.goto[state].get(word)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto[state][word] = next_state
+                    self.goto.append(dict())
+                    self.fail.append(0)
+                    self.aspect.append(None)
+                    self.length.append(0)
+                state = next_state
+            self.aspect[state] = aspect_class
+            self.length[state] = len(words)
+
+        self._link_states()
+
+    def _link_states(self):
+        """
+        Compute failure links and outputs in breadth-first order. The outputs
+        of a state are the (number of words, state) pairs of every aspect ending
+        on it, that is, the state itself and the states on it's failure chain
+        that complete an aspect.
+        """
+
+        self.output = [()] * len(self.goto)
+
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for word, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                # Longest proper suffix of the next state's path in the trie
+                fallback = self.fail[state]
+                while fallback and word not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(word, 0)
+
+        for state in queue:
+            self.output[state] = self.output[self.fail[state]]
+            if self.length[state]:
+                self.output[state] = ((self.length[state], state),) + self.output[state]
+
+    def match(self, words):
+        """
+        Return the aspects found on a list of words as a list of tuples
+        (start, end, aspect class), following the leftmost-longest policy.
+        """
+
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        root = goto[0]
+
+        # Longest aspect starting at each position where an aspect starts, as
+        # (number of words, final state)
+        longest = dict()
+
+        state = 0
+        for pos, word in enumerate(words):
+            # Follow the failure links until a state continues with the word
+            if state:
+                next_state = goto[state].get(word)
+                while next_state is None and state:
+                    state = fail[state]
+                    next_state = goto[state].get(word)
+                state = next_state or 0
+
+            # Most words don't start an aspect
+            else:
+                state = root.get(word, 0)
+                if not state:
+                    continue
+
+            # Every aspect ending at this position, longest first
+            for size, found in output[state]:
+                start = pos - size + 1
+                if start not in longest or size > longest[start][0]:
+                    longest[start] = (size, found)
+
+        matches = []
+        end = 0
+        for start in sorted(longest):
+            if start >= end:
+                size, found = longest[start]
+                end = start + size
+                matches.append((start, end, self.aspect[found]))
+
+        return(matches)
+
+    def merge(self, words):
+        """
+        Merge the words of every matched aspect into a single word, separated by
+        spaces.
+
+        Returns the merged list of words and a dictionary mapping the positions
+        of aspects on that list to their aspect class.
+        """
+
+        merged = []
+        aspect_pos = dict()
+
+        last = 0
+        for start, end, aspect_class in self.match(words):
+            merged.extend(words[last:start])
+            aspect_pos[len(merged)] = aspect_class
+            merged.append(' '.join(words[start:end]))
+            last = end
+        merged.extend(words[last:])
+
+        return(merged, aspect_pos)
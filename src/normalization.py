@@ -0,0 +1,146 @@
+"""
+Functions to normalize the corpus files with an external normalizer, such as
+UGCNormal, on a pool of subprocesses.
+
+The normalizer is a command called as '<command> <input folder> <output folder>'
+that writes the normalized files, with the same names, to a subfolder of the
+output folder ('UGCNORMAL_RESULT_DIR' for UGCNormal). Input files are split in
+shards, each normalized by one call of the command on a temporary folder, and
+files whose normalized output is newer than the input are skipped.
+"""
+
+# Standart libraries
+import concurrent.futures
+import glob
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+import time
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+
+# UGCNormal script and the subfolder where it writes the final normalized files
+UGCNORMAL_COMMAND = [os.path.join(PROJ_ROOT, 'UGCNormal/ugc_norm.sh')]
+UGCNORMAL_RESULT_DIR = 'tok/checked/siglas/internetes/nomes'
+
+
+def pending_files(input_folder, result_folder, pattern='**/*.txt'):
+    """
+    Return the input files without a normalized file on 'result_folder' newer
+    than them, and the number of files skipped.
+    """
+
+    pending = []
+    n_skipped = 0
+    for filename in sorted(glob.iglob(os.path.join(input_folder, pattern), recursive=True)):
+        result = os.path.join(result_folder, os.path.basename(filename))
+        if os.path.exists(result) and os.path.getmtime(result) >= os.path.getmtime(filename):
+            n_skipped += 1
+        else:
+            pending.append(filename)
+
+    return(pending, n_skipped)
+
+
+def _normalize_shard(command, filenames, result_folder, result_dir):
+    """
+    Normalize a shard of files calling the normalizer on a temporary folder,
+    then move the results to 'result_folder'. Returns the files not normalized.
+    """
+
+    with tempfile.TemporaryDirectory(prefix='normalization-') as temp_dir:
+        shard_input = os.path.join(temp_dir, 'input')
+        shard_output = os.path.join(temp_dir, 'output')
+        os.makedirs(shard_input)
+        os.makedirs(shard_output)
+
+        for filename in filenames:
+            shutil.copy2(filename, shard_input)
+
+        process = subprocess.run(command + [shard_input, shard_output], stdout=subprocess.DEVNULL,
+                                 stderr=subprocess.PIPE, text=True)
+        if process.returncode != 0:
+            raise RuntimeError(f'Normalizer failed with code {process.returncode}: {process.stderr.strip()}')
+
+        missing = []
+        for filename in filenames:
+            result = os.path.join(shard_output, result_dir, os.path.basename(filename))
+            if os.path.exists(result):
+                shutil.move(result, os.path.join(result_folder, os.path.basename(filename)))
+            else:
+                missing.append(filename)
+
+    return(missing)
+
+
+def normalize_corpus(input_folder, output_folder, command=UGCNORMAL_COMMAND, result_dir=UGCNORMAL_RESULT_DIR,
+                     workers=1, shard_size=100, pattern='**/*.txt', verbose=True):
+    """
+    Normalize the corpus files, skipping the ones already normalized.
+
+    Parameters
+    ----------
+    input_folder : String
+        Folder with the files to normalize, searched recursively
+    output_folder : String
+        Folder where the normalized files are stored, on 'result_dir'
+    command : List of String or String
+        Normalizer command, called with the input and output folders
+    result_dir : String
+        Subfolder where the normalizer writes its results, on the output folder
+    workers : Integer
+        Number of normalizer subprocesses running at once
+    shard_size : Integer
+        Number of files normalized by each call of the normalizer
+    pattern : String
+        Glob pattern of the input files
+    verbose : Boolean
+        Print the progress and throughput after each shard
+
+    Returns
+    -------
+    Dictionary with the number of files normalized, skipped and failed, and the
+    time spent in seconds.
+    """
+
+    if isinstance(command, str):
+        command = shlex.split(command)
+
+    result_folder = os.path.join(output_folder, result_dir)
+    os.makedirs(result_folder, exist_ok=True)
+
+    pending, n_skipped = pending_files(input_folder, result_folder, pattern)
+    shards = [pending[i:i + shard_size] for i in range(0, len(pending), shard_size)]
+    if verbose:
+        print(f'Normalizing {len(pending)} files in {len(shards)} shards, {n_skipped} up to date')
+
+    start = time.perf_counter()
+    n_done = 0
+    failed = []
+    errors = []
+    with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+        futures = {executor.submit(_normalize_shard, command, shard, result_folder, result_dir): shard
+                   for shard in shards}
+
+        for future in concurrent.futures.as_completed(futures):
+            shard = futures[future]
+            try:
+                missing = future.result()
+            except (OSError, RuntimeError) as error:
+                missing = shard
+                errors.append(str(error))
+            failed.extend(missing)
+            n_done += len(shard)
+
+            if verbose:
+                elapsed = time.perf_counter() - start
+                print(f'{n_done}/{len(pending)} files, {n_done / elapsed:.1f} files/s')
+
+    stats = {'normalized': len(pending) - len(failed), 'skipped': n_skipped, 'failed': len(failed),
+             'seconds': time.perf_counter() - start}
+    if failed:
+        raise RuntimeError(f'{len(failed)} files not normalized (e.g. {failed[0]}), errors: {errors[:3]}')
+
+    return(stats)
@@ -1,12 +1,29 @@
 """
 Class and functions to query terms from OWL Ontologies.
+
+rdflib is slow to import, so it's only imported when an ontology file is
+loaded, not when the aspects are read from the compiled cache.
 """
 
-# Third party libraries
-import pandas as pd
-import rdflib
-import rdflib.plugins.sparql as sparql
-from rdflib.namespace import RDF, RDFS, OWL
+
+def _load_graph(filename):
+    """Return the RDFLIB graph of an ontology file."""
+
+    import rdflib
+
+    g = rdflib.Graph()
+    g.load(filename)
+
+    return(g)
+
+
+def _prepare_query(query):
+    """Prepare a SPARQL query using the RDF, RDFS and OWL namespaces."""
+
+    import rdflib.plugins.sparql as sparql
+    from rdflib.namespace import RDF, RDFS, OWL
+
+    return(sparql.prepareQuery(query, initNs={'rdf': RDF, 'rdfs': RDFS, 'owl': OWL}))
 
 
 class Ontology:
@@ -16,19 +33,21 @@ class Ontology:
 
     def __init__(self, filename):
         """Construct an Ontology object and create the corresponding RDFLIB graph."""
-        self.g = rdflib.Graph()
-        self.g.load(filename)
+        self.g = _load_graph(filename)
+        self._build_index()
 
-    def search(self, search_term):
-        """
-        Search for an aspect that corresponds to the given term.
-        Returns the aspect's class in case of success. Otherwise, returns 'None'.
+    def _build_index(self):
         """
+        Create the label index used by 'search'.
 
-        search_term = search_term.lower()
+        A term matches a label when it's equal to the whole label or to a
+        sequence of '_' separated segments at the label's start or end (e.g.
+        'bateria' and 'externa' match 'bateria_externa'). The index maps every
+        such term, in lower case, to the first matching class label in
+        alphabetical order, as the former SPARQL query did.
+        """
 
-        # Especifies the query syntax
-        query = sparql.prepareQuery("""
+        query = _prepare_query("""
                     SELECT DISTINCT ?individualLabel ?classLabel
                     WHERE {
                         ?y rdf:type owl:Class .
@@ -37,34 +56,54 @@ class Ontology:
                             ?x rdf:type ?y .
                             ?x rdfs:label ?individualLabel .
                         }
-                        FILTER( REGEX(str(?individualLabel), "^%s([_]|$)|([_]|^)%s$", "i") ||
-                                REGEX(str(?classLabel), "^%s([_]|$)|([_]|^)%s$", "i"))
-                    }
-                    ORDER BY ASC(?classLabel)""" % (search_term, search_term, search_term, search_term),
-                    initNs={'rdf': RDF, 'rdfs': RDFS, 'owl': OWL})
+                    }""")
 
-        # Perform the query through the ontology
-        query_result = self.g.query(query, DEBUG=True)
+        self.index = dict()
 
-        # Transform the query results to a Pandas DataFrame format
-        data = []
-        for row in query_result:
-            data_row = []
-            for x in row:
-                if x is not None:
-                    x = x.toPython()
-                data_row.append(x)
-            data.append(data_row)
+        for individual_label, class_label in self.g.query(query):
+            class_label = class_label.toPython()
 
-        df = pd.DataFrame(data, columns=['individualLabel', 'classLabel'])
+            labels = [class_label]
+            if individual_label is not None:
+                labels.append(individual_label.toPython())
 
-        # Retrives the first class listed on the DataFrame, in case it exists
-        try:
-            result_class = df.loc[0, 'classLabel']
-        except KeyError:
-            result_class = None
+            for label in labels:
+                for term in _label_terms(label.lower()):
+                    if term not in self.index or class_label < self.index[term]:
+                        self.index[term] = class_label
 
-        return(result_class)
+    def search(self, search_term):
+        """
+        Search for an aspect that corresponds to the given term.
+        Returns the aspect's class in case of success. Otherwise, returns 'None'.
+        """
+
+        return(self.index.get(search_term.lower()))
+
+    def search_many(self, search_terms):
+        """
+        Search for the aspects corresponding to each of the given terms.
+        Returns a list with the aspect's class (or 'None') for each term.
+        """
+
+        index = self.index
+
+        return([index.get(term.lower()) for term in search_terms])
+
+
+def _label_terms(label):
+    """
+    Return the terms matching a label: the label itself and it's prefixes and
+    suffixes delimited by '_'.
+    """
+
+    terms = [label]
+    for i, char in enumerate(label):
+        if char == '_':
+            terms.append(label[:i])
+            terms.append(label[i + 1:])
+
+    return(terms)
 
 
 def ontology_to_dict(filename):
@@ -75,19 +114,17 @@ def ontology_to_dict(filename):
     cluster on the ontology.
     """
 
-    g = rdflib.Graph()
-    g.load(filename)
+    g = _load_graph(filename)
 
-    query_classes = sparql.prepareQuery("""
+    query_classes = _prepare_query("""
             SELECT DISTINCT ?classLabel
             WHERE {
                 ?y rdf:type owl:Class .
                 ?y rdfs:label ?classLabel .
             }
-            ORDER BY ASC(?classLabel)""",
-            initNs={'rdf': RDF, 'rdfs': RDFS, 'owl': OWL})
+            ORDER BY ASC(?classLabel)""")
 
-    query_individuals = sparql.prepareQuery("""
+    query_individuals = _prepare_query("""
             SELECT DISTINCT ?individualLabel ?classLabel
             WHERE {
                 ?y rdf:type owl:Class .
@@ -95,8 +132,7 @@ def ontology_to_dict(filename):
                 ?x rdf:type ?y .
                 ?x rdfs:label ?individualLabel .
             }
-            ORDER BY ASC(?classLabel)""",
-            initNs={'rdf': RDF, 'rdfs': RDFS, 'owl': OWL})
+            ORDER BY ASC(?classLabel)""")
 
     onto_dict = dict()
 
@@ -0,0 +1,202 @@
+"""
+Class and functions to write the results of each review to columnar files.
+
+Results are written as one record per review and aspect, in chunks of bounded
+size (Parquet row groups or Arrow IPC record batches), so memory doesn't grow
+with the corpus size. Requires the optional 'pyarrow' package.
+
+Record columns:
+    review_id            review identifier
+    year                 review year
+    aspect               aspect class
+    polarity             aspect polarity on the review ('Document.aspect_polarity')
+    aspect_positions     positions of the aspect words on the review
+    sentiment_positions  positions of the sentiment words around the aspect
+
+Positions come from the review's analysed Document, or are computed along
+with the polarities on worker processes and kept on the result store. They're
+only null for results stored without them (by an earlier version).
+"""
+
+# Standart libraries
+import os
+
+# Local files
+from aggregation import counts_to_dataframes
+
+COLUMNS = ['review_id', 'year', 'aspect', 'polarity', 'aspect_positions', 'sentiment_positions']
+FORMATS = {'.parquet': 'parquet', '.arrow': 'arrow', '.feather': 'arrow'}
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("Writing and reading results files requires 'pyarrow', install it running "
+                          "'pip install pyarrow'") from None
+
+    return(pyarrow)
+
+
+def _file_format(filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f'Unknown results file extension "{extension}", use one of {sorted(FORMATS)}')
+
+    return(FORMATS[extension])
+
+
+def _schema(pa):
+    return(pa.schema([('review_id', pa.string()), ('year', pa.int64()), ('aspect', pa.string()),
+                      ('polarity', pa.float64()), ('aspect_positions', pa.list_(pa.int32())),
+                      ('sentiment_positions', pa.list_(pa.int32()))]))
+
+
+def document_positions(review):
+    """
+    Return a dictionary mapping each aspect of an analysed Document to a tuple
+    (aspect positions, sentiment word positions).
+    """
+
+    positions = dict()
+    for pos, aspect in review.aspect_pos.items():
+        aspect_positions, sentiment_positions = positions.setdefault(aspect, ([], []))
+        aspect_positions.append(pos)
+
+        # The aspect context holds the sentence range followed by the sentiment positions
+        sentiment_positions.extend(s_pos for s_pos in review.aspect_context[pos] if not isinstance(s_pos, tuple))
+
+    return(positions)
+
+
+class ResultWriter:
+    """
+    Writer of review results to a Parquet ('.parquet') or Arrow IPC ('.arrow',
+    '.feather') file, chosen by the file extension.
+    """
+
+    def __init__(self, filename, chunk_size=65536):
+        """
+        Parameters
+        ----------
+        filename : String
+            Output file
+        chunk_size : Integer
+            Number of records buffered before a chunk is written
+        """
+
+        self.pa = _import_pyarrow()
+        self.filename = filename
+        self.file_format = _file_format(filename)
+        self.chunk_size = chunk_size
+        self.schema = _schema(self.pa)
+        self.n_records = 0
+
+        self._columns = {column: [] for column in COLUMNS}
+        if self.file_format == 'parquet':
+            import pyarrow.parquet
+            self._writer = pyarrow.parquet.ParquetWriter(filename, self.schema)
+        else:
+            import pyarrow.ipc
+            self._writer = pyarrow.ipc.new_file(filename, self.schema)
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, review_id, year, aspect_polarity, review=None, positions=None):
+        """
+        Add the records of a review's aspects polarities. The aspects and
+        sentiment words positions are added when given ('document_positions')
+        or computed from the review's analysed Document.
+        """
+
+        if positions is None:
+            positions = document_positions(review) if review is not None else dict()
+        columns = self._columns
+
+        for aspect, polarity in aspect_polarity.items():
+            aspect_positions, sentiment_positions = positions.get(aspect, (None, None))
+            columns['review_id'].append(None if review_id is None else str(review_id))
+            columns['year'].append(year)
+            columns['aspect'].append(aspect)
+            columns['polarity'].append(polarity)
+            columns['aspect_positions'].append(aspect_positions)
+            columns['sentiment_positions'].append(sentiment_positions)
+
+        if len(columns['aspect']) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write the buffered records as a chunk.
+        """
+
+        if not self._columns['aspect']:
+            return
+
+        batch = self.pa.RecordBatch.from_pydict(self._columns, schema=self.schema)
+        if self.file_format == 'parquet':
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+
+        self.n_records += batch.num_rows
+        self._columns = {column: [] for column in COLUMNS}
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
+def read_batches(filename, columns=None):
+    """
+    Yield the chunks of a results file as pyarrow RecordBatches, with only the
+    given columns.
+    """
+
+    pa = _import_pyarrow()
+
+    if _file_format(filename) == 'parquet':
+        import pyarrow.parquet
+        yield from pyarrow.parquet.ParquetFile(filename).iter_batches(columns=columns)
+    else:
+        import pyarrow.ipc
+        with pa.memory_map(filename) as source:
+            reader = pyarrow.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                batch = reader.get_batch(i)
+                yield batch.select(columns) if columns else batch
+
+
+def results_to_dataframes(filename):
+    """
+    Compute the corpus DataFrames ('PolarityAggregator.to_dataframes') from a
+    results file, with vectorized groupbys on each chunk. Memory depends on the
+    number of (aspect, year) pairs, not on the number of records.
+    """
+
+    import pandas as pd
+
+    def combine(partial_counts):
+        # Groups keep the order of first occurrence, as on the aggregator
+        return(pd.concat(partial_counts).groupby(level=[0, 1], sort=False, dropna=False).sum())
+
+    partial_counts = []
+    for batch in read_batches(filename, ['aspect', 'year', 'polarity']):
+        df = batch.to_pandas()
+        df['Positive'] = (df['polarity'] >= 0).astype('int64')
+        df['Negative'] = (df['polarity'] < 0).astype('int64')
+        partial_counts.append(df.groupby(['aspect', 'year'], sort=False, dropna=False)[['Positive', 'Negative']].sum())
+
+        if len(partial_counts) >= 64:
+            partial_counts = [combine(partial_counts)]
+
+    if partial_counts:
+        df_counts = combine(partial_counts).reset_index()
+    else:
+        df_counts = pd.DataFrame(columns=['aspect', 'year', 'Positive', 'Negative'])
+
+    return(counts_to_dataframes(df_counts.rename(columns={'aspect': 'Aspect', 'year': 'Year'})))
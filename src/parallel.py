@@ -0,0 +1,172 @@
+"""
+Functions to analyse reviews on a pool of worker processes.
+
+Each worker loads the LIWC dictionary, the ontology and the tokenizer once,
+then analyses chunks of reviews and returns only their aspects polarities.
+Other pools (like the scoring service's) use 'make_executor', or 'init_worker'
+and 'analyze_chunk' directly.
+"""
+
+# Standart libraries
+import collections
+import concurrent.futures
+import functools
+import itertools
+import multiprocessing
+
+# Local files
+from analyzer import Analyzer
+from domains import result_key
+from output import document_positions
+
+# Analyzer of each worker process
+_worker = dict()
+
+
+def init_worker(**analyzer_options):
+    """
+    Load the resources used by a worker process: an Analyzer constructed with
+    the given keyword options (see 'analyzer.Analyzer'). Domain ontologies are
+    attached to their shared indexes when first used.
+    """
+
+    _worker['analyzer'] = Analyzer(**analyzer_options)
+
+
+def analyze_chunk(texts, domains=None, positions=False):
+    """
+    Return the aspects polarities ('Document.aspect_polarity') for each text,
+    on a worker process set up by 'init_worker'. With 'positions' set, return
+    tuples (aspects polarities, positions) instead ('output.document_positions').
+    """
+
+    analyzer = _worker['analyzer']
+    if not positions:
+        return(analyzer.analyze_batch(texts, domains=domains))
+
+    documents = [analyzer.document(text, keep_text=False, domain=domain)
+                 for text, domain in zip(texts, domains or [None] * len(texts))]
+
+    return([(review.aspect_polarity, document_positions(review)) for review in documents])
+
+
+def make_executor(workers, **analyzer_options):
+    """
+    Return a ProcessPoolExecutor with 'workers' processes set up by
+    'init_worker', so 'analyze_chunk' can be submitted to it.
+    """
+
+    return(concurrent.futures.ProcessPoolExecutor(workers, initializer=functools.partial(init_worker,
+                                                                                          **analyzer_options)))
+
+
+def _chunks(iterable, chunk_size):
+    """
+    Yield lists of up to 'chunk_size' items. When reading an item fails, the
+    items read before it are yielded first, then the error is raised.
+    """
+
+    iterator = iter(iterable)
+    while True:
+        chunk = []
+        try:
+            for item in itertools.islice(iterator, chunk_size):
+                chunk.append(item)
+        except Exception:
+            if chunk:
+                yield chunk
+            raise
+        if not chunk:
+            return
+        yield chunk
+
+
+def analyze_parallel(source, liwc_file, ontology_file, workers=None, chunk_size=64, fast_tokenizer=False,
+                     aspect_matcher=False, tag_cache_size=0, store=None, ontology_dir=None, positions=False):
+    """
+    Analyse the reviews of a source (see the 'corpus' module) on a pool of
+    worker processes.
+
+    Yields a tuple (review, aspect polarities, positions) for each review, in
+    the same order as the source. At most two chunks per worker are in flight,
+    so memory doesn't grow with the source size. If reading the source fails,
+    the reviews read before are yielded before the error is raised.
+
+    Parameters
+    ----------
+    source : Iterable of 'corpus.Review'
+        Reviews to analyse
+    liwc_file : String
+        LIWC dictionary file
+    ontology_file : String
+        OWL ontology file
+    workers : Integer
+        Number of worker processes, by default the number of CPUs
+    chunk_size : Integer
+        Number of reviews sent to a worker at once
+    fast_tokenizer, aspect_matcher : Boolean
+        Tokenizer options, see 'Tokenizer.from_ontology'
+    tag_cache_size : Integer
+        Size of each worker's word tags cache ('tagger.WordTagger'), 0 disables it
+    store : store.ResultStore
+        If given, reviews with stored results aren't sent to the workers, and
+        new results are stored
+    ontology_dir : String
+        Folder of the product domains ontologies, required for reviews with a
+        domain. Its indexes must be compiled ('domains.OntologyRegistry')
+    positions : Boolean
+        Also compute the positions of the aspects and sentiment words of each
+        review ('output.document_positions'), otherwise they're None. They're
+        None as well for stored results kept without positions
+    """
+
+    workers = workers or multiprocessing.cpu_count()
+
+    initializer = functools.partial(init_worker, liwc_file=liwc_file, ontology_file=ontology_file,
+                                    fast_tokenizer=fast_tokenizer, aspect_matcher=aspect_matcher,
+                                    tag_cache_size=tag_cache_size, ontology_dir=ontology_dir)
+
+    with multiprocessing.Pool(workers, initializer=initializer) as pool:
+        pending = collections.deque()
+        chunks = _chunks(source, chunk_size)
+
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            except Exception:
+                # Yield the reviews read before the source failed
+                while pending:
+                    yield from _collect(*pending.popleft(), store, positions)
+                raise
+
+            stored = (store.get_many([result_key(review) for review in chunk], positions=True) if store
+                      else [None] * len(chunk))
+            new = [review for review, result in zip(chunk, stored) if result is None]
+            texts = [review.text for review in new]
+            domains = [review.domain for review in new] if ontology_dir is not None else None
+            async_result = pool.apply_async(analyze_chunk, (texts, domains, positions)) if texts else None
+            pending.append((chunk, stored, async_result))
+
+            # Wait for the oldest chunk once enough chunks are in flight
+            if len(pending) >= 2 * workers:
+                yield from _collect(*pending.popleft(), store, positions)
+
+        while pending:
+            yield from _collect(*pending.popleft(), store, positions)
+
+
+def _collect(chunk, stored, async_result, store, positions):
+    """
+    Yield each review of a chunk with its stored or newly computed result and
+    positions.
+    """
+
+    results = iter(async_result.get() if async_result else ())
+    for review, result in zip(chunk, stored):
+        if result is None:
+            result = next(results) if positions else (next(results), None)
+            if store is not None:
+                store.put(result_key(review), *result)
+        yield (review, *result)
@@ -0,0 +1,233 @@
+"""
+Classes and functions to report the analysed reviews as structured records.
+
+A Reporter builds one record (a dictionary) for each review it samples, at a
+given level:
+    'off'      nothing is reported
+    'review'   review number, id, year, text and aspects polarities
+    'context'  also the context of each aspect occurrence (sentence range and
+               sentiment words), when the review's Document is available
+
+Reviews can be sampled every Nth review and/or only when their aspects have
+conflicting polarities (positive and negative aspects on the same review).
+Records are passed to sinks that buffer them: JsonlSink writes them as JSON
+lines to a file, and ConsoleSink writes the human-readable views ('render')
+to the standard output. A JSON lines file is rendered again running:
+
+    python src/reporting.py records.jsonl [--aspects] [--context]
+"""
+
+# Standart libraries
+import argparse
+import json
+import sys
+
+LEVELS = {'off': 0, 'review': 1, 'context': 2}
+
+# Characters buffered by the sinks before writing
+BUFFER_SIZE = 1 << 20
+
+
+def has_conflict(aspect_polarity):
+    """
+    Return whether a review has both positive and negative aspects, as counted
+    by the aggregator (polarity greater or equal to zero is positive).
+    """
+
+    polarities = aspect_polarity.values()
+
+    return(any(polarity >= 0 for polarity in polarities) and any(polarity < 0 for polarity in polarities))
+
+
+def aspect_context(review):
+    """
+    Return the context records of each aspect occurrence of an analysed
+    Document: aspect class, aspect word, sentence range and the sentiment
+    words around it as [word, tag, position].
+    """
+
+    words = review.words
+    context = []
+    for pos, info in review.aspect_context.items():
+        context.append({'aspect': review.aspect_pos.get(pos), 'word': words[pos], 'position': pos,
+                        'range': list(info[0]),
+                        'sentiments': [[words[s_pos], review.word_tag[s_pos], s_pos] for s_pos in info[1:]]})
+
+    return(context)
+
+
+def render(record, aspects=False, context=False):
+    """
+    Return the human-readable view of a record: the review text, followed by
+    the aspects polarities ('Document.print_aspect_data') and the aspects
+    context ('Document.print_aspect_context') when requested.
+    """
+
+    lines = [f'\nReview #{record["review"]}\n {record["text"]}.']
+
+    if aspects and 'aspect_polarity' in record:
+        lines.append(f'\n[Aspect]               [Overall polarity]')
+        for key, item in record['aspect_polarity'].items():
+            lines.append(f'{key:{22}} {item}')
+
+    if context and 'context' in record:
+        for occurrence in record['context']:
+            start, end = occurrence['range']
+            lines.append(f'\nFound ({occurrence["aspect"]}) as ({occurrence["word"]}). Context {(start, end)}')
+            if not occurrence['sentiments']:
+                lines.append('   Nothing found.')
+            else:
+                lines.append(f'   [Aspect]            [Polarity] [Position]')
+                for word, tag, s_pos in occurrence['sentiments']:
+                    lines.append(f'   {word:{15}} {tag:{5}} {s_pos:{12}}')
+
+    return('\n'.join(lines) + '\n')
+
+
+class JsonlSink:
+    """
+    Buffered sink writing records as JSON lines to a file.
+    """
+
+    def __init__(self, filename, buffer_size=BUFFER_SIZE):
+        self.filename = filename
+        self.buffer_size = buffer_size
+        self._file = open(filename, 'w')
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, record):
+        line = json.dumps(record, ensure_ascii=False)
+        self._buffer.append(line)
+        self._buffered += len(line) + 1
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self._buffer:
+            self._file.write('\n'.join(self._buffer) + '\n')
+            self._buffer = []
+            self._buffered = 0
+        self._file.flush()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+class ConsoleSink:
+    """
+    Buffered sink writing the human-readable view of the records ('render')
+    to a text stream, the standard output by default.
+    """
+
+    def __init__(self, aspects=False, context=False, stream=None, buffer_size=BUFFER_SIZE):
+        """
+        'aspects' and 'context' select the views rendered after the review
+        text. The stream is looked up when written, so redirections apply.
+        """
+
+        self.aspects = aspects
+        self.context = context
+        self.stream = stream
+        self.buffer_size = buffer_size
+        self._buffer = []
+        self._buffered = 0
+
+    def write(self, record):
+        text = render(record, self.aspects, self.context)
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        stream = self.stream or sys.stdout
+        if self._buffer:
+            stream.write(''.join(self._buffer))
+            self._buffer = []
+            self._buffered = 0
+        stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+class Reporter:
+    """
+    Sampler of the analysed reviews, building their records for the sinks.
+    """
+
+    def __init__(self, sinks=(), level='review', every=1, conflicting=False):
+        """
+        Parameters
+        ----------
+        sinks : List of sinks
+            Objects with 'write(record)' and 'close()' methods
+        level : String
+            Detail of the records, one of the keys of 'LEVELS'
+        every : Integer
+            Report only every Nth review (the first one included)
+        conflicting : Boolean
+            Report only reviews with conflicting aspect polarities
+        """
+
+        if level not in LEVELS:
+            raise ValueError(f'Unknown report level "{level}", use one of {list(LEVELS)}')
+
+        self.sinks = list(sinks)
+        self.level = LEVELS[level]
+        self.every = every
+        self.conflicting = conflicting
+        self.n_reported = 0
+
+        # Without sinks or level there's nothing to sample
+        self.enabled = bool(self.sinks) and self.level > 0
+
+    def report(self, index, review_id, year, text, aspect_polarity, review=None):
+        """
+        Report the 'index'-th review of the corpus if it's sampled. The
+        aspects context is added at the 'context' level when the analysed
+        Document 'review' is given.
+        """
+
+        if not self.enabled or index % self.every:
+            return
+        if self.conflicting and not has_conflict(aspect_polarity):
+            return
+
+        record = {'review': index, 'id': review_id, 'year': year, 'text': text, 'aspect_polarity': aspect_polarity}
+        if self.level >= LEVELS['context'] and review is not None:
+            record['context'] = aspect_context(review)
+
+        for sink in self.sinks:
+            sink.write(record)
+        self.n_reported += 1
+
+    def close(self):
+        for sink in self.sinks:
+            sink.close()
+
+
+def read_records(filename):
+    """
+    Yield the records of a JSON lines file written by a JsonlSink.
+    """
+
+    with open(filename, 'r') as records_file:
+        for line in records_file:
+            if line.strip():
+                yield json.loads(line)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render the records of a JSON lines report file')
+    parser.add_argument('filename')
+    parser.add_argument('--aspects', action='store_true', help='show the aspects polarities')
+    parser.add_argument('--context', action='store_true', help='show the aspects context')
+    args = parser.parse_args()
+
+    sink = ConsoleSink(args.aspects, args.context)
+    for record in read_records(args.filename):
+        sink.write(record)
+    sink.close()
@@ -0,0 +1,148 @@
+"""
+Functions to cache compiled resources (LIWC dictionary, ontologies) on disk.
+
+A cache file holds a header identifying the resource and a payload of plain
+tables serialized with 'marshal'. The header stores the cache format version,
+the table layout version of the resource kind and the SHA-256 digest of the
+source file, so a cache is rebuilt whenever the source or the layout changes.
+"""
+
+# Standart libraries
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+
+# Local files
+import ontology
+from liwc import LIWC
+
+PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
+CACHE_DIR = os.path.join(PROJ_ROOT, 'data/interim')
+
+# Resources used by default
+LIWC_FILE = os.path.join(PROJ_ROOT, 'data/external/liwc/LIWC2007_Portugues_win.dic')
+ONTOLOGY_FILE = os.path.join(PROJ_ROOT, 'data/external/ontologies/smartphone_aspects.owl')
+
+# Cache file layout: magic, format version, kind name, layout version, source digest
+CACHE_MAGIC = b'OMPR'
+CACHE_VERSION = 1
+HEADER = struct.Struct('<4sH16sH32s')
+
+# Table layout version for each kind of resource. Increment it whenever the
+# tables produced by the corresponding builder change.
+LAYOUT_VERSIONS = {
+    'liwc': 1,
+    'ontology': 1,
+}
+
+
+def file_digest(filename):
+    """
+    Return the SHA-256 digest of a file contents.
+    """
+
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+
+    return(digest.digest())
+
+
+def cache_filename(source_file, cache_dir=CACHE_DIR):
+    """
+    Return the cache file path used for a given source file.
+    """
+
+    return(os.path.join(cache_dir, os.path.basename(source_file) + '.cache'))
+
+
+def _make_header(kind, digest):
+    return(HEADER.pack(CACHE_MAGIC, CACHE_VERSION, kind.encode('ascii'), LAYOUT_VERSIONS[kind], digest))
+
+
+def read_cache(filename, kind, digest):
+    """
+    Return the tables stored on a cache file, or None in case the file is
+    missing, stale or corrupted.
+    """
+
+    try:
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if mm[:HEADER.size] != _make_header(kind, digest):
+                return(None)
+            with memoryview(mm) as view:
+                return(marshal.loads(view[HEADER.size:]))
+
+    # Missing or empty files, and payloads not readable by marshal
+    except (OSError, ValueError, EOFError, TypeError):
+        return(None)
+
+
+def write_cache(filename, kind, digest, tables):
+    """
+    Store tables on a cache file. The file is replaced atomically, so
+    concurrent readers never see a partially written cache.
+    """
+
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    temp_filename = f'{filename}.{os.getpid()}.tmp'
+    with open(temp_filename, 'wb') as f:
+        f.write(_make_header(kind, digest))
+        marshal.dump(tables, f)
+    os.replace(temp_filename, filename)
+
+
+def load_tables(source_file, kind, build, cache_dir=CACHE_DIR):
+    """
+    Load the tables compiled from a source file, using the cache when it's
+    up to date. Otherwise compile them again with 'build' and refresh the cache.
+
+    Parameters
+    ----------
+    source_file : String
+        Resource file the tables are compiled from
+    kind : String
+        Resource kind, one of the keys of 'LAYOUT_VERSIONS'
+    build : Function
+        Function receiving 'source_file' and returning the tables. Tables must
+        contain only types supported by 'marshal'
+    cache_dir : String
+        Folder where cache files are stored
+
+    Returns
+    -------
+    tables: Object returned by 'build'
+    """
+
+    digest = file_digest(source_file)
+    filename = cache_filename(source_file, cache_dir)
+
+    tables = read_cache(filename, kind, digest)
+    if tables is None:
+        tables = build(source_file)
+        write_cache(filename, kind, digest, tables)
+
+    return(tables)
+
+
+def load_liwc(filename, cache_dir=CACHE_DIR, **kwargs):
+    """
+    Load a LIWC object from a dictionary file, using the compiled cache.
+    Keyword arguments are passed to 'LIWC.from_tables'.
+    """
+
+    tables = load_tables(filename, 'liwc', lambda f: LIWC(f).to_tables(), cache_dir)
+
+    return(LIWC.from_tables(tables, **kwargs))
+
+
+def load_ontology_dict(filename, cache_dir=CACHE_DIR):
+    """
+    Load the aspects dictionary of an ontology (see 'ontology.ontology_to_dict'),
+    using the compiled cache.
+    """
+
+    return(load_tables(filename, 'ontology', ontology.ontology_to_dict, cache_dir))
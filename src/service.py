@@ -0,0 +1,358 @@
+"""
+Local HTTP service scoring review texts, coalescing concurrent requests into
+micro-batches.
+
+Endpoints:
+    POST /analyze   body {"text": "...", "domain": "..."} (the domain is optional
+                    and needs --ontology-dir), answers {"aspects": {aspect: polarity}}
+    GET  /stats     latency percentiles, queue depth and batch statistics
+    GET  /health    answers {"status": "ok"}
+
+Scoring runs on an executor, so the event loop keeps accepting requests: a
+single thread by default, or worker processes holding their own Analyzer, each
+scoring a batch at a time. Run from the project root:
+
+    python src/service.py --port 8080 --max-batch-size 32 --max-wait-ms 5
+"""
+
+# Standart libraries
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import functools
+import json
+import time
+
+# Local files
+import parallel
+from analyzer import Analyzer
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                500: 'Internal Server Error'}
+
+
+def percentiles(values, ranks=(50, 90, 99)):
+    """
+    Return a dictionary with the nearest-rank percentiles of 'values'.
+    """
+
+    values = sorted(values)
+    if not values:
+        return({f'p{rank}': None for rank in ranks})
+
+    return({f'p{rank}': values[min(len(values) - 1, max(0, -(-rank * len(values) // 100) - 1))] for rank in ranks})
+
+
+class MicroBatcher:
+    """
+    Queue of texts scored in batches of up to 'max_batch_size' texts. A batch
+    is sent as soon as it's full or 'max_wait' seconds after its first text
+    arrived, once fewer than 'max_in_flight' batches are being scored.
+    """
+
+    def __init__(self, score_batch, max_batch_size=32, max_wait=0.005, executor=None, latency_window=10000,
+                 max_in_flight=1):
+        """
+        Parameters
+        ----------
+        score_batch : Function
+            Maps a list of texts, and a 'domains' keyword argument (list of
+            product domains, or None), to a list of aspects polarities
+        max_batch_size : Integer
+            Maximum number of texts on a batch
+        max_wait : Float
+            Maximum time, in seconds, a text waits for a batch to fill
+        executor : concurrent.futures.Executor
+            Executor running 'score_batch', by default a single thread
+        latency_window : Integer
+            Number of recent requests the latency percentiles are computed on
+        max_in_flight : Integer
+            Maximum number of batches scored at once, usually the number of
+            executor workers
+        """
+
+        self.score_batch = score_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.executor = executor or concurrent.futures.ThreadPoolExecutor(1)
+        self.max_in_flight = max_in_flight
+
+        self.queue = asyncio.Queue()
+        self.in_flight = 0
+        self.batches_in_flight = 0
+        self.latencies = collections.deque(maxlen=latency_window)
+        self.n_requests = 0
+        self.n_batches = 0
+        self.n_errors = 0
+        self._task = None
+        self._batch_tasks = set()
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        tasks = list(self._batch_tasks)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    async def analyze(self, text, domain=None):
+        """
+        Return the aspects polarities of a text, using the ontology of a
+        product domain, once its batch is scored.
+        """
+
+        start = time.perf_counter()
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, domain, future))
+        try:
+            return(await future)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+            self.n_requests += 1
+
+    async def _next_batch(self):
+        """
+        Wait for a text, then gather the batch until it's full or times out.
+        """
+
+        batch = [await self.queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+
+        while len(batch) < self.max_batch_size:
+            if self.queue.empty():
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self.queue.get_nowait())
+
+        return(batch)
+
+    async def _run(self):
+        """
+        Dispatch batches as tasks, waiting for a free slot before gathering the
+        next one, so texts keep queueing (and batches fill) while every slot
+        is busy.
+        """
+
+        slots = asyncio.Semaphore(self.max_in_flight)
+        loop = asyncio.get_running_loop()
+        while True:
+            await slots.acquire()
+            try:
+                batch = await self._next_batch()
+            except asyncio.CancelledError:
+                slots.release()
+                raise
+
+            self.in_flight += len(batch)
+            self.batches_in_flight += 1
+            task = loop.create_task(self._score(batch))
+            self._batch_tasks.add(task)
+            task.add_done_callback(functools.partial(self._batch_done, batch, slots))
+
+    async def _score(self, batch):
+        """
+        Score a batch on the executor, returning its results.
+        """
+
+        texts = [text for text, _, _ in batch]
+        domains = [domain for _, domain, _ in batch]
+        if all(domain is None for domain in domains):
+            domains = None
+
+        return(await asyncio.get_running_loop().run_in_executor(
+            self.executor, functools.partial(self.score_batch, texts, domains=domains)))
+
+    def _batch_done(self, batch, slots, task):
+        """
+        Resolve the futures of a scored batch and free its slot.
+        """
+
+        self._batch_tasks.discard(task)
+        self.in_flight -= len(batch)
+        self.batches_in_flight -= 1
+        self.n_batches += 1
+        slots.release()
+
+        if task.cancelled():
+            for _, _, future in batch:
+                future.cancel()
+        elif task.exception() is not None:
+            self.n_errors += 1
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(task.exception())
+        else:
+            for (_, _, future), result in zip(batch, task.result()):
+                if not future.done():
+                    future.set_result(result)
+
+    def stats(self):
+        latencies = percentiles(self.latencies)
+        return({
+            'requests': self.n_requests,
+            'batches': self.n_batches,
+            'errors': self.n_errors,
+            'mean_batch_size': self.n_requests / self.n_batches if self.n_batches else None,
+            'queue_depth': self.queue.qsize(),
+            'in_flight': self.in_flight,
+            'batches_in_flight': self.batches_in_flight,
+            'latency_ms': {rank: value * 1000 if value is not None else None for rank, value in latencies.items()},
+        })
+
+
+async def _read_request(reader):
+    """
+    Read an HTTP request and return (method, path, headers, body), or None
+    when the connection is closed.
+    """
+
+    request_line = await reader.readline()
+    if not request_line.strip():
+        return(None)
+    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+
+    headers = dict()
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    length = int(headers.get('content-length', 0))
+    body = await reader.readexactly(length) if length else b''
+
+    return(method, path, headers, body)
+
+
+def _response(status, data, keep_alive):
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    head = (f'HTTP/1.1 {status} {HTTP_REASONS[status]}\r\n'
+            f'Content-Type: application/json; charset=utf-8\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            f'Connection: {"keep-alive" if keep_alive else "close"}\r\n\r\n')
+
+    return(head.encode('latin-1') + body)
+
+
+async def _route(batcher, domains, method, path, body):
+    """
+    Return the status and the JSON data answering a request. Requests can
+    select a product domain when 'domains' is set.
+    """
+
+    if path == '/analyze':
+        if method != 'POST':
+            return(405, {'error': 'use POST'})
+        try:
+            data = json.loads(body)
+            text = data['text']
+            domain = data.get('domain')
+        except (ValueError, KeyError, TypeError, AttributeError):
+            text = domain = None
+        if not isinstance(text, str):
+            return(400, {'error': 'body must be a JSON object with a "text" string'})
+        if domain is not None and (not domains or not isinstance(domain, str)):
+            return(400, {'error': '"domain" must be a string, and the service must run with an ontology folder'})
+        return(200, {'aspects': await batcher.analyze(text, domain)})
+
+    elif path == '/stats':
+        return(200, batcher.stats())
+    elif path == '/health':
+        return(200, {'status': 'ok'})
+
+    return(404, {'error': f'unknown path {path}'})
+
+
+async def _handle_connection(batcher, domains, reader, writer):
+    try:
+        while True:
+            request = await _read_request(reader)
+            if request is None:
+                break
+            method, path, headers, body = request
+            keep_alive = headers.get('connection', '').lower() != 'close'
+
+            try:
+                status, data = await _route(batcher, domains, method, path, body)
+            except Exception as error:
+                status, data = 500, {'error': str(error)}
+
+            writer.write(_response(status, data, keep_alive))
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(host='127.0.0.1', port=8080, max_batch_size=32, max_wait=0.005, workers=0, **analyzer_options):
+    """
+    Run the service until cancelled.
+
+    Parameters
+    ----------
+    host, port :
+        Address the service listens on
+    max_batch_size, max_wait :
+        Micro-batching options, see 'MicroBatcher'
+    workers : Integer
+        Number of worker processes scoring batches (one batch each at a time),
+        0 to score them on a thread
+    analyzer_options :
+        Options passed to the 'Analyzer', 'ontology_dir' enables the 'domain'
+        of the requests
+    """
+
+    if workers:
+        executor = parallel.make_executor(workers, **analyzer_options)
+        score_batch = parallel.analyze_chunk
+    else:
+        executor = None
+        score_batch = Analyzer(**analyzer_options).analyze_batch
+
+    batcher = MicroBatcher(score_batch, max_batch_size, max_wait, executor, max_in_flight=max(workers, 1))
+    batcher.start()
+
+    domains = analyzer_options.get('ontology_dir') is not None
+    server = await asyncio.start_server(functools.partial(_handle_connection, batcher, domains), host, port)
+    print(f'Listening on http://{host}:{port}')
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=5)
+    parser.add_argument('--workers', type=int, default=0, help='scoring processes, 0 scores on a thread')
+    parser.add_argument('--fast-tokenizer', action='store_true')
+    parser.add_argument('--aspect-matcher', action='store_true')
+    parser.add_argument('--tag-cache', type=int, default=65536, help='word tags cache size, 0 disables it')
+    parser.add_argument('--ontology-dir', help='folder of the product domains ontologies, enables request domains')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000, args.workers,
+                          fast_tokenizer=args.fast_tokenizer, aspect_matcher=args.aspect_matcher,
+                          tag_cache_size=args.tag_cache, ontology_dir=args.ontology_dir))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,154 @@
+"""
+Class and functions to store the results of each review between runs.
+
+Results are kept on a SQLite database keyed by the SHA-256 digest of the
+review text and by a fingerprint of everything else the result depends on:
+the LIWC and ontology files, the algorithm version and the tokenizer options.
+A review analysed before with the same fingerprint is not analysed again.
+
+Results are looked up by their primary key as reviews are read, one at a time
+('get') or a chunk at a time ('get_many'), so the memory used and the time to
+open the store don't depend on the number of results stored.
+"""
+
+# Standart libraries
+import hashlib
+import json
+import marshal
+import os
+import sqlite3
+
+# Local files
+import resources
+from document import ALGORITHM_VERSION
+
+STORE_FILE = os.path.join(resources.CACHE_DIR, 'results.sqlite')
+
+# Digests looked up per query, under SQLite's default limit of 999 variables
+MAX_VARIABLES = 900
+
+
+def fingerprint(liwc_file, ontology_file, **options):
+    """
+    Return the fingerprint of the resources, the algorithm version and the
+    options affecting the results (e.g. the tokenizer options).
+    """
+
+    digest = hashlib.sha256()
+    digest.update(resources.file_digest(liwc_file))
+    digest.update(resources.file_digest(ontology_file))
+    digest.update(json.dumps([ALGORITHM_VERSION, sorted(options.items())]).encode('utf-8'))
+
+    return(digest.hexdigest())
+
+
+def text_digest(text):
+    return(hashlib.sha256(text.encode('utf-8')).digest())
+
+
+class ResultStore:
+    """
+    Persistent store of the aspects polarities ('Document.aspect_polarity') of
+    each review text, for a given fingerprint, optionally with the positions
+    of the aspects and sentiment words ('output.document_positions').
+    """
+
+    def __init__(self, filename, fingerprint, commit_every=1000):
+        """
+        Open (or create) the store. Results are committed every 'commit_every'
+        new results and when the store is closed.
+        """
+
+        self.fingerprint = fingerprint
+        self.commit_every = commit_every
+        self.hits = 0
+        self.misses = 0
+        self._pending = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute('CREATE TABLE IF NOT EXISTS results (fingerprint TEXT, digest BLOB, '
+                                'aspect_polarity BLOB, PRIMARY KEY (fingerprint, digest)) WITHOUT ROWID')
+
+    def __enter__(self):
+        return(self)
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def get(self, text, positions=False):
+        """
+        Return the stored aspects polarities of a text, or None. With
+        'positions' set, return a tuple (aspects polarities, positions)
+        instead, positions being None when they weren't stored.
+        """
+
+        row = self.connection.execute('SELECT aspect_polarity FROM results WHERE fingerprint = ? AND digest = ?',
+                                      (self.fingerprint, text_digest(text))).fetchone()
+
+        return(self._result(None if row is None else row[0], positions))
+
+    def get_many(self, texts, positions=False):
+        """
+        Return the stored result of each text, or None, as 'get' does, with
+        one query per MAX_VARIABLES texts.
+        """
+
+        digests = [text_digest(text) for text in texts]
+        found = dict()
+        for i in range(0, len(digests), MAX_VARIABLES):
+            chunk = digests[i:i + MAX_VARIABLES]
+            found.update(self.connection.execute(f'SELECT digest, aspect_polarity FROM results WHERE fingerprint = ? '
+                                                 f'AND digest IN ({", ".join("?" * len(chunk))})',
+                                                 (self.fingerprint, *chunk)))
+
+        return([self._result(found.get(digest), positions) for digest in digests])
+
+    def _result(self, result, positions):
+        """
+        Return a serialized result as 'get' does, counting the hits and misses.
+        """
+
+        if result is None:
+            self.misses += 1
+            return(None)
+
+        self.hits += 1
+
+        # Results stored with positions are (aspects polarities, positions) tuples
+        result = marshal.loads(result)
+        if not isinstance(result, tuple):
+            result = (result, None)
+
+        return(result if positions else result[0])
+
+    def put(self, text, aspect_polarity, positions=None):
+        """
+        Store the aspects polarities of a text, and their positions if given.
+        """
+
+        result = marshal.dumps(aspect_polarity if positions is None else (aspect_polarity, positions))
+        self.connection.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)',
+                                (self.fingerprint, text_digest(text), result))
+
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        self.connection.commit()
+        self._pending = 0
+
+    def prune(self):
+        """
+        Delete the results stored with other fingerprints, return their number.
+        """
+
+        deleted = self.connection.execute('DELETE FROM results WHERE fingerprint != ?', (self.fingerprint,)).rowcount
+        self.commit()
+
+        return(deleted)
+
+    def close(self):
+        self.commit()
+        self.connection.close()
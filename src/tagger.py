@@ -0,0 +1,82 @@
+"""
+Class to tag words with a cache shared across documents.
+"""
+
+# Standart libraries
+import functools
+
+# Local files
+from document import negation, amplifier, downtoner, TAG_NONE, TAG_NEGATION, TAG_AMPLIFIER, TAG_DOWNTONER
+
+
+class WordTagger:
+    """
+    Bounded LRU cache of word classifications, shared by every document tagged
+    with the same LIWC dictionary and ontology.
+
+    Review vocabularies are Zipfian, so most words are classified once and then
+    found on the cache. The cache is cleared whenever the tagger is used with
+    different resources (e.g. reloaded after the files changed).
+    """
+
+    def __init__(self, maxsize=65536):
+        """
+        Parameters
+        ----------
+        maxsize : Integer
+            Maximum number of words kept on the cache, None for no limit
+        """
+
+        self.maxsize = maxsize
+        self.liwc = None
+        self.ontology = None
+        self._classify = None
+
+    def classifier(self, liwc, ontology):
+        """
+        Return the cached function mapping a word to a tuple (tag code, aspect).
+
+        The tag code is the context changing word code, or the LIWC polarity
+        (TAG_NONE if it isn't a sentiment word). The aspect is the ontology
+        class of the word, or None.
+        """
+
+        if liwc is not self.liwc or ontology is not self.ontology:
+            self.liwc = liwc
+            self.ontology = ontology
+            self._classify = functools.lru_cache(self.maxsize)(self._lookup)
+
+        return(self._classify)
+
+    def _lookup(self, word):
+        if word in negation:
+            return(TAG_NEGATION, None)
+        elif word in amplifier:
+            return(TAG_AMPLIFIER, None)
+        elif word in downtoner:
+            return(TAG_DOWNTONER, None)
+
+        polarity = self.liwc.get_sentiment(word)
+
+        return(TAG_NONE if polarity is None else polarity, self.ontology.get(word))
+
+    def clear(self):
+        """
+        Empty the cache.
+        """
+
+        if self._classify is not None:
+            self._classify.cache_clear()
+
+    def stats(self):
+        """
+        Return a dictionary with the cache hits, misses, size and hit rate.
+        """
+
+        if self._classify is None:
+            hits, misses, size = 0, 0, 0
+        else:
+            hits, misses, _, size = self._classify.cache_info()
+
+        return({'hits': hits, 'misses': misses, 'size': size, 'maxsize': self.maxsize,
+                'hit_rate': hits / (hits + misses) if hits + misses else None})
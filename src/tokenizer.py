@@ -0,0 +1,232 @@
+"""
+Class and functions to split opinion texts into words.
+"""
+
+# Standart libraries
+import array
+import re
+
+# Local files
+import ontology
+from matcher import AspectMatcher
+
+# Word tokenizer pattern following the NLTK 'word_tokenize' rules for the
+# punctuation found on Portuguese reviews
+_WORD_PATTERN = re.compile(r"""
+      \.\.\.                                # ellipsis
+    | --                                    # double dash
+    | [;@\#$%&?!()\[\]{}<>"]                # always split symbols
+    | [,:](?!\d)                            # comma and colon, unless on numbers
+    | \.                                    # period ending a word
+    | (?:[^\s;@\#$%&?!()\[\]{}<>",:.\-]     # any other word character
+       | -(?!-)                             # hyphen, unless on a double dash
+       | [,:](?=\d)                         # comma and colon on numbers
+       | \.(?=[^\s.\]\)}>"'])               # period inside a word
+      )+
+    """, re.VERBOSE)
+
+# Words kept on the vocabulary of a long-lived analyzer before it's reset
+VOCABULARY_SIZE = 1 << 18
+
+
+def punkt_resource():
+    """
+    Return the name of the NLTK data used by 'nltk.word_tokenize': 'punkt_tab'
+    since NLTK 3.8.2 (which no longer loads the pickled 'punkt' models),
+    'punkt' before.
+    """
+
+    from nltk.tokenize import punkt
+
+    return('punkt_tab' if hasattr(punkt, 'PunktTokenizer') else 'punkt')
+
+
+def ensure_punkt(download=False):
+    """
+    Check that the NLTK punkt data ('punkt_resource') is installed. The network
+    is only used when it's missing and 'download' is set, otherwise a
+    LookupError is raised.
+    """
+
+    import nltk
+
+    resource = punkt_resource()
+    try:
+        nltk.data.find(f'tokenizers/{resource}')
+    except LookupError:
+        if not download:
+            raise LookupError(f"NLTK '{resource}' data not found, install it running 'make punkt' or "
+                              f"'python -m nltk.downloader {resource}'")
+        if not nltk.download(resource, quiet=True):
+            raise LookupError(f"Failed to download the NLTK '{resource}' data")
+
+
+# Characters preceding an opening double quote
+_OPENING_QUOTE_CONTEXT = set(' \t\n\r([{<')
+
+
+def fast_word_tokenize(text):
+    """
+    Split a text into words with a single regular expression.
+
+    Faster alternative to 'nltk.word_tokenize' for reviews. Punctuation is
+    separated as NLTK does, but periods are split from a word whenever they end
+    it, instead of relying on the Punkt sentence splitter. NLTK keeps the period
+    on a word (other than the last one) where Punkt doesn't end a sentence: on
+    the abbreviations of its model (English by default), on initials ('j.
+    silva') and on numbers followed by a lowercase word ('nota 10. recomendo'),
+    which are split here ('j', '.'). See 'benchmarks/tokenizer.py' for a
+    comparison on the corpus.
+    """
+
+    words = []
+    for match in _WORD_PATTERN.finditer(text):
+        word = match.group()
+
+        # Convert double quotes to the opening and closing quotes used by NLTK
+        if word == '"':
+            start = match.start()
+            if start == 0 or text[start - 1] in _OPENING_QUOTE_CONTEXT:
+                word = '``'
+            else:
+                word = "''"
+
+        words.append(word)
+
+    return(words)
+
+
+class Vocabulary:
+    """
+    Mapping between words and integer ids, shared by documents to store their
+    words compactly.
+    """
+
+    def __init__(self):
+        self.ids = dict()
+        self.words = []
+
+    def __len__(self):
+        return(len(self.words))
+
+    def encode(self, words):
+        """
+        Return an array with the ids of the given words, adding new words to
+        the vocabulary.
+        """
+
+        ids = self.ids
+        encoded = array.array('i')
+        for word in words:
+            word_id = ids.get(word)
+            if word_id is None:
+                word_id = ids[word] = len(self.words)
+                self.words.append(word)
+            encoded.append(word_id)
+
+        return(encoded)
+
+    def decode(self, ids):
+        """
+        Return the list of words corresponding to the given ids.
+        """
+
+        words = self.words
+
+        return([words[word_id] for word_id in ids])
+
+
+class Tokenizer:
+    """
+    Tokenizer splitting opinion texts into words and merging multi-word aspects.
+
+    Built once per ontology and shared by every document, along with the
+    vocabulary of words seen by it. The vocabulary only grows, so long-lived
+    users (like 'analyzer.Analyzer' and 'main.main') limit its size
+    ('limit_vocabulary').
+    """
+
+    def __init__(self, mwaspects=(), fast=False, matcher=None):
+        """
+        Construct a Tokenizer for the given multi-word aspects (list of tuples).
+        When 'fast' is set words are split by 'fast_word_tokenize' instead of
+        'nltk.word_tokenize', otherwise the NLTK 'punkt' data must be installed
+        (see 'ensure_punkt').
+
+        When an AspectMatcher is given it merges the multi-word aspects instead,
+        and also locates every aspect on the text (see 'tokenize_aspects').
+        """
+
+        self.fast = fast
+        self.matcher = matcher
+        self.vocabulary = Vocabulary()
+
+        # NLTK is only imported when used, as it's slow to import
+        if fast:
+            self._word_tokenize = fast_word_tokenize
+        else:
+            ensure_punkt()
+            from nltk import word_tokenize
+            self._word_tokenize = word_tokenize
+        if matcher is None:
+            from nltk.tokenize import MWETokenizer
+            self.mwtokenizer = MWETokenizer(mwaspects, separator=' ')
+
+    @classmethod
+    def from_ontology(cls, onto, fast=False, aspect_matcher=False):
+        """
+        Construct a Tokenizer for the multi-word aspects of an ontology dictionary,
+        using an AspectMatcher if 'aspect_matcher' is set.
+        """
+
+        if aspect_matcher:
+            return(cls(fast=fast, matcher=AspectMatcher(onto)))
+
+        return(cls(ontology.get_multi_word_aspects(onto), fast=fast))
+
+    def reset_vocabulary(self):
+        """
+        Start a new, empty vocabulary. Documents already built keep the
+        vocabulary their words refer to.
+        """
+
+        self.vocabulary = Vocabulary()
+
+    def limit_vocabulary(self, size=VOCABULARY_SIZE):
+        """
+        Reset the vocabulary once it holds more than 'size' words (0 for no
+        limit).
+        """
+
+        if size and len(self.vocabulary) > size:
+            self.reset_vocabulary()
+
+    def word_tokenize(self, text):
+        """
+        Split a text into words.
+        """
+
+        return(self._word_tokenize(text))
+
+    def tokenize(self, text):
+        """
+        Return the lowercased words of a text, with multi-word aspects merged
+        into single words.
+        """
+
+        return(self.tokenize_aspects(text)[0])
+
+    def tokenize_aspects(self, text):
+        """
+        Return the lowercased words of a text, with multi-word aspects merged
+        into single words, and a dictionary mapping the position of each aspect
+        to it's class. The dictionary is None when there's no AspectMatcher,
+        then aspects must be looked up on the ontology.
+        """
+
+        words = self.word_tokenize(text.lower())
+
+        if self.matcher is None:
+            return(self.mwtokenizer.tokenize(words), None)
+
+        return(self.matcher.merge(words))
@@ -1,122 +1,60 @@
-import glob
 import os
 import pathlib
-import subprocess
 
-import pandas as pd
-import pickle
-
-import ontology
-from document import Document
+import corpus
+import normalization
 
 PROJ_ROOT = os.path.abspath(os.path.join(__file__, os.pardir, os.pardir))
 
 
-def load_corpus(corpus_path, onto):
-    """
-    Create a list of Document objects representing the files in the corpus.
+def load_corpus(corpus_path, tokenizer):
     """
+    Create a list of Document objects representing the files in the corpus,
+    sharing the given Tokenizer.
 
-    corpus = []
-
-    mwaspects = ontology.get_multi_word_aspects(onto)
-
-    # Load all review files inside de corpus folder
-    for filename in glob.glob(os.path.join(corpus_path, '*.txt')):
-
-        review_year = int(os.path.basename(filename)[7:11])
-        review_code = int(os.path.basename(filename)[12:13])
-
-        with open(filename, 'r') as review_file:
-            review_data = review_file.read().replace('\n', '.')
-
-        # Create a list of Document objects containing each review
-        review = Document(review_data, review_year, mwaspects)
-        corpus.append(review)
-
-    return(corpus)
-
-
-def load_pickle_object(filename, class_name, class_args):
-    """
-    Load any class object stored with Pickle.
-    Create and store a new instance in case it doesn't exist.
-
-    Parameters
-    ----------
-    filename : String
-        File storing a Pickle object
-    class_name : Class type definition
-        Class definition corresponding to the object being loaded
-    class_args: List
-        List of arguments being passed to the class constructor
-
-    Returns
-    -------
-    loaded_object: Instance of type 'class_name'
+    Loads the whole corpus in memory, see 'corpus.stream_documents' to read
+    documents one at a time.
     """
 
-    try:
-        with open(filename, 'rb') as f:
-            loaded_object = pickle.load(f)
-
-    # except (OSError, IOError) as e:
-    except Exception as e:
-        loaded_object = class_name(*class_args)
-        with open(filename, 'wb') as f:
-            pickle.dump(loaded_object, f)
+    return(list(corpus.stream_documents(corpus.DirectorySource(corpus_path), tokenizer)))
 
-    return(loaded_object)
 
-
-def normalize_corpus(input_folder, output_folder):
+def normalize_corpus(input_folder, output_folder, **kwargs):
     """
+    Normalize the corpus files on a pool of normalizer subprocesses, skipping
+    the files already normalized. Keyword arguments are passed to
+    'normalization.normalize_corpus' (e.g. 'workers', 'command').
+
     Note
     ----
-    This function requires the UGCNormal normalizer to be on the parent directory.
+    This function requires the UGCNormal normalizer to be on the project folder.
     A fork of the project, including minor adjusts, can be obtained at:
     https://github.com/guimaraescca/UGCNormal
     """
 
-    subprocess.call(['../UGCNormal/ugc_norm.sh', input_folder, output_folder])
-
+    return(normalization.normalize_corpus(input_folder, output_folder, **kwargs))
 
-def sheet_to_file(sheet_file):
 
-    # Load sheet file as Dataframe
-    df_piloto = pd.read_excel(sheet_file, index_col=0, sheet_name=0, engine=None)
+def write_corpus_files(source, output_folder):
+    """
+    Write each review of a source (see the 'corpus' module) to a text file
+    '<output_folder>/<year>/<review id>.txt', the layout read by the normalizer.
+    Reviews are written one at a time, so memory doesn't grow with the source.
+    """
 
-    # Create corpus year folders
-    for i in range(0, 5):
-        folder_name = os.path.join(PROJ_ROOT, 'data/processed/corpus/original/{}'.format(2013 + i))
+    for review in source:
+        folder_name = os.path.join(output_folder, str(review.year))
         pathlib.Path(folder_name).mkdir(parents=True, exist_ok=True)
 
-    # For every review in the Dataframe create a new file
-    for i, row in enumerate(df_piloto.itertuples(index=True)):
-        filename = os.path.join(PROJ_ROOT, 'data/processed/corpus/original/{}/review-{}-{}.txt'.format(row[0], row[0], i % 10))
-        with open(filename, 'w') as review_file:
-            review_file.write(row[5])
-
+        with open(os.path.join(folder_name, f'{review.id}.txt'), 'w') as review_file:
+            review_file.write(review.text)
 
-def update_polarity_count(df_corpus, review_polarities, year):
 
-    # For each aspect and it's polarity value in the given review
-    for aspect, polarity in review_polarities.items():
-
-        # Obtain indexes that match the given 'aspect' and 'year'
-        df_id = df_corpus[(df_corpus.Aspect == aspect) & (df_corpus.Year == year)].index.tolist()
-
-        # Insert new occurrence if nothing was found
-        if df_id == []:
-            new_row = pd.DataFrame([[aspect, year, 0, 0]], columns=df_corpus.columns)
-            df_corpus = df_corpus.append(new_row, ignore_index=True)
-
-            df_id = df_corpus[(df_corpus.Aspect == aspect) & (df_corpus.Year == year)].index.tolist()
-
-        # Update polarity on the corpus DataFrame
-        if polarity >= 0:
-            df_corpus.at[df_id[0], 'Positive'] += 1
-        else:
-            df_corpus.at[df_id[0], 'Negative'] += 1
+def sheet_to_file(sheet_file, output_folder=os.path.join(PROJ_ROOT, 'data/processed/corpus/original/')):
+    """
+    Write the reviews of a spreadsheet to text files (see 'write_corpus_files').
+    The reviews can also be analysed directly, with 'corpus.SheetSource' as the
+    source given to 'main'.
+    """
 
-    return(df_corpus)
+    write_corpus_files(corpus.SheetSource(sheet_file), output_folder)